@@ -0,0 +1,393 @@
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+# Gateway benchmark: starts the stub CMS and a gateway worker, drives each
+# scenario at a fixed concurrency and writes throughput, latency percentiles
+# and allocations per request as JSON.
+#
+#   cd backend
+#   python benchmarks/run.py --output /tmp/before.json
+#   ... change the gateway ...
+#   python benchmarks/run.py --output /tmp/after.json
+#   python benchmarks/run.py compare /tmp/before.json /tmp/after.json
+#
+# Latency is measured over HTTP against a separate gateway process. The load
+# generator runs in this process, so keep --concurrency within what one core
+# of httpx can drive, or the client becomes the bottleneck. Allocations are
+# measured afterwards by calling the gateway app in-process under tracemalloc.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_CMS = os.path.join(BACKEND_DIR, "benchmarks", "stub_cms.py")
+
+SEARCH_TERMS = ["asthma", "diabetes", "pain", "heart", "sleep", "vitamin", "infection", "stress"]
+
+# Request builders: each takes the scenario's random generator and returns a path
+REQUESTS: Dict[str, Callable[[random.Random, argparse.Namespace], str]] = {
+    "top-stories": lambda rng, args: "/api/articles/top-stories",
+    "article": lambda rng, args: f"/api/articles/article-{rng.randrange(args.articles)}",
+    "search": lambda rng, args: f"/api/search?q={rng.choice(SEARCH_TERMS)}",
+    "drugs-index": lambda rng, args: "/api/drugs/index",
+}
+
+# Relative weights of each request in a scenario; "mix" approximates the
+# share of traffic the site sees
+SCENARIOS: Dict[str, Dict[str, int]] = {
+    "mix": {"top-stories": 30, "article": 45, "search": 15, "drugs-index": 10},
+    "top-stories": {"top-stories": 1},
+    "article": {"article": 1},
+    "search": {"search": 1},
+    "drugs-index": {"drugs-index": 1},
+}
+
+# Relative change beyond which `compare` flags a metric
+COMPARE_THRESHOLD = 0.05
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def _latency_summary(latencies: List[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "p50": round(_percentile(ordered, 0.50) * 1000, 3),
+        "p95": round(_percentile(ordered, 0.95) * 1000, 3),
+        "p99": round(_percentile(ordered, 0.99) * 1000, 3),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def _gateway_env(args, cms_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "CMS_API_URL": cms_url,
+        "ENV": "production",
+        "CACHE_ENABLED": "false" if args.no_cache else "true",
+        "PYTHONPATH": BACKEND_DIR,
+    })
+    return env
+
+
+class Servers:
+    """
+    Stub CMS and gateway subprocesses for the duration of a run
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.cms_port = _free_port()
+        self.gateway_port = _free_port()
+        self.cms_url = f"http://127.0.0.1:{self.cms_port}/api"
+        self.gateway_url = f"http://127.0.0.1:{self.gateway_port}"
+        self._processes: List[subprocess.Popen] = []
+
+    def __enter__(self):
+        args = self.args
+        self._start([
+            sys.executable, STUB_CMS, "--port", str(self.cms_port),
+            "--latency-ms", str(args.cms_latency_ms), "--jitter-ms", str(args.cms_jitter_ms),
+            "--payload-bytes", str(args.payload_bytes), "--articles", str(args.articles),
+            "--drugs", str(args.drugs),
+        ], os.environ)
+        self._start([
+            sys.executable, "-m", "uvicorn", "main:app", "--port", str(self.gateway_port),
+            "--log-level", "warning", "--no-access-log",
+        ], _gateway_env(args, self.cms_url))
+        self._wait_until_up(f"{self.cms_url}/search/articles")
+        self._wait_until_up(f"{self.gateway_url}/api/health")
+        return self
+
+    def __exit__(self, *exc_info):
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def _start(self, command: List[str], env):
+        output = None if self.args.verbose else subprocess.DEVNULL
+        self._processes.append(subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=output, stderr=output))
+
+    def _wait_until_up(self, url: str, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for process in self._processes:
+                if process.poll() is not None:
+                    raise RuntimeError(f"{' '.join(process.args)} exited with {process.returncode}")
+            try:
+                httpx.get(url, timeout=1.0)
+                return
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def _request_picker(scenario: str, seed: int) -> Tuple[random.Random, Callable[[], str]]:
+    names = list(SCENARIOS[scenario])
+    weights = list(SCENARIOS[scenario].values())
+    rng = random.Random(seed)
+    return rng, lambda: rng.choices(names, weights=weights)[0]
+
+
+async def _drive(base_url: str, scenario: str, args) -> dict:
+    """
+    Send the scenario's requests from --concurrency clients, discarding the
+    warm-up period, and summarise what was measured
+    """
+    rng, pick = _request_picker(scenario, args.seed)
+    latencies: Dict[str, List[float]] = {name: [] for name in SCENARIOS[scenario]}
+    statuses: Counter = Counter()
+    errors = 0
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        started = time.monotonic()
+        measure_from = started + args.warmup
+        stop_at = measure_from + args.duration
+
+        async def worker():
+            nonlocal errors
+            while True:
+                now = time.monotonic()
+                if now >= stop_at:
+                    return
+                name = pick()
+                path = REQUESTS[name](rng, args)
+                request_started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = "error"
+                elapsed = time.perf_counter() - request_started
+                if now < measure_from:
+                    continue
+                statuses[str(status)] += 1
+                if status == 200:
+                    latencies[name].append(elapsed)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+
+    measured = [value for values in latencies.values() for value in values]
+    result = {
+        "requests": len(measured) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(measured) / args.duration, 1),
+        "latency_ms": _latency_summary(measured),
+        "status_codes": dict(statuses),
+    }
+    if len(latencies) > 1:
+        result["endpoints"] = {
+            name: {"requests": len(values), "latency_ms": _latency_summary(values)}
+            for name, values in latencies.items()
+        }
+    return result
+
+
+async def _asgi_get(app, path: str) -> int:
+    """
+    Call the ASGI app directly, without an HTTP client whose own allocations
+    would be counted against the gateway
+    """
+    raw_path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": raw_path, "raw_path": raw_path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": [(b"host", b"benchmark")],
+        "client": ("127.0.0.1", 0), "server": ("benchmark", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _measure_allocations(scenario: str, args, cms_url: str) -> dict:
+    """
+    Peak and retained traced memory per request, from calling the gateway
+    app in-process after it has warmed up
+    """
+    os.environ.update(_gateway_env(args, cms_url))
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    from main import app
+    from cms_client import cms_client
+
+    rng, pick = _request_picker(scenario, args.seed)
+    paths = [REQUESTS[pick()](rng, args) for _ in range(args.alloc_requests)]
+    try:
+        # Fill caches and indexes so steady-state requests are measured
+        for path in paths[:20]:
+            await _asgi_get(app, path)
+
+        peaks = []
+        retained = []
+        tracemalloc.start()
+        try:
+            for path in paths:
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                await _asgi_get(app, path)
+                current, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - before)
+                retained.append(current - before)
+        finally:
+            tracemalloc.stop()
+    finally:
+        await cms_client.close()
+
+    return {
+        "requests": len(paths),
+        "peak_bytes_per_request": round(sum(peaks) / len(peaks)),
+        "retained_bytes_per_request": round(sum(retained) / len(retained)),
+    }
+
+
+def run(args) -> dict:
+    scenarios = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "cms_latency_ms": args.cms_latency_ms,
+            "cms_jitter_ms": args.cms_jitter_ms,
+            "payload_bytes": args.payload_bytes,
+            "articles": args.articles,
+            "drugs": args.drugs,
+            "cache": not args.no_cache,
+            "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+    with Servers(args) as servers:
+        for scenario in scenarios:
+            print(f"Running {scenario} for {args.duration}s at concurrency {args.concurrency}", file=sys.stderr)
+            results["scenarios"][scenario] = asyncio.run(_drive(servers.gateway_url, scenario, args))
+        if args.alloc_requests:
+            for scenario in scenarios:
+                print(f"Measuring allocations for {scenario}", file=sys.stderr)
+                results["scenarios"][scenario]["allocations"] = asyncio.run(
+                    _measure_allocations(scenario, args, servers.cms_url)
+                )
+    return results
+
+
+def _compare_line(name: str, before: float, after: float, lower_is_better: bool) -> str:
+    change = (after - before) / before if before else 0.0
+    flag = ""
+    if abs(change) >= COMPARE_THRESHOLD:
+        flag = "better" if (change < 0) == lower_is_better else "WORSE"
+    return f"  {name:<28} {before:>12} {after:>12} {change:>+8.1%} {flag}"
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as before_file, open(after_path) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    for scenario, new in after["scenarios"].items():
+        old = before["scenarios"].get(scenario)
+        if old is None:
+            continue
+        print(scenario)
+        print(_compare_line("throughput_rps", old["throughput_rps"], new["throughput_rps"], False))
+        for percentile in ("p50", "p95", "p99"):
+            print(_compare_line(
+                f"latency_ms.{percentile}", old["latency_ms"][percentile], new["latency_ms"][percentile], True
+            ))
+        if "allocations" in old and "allocations" in new:
+            for key in ("peak_bytes_per_request", "retained_bytes_per_request"):
+                print(_compare_line(key, old["allocations"][key], new["allocations"][key], True))
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["compare"]:
+        if len(argv) != 3:
+            sys.exit("usage: python benchmarks/run.py compare BEFORE.json AFTER.json")
+        compare(argv[1], argv[2])
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark the gateway against a stub CMS")
+    parser.add_argument("--scenario", default="all", choices=["all", *SCENARIOS])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--cms-latency-ms", type=float, default=20.0)
+    parser.add_argument("--cms-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--payload-bytes", type=int, default=20000, help="Size of article bodies")
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--drugs", type=int, default=2000)
+    parser.add_argument("--no-cache", action="store_true", help="Run the gateway with CACHE_ENABLED=false")
+    parser.add_argument("--alloc-requests", type=int, default=200,
+                        help="Requests per scenario measured under tracemalloc (0 to skip)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="Show stub CMS and gateway logs")
+    parser.add_argument("--output", help="Write results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import sys
+import json
+import random
+import asyncio
+import hashlib
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI, Request, Response
+
+# Stand-in for the CMS API used by the gateway benchmarks. It serves the
+# endpoints the benchmarked routes call, shaped like the real ones, with a
+# configurable response delay and payload size so gateway changes can be
+# measured without a database or Wagtail in the loop.
+#
+#   python benchmarks/stub_cms.py --port 8901 --latency-ms 20 --payload-bytes 20000
+
+SEARCH_RESULTS = 10
+TOP_STORIES = 5
+
+WORDS = (
+    "health blood pressure heart sleep diet exercise pain treatment symptoms doctor "
+    "medicine infection immune skin joint stress vitamin dose risk chronic"
+).split()
+
+
+def _text(rng: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def _published(rng: random.Random) -> str:
+    moment = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randrange(500000))
+    return moment.isoformat()
+
+
+class StubContent:
+    """
+    Deterministic content for the stub, generated once at startup
+    """
+
+    def __init__(self, articles: int, drugs: int, payload_bytes: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.previews = [
+            {
+                "id": index,
+                "title": f"Article {index} about {rng.choice(WORDS)}",
+                "slug": f"article-{index}",
+                "summary": _text(rng, 200),
+                "subtitle": None,
+                "image": f"https://images.example.com/articles/{index}.jpg",
+                "category": rng.choice(["Nutrition", "Sleep", "Heart Health", "Fitness"]),
+                "created_at": _published(rng),
+            }
+            for index in range(articles)
+        ]
+        self.articles = {
+            preview["slug"]: {
+                **preview,
+                "content": _text(rng, payload_bytes),
+                "author": {"name": "Dr. Stub", "credentials": "MD", "bio": _text(rng, 200), "image": None},
+                "published_date": preview["created_at"],
+                "updated_date": None,
+                "tags": rng.sample(WORDS, 3),
+                "category": {"name": preview["category"], "slug": preview["category"].lower().replace(" ", "-")},
+            }
+            for preview in self.previews
+        }
+        self.drug_pages = [
+            {
+                "id": index,
+                "meta": {"type": "drugs.DrugPage", "slug": f"drug-{index}"},
+                "title": f"{rng.choice(WORDS).title()}{index}",
+                "generic_name": f"{rng.choice(WORDS)}{index}ine" if index % 4 else "",
+                "brand_names": f"Brand{index}",
+                "drug_class": rng.choice(["Analgesic", "Antibiotic", "Antihistamine", "Statin"]),
+                "last_published_at": _published(rng),
+            }
+            for index in range(1, drugs + 1)
+        ]
+        self.conditions = [
+            {"id": index, "name": f"Condition {index}", "slug": f"condition-{index}", "subtitle": _text(rng, 60)}
+            for index in range(SEARCH_RESULTS)
+        ]
+        self.drug_previews = [
+            {"id": page["id"], "name": page["title"], "slug": page["meta"]["slug"], "type": "Medication",
+             "description": _text(rng, 150), "image": None}
+            for page in self.drug_pages[:SEARCH_RESULTS]
+        ]
+
+
+def create_app(latency_ms: float = 20.0, jitter_ms: float = 5.0, payload_bytes: int = 20000,
+               articles: int = 200, drugs: int = 2000) -> FastAPI:
+    content = StubContent(articles, drugs, payload_bytes)
+    app = FastAPI(title="Stub CMS")
+
+    async def respond(request: Request, payload) -> Response:
+        delay = latency_ms + random.uniform(-jitter_ms, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"etag": etag})
+        return Response(body, media_type="application/json", headers={"etag": etag})
+
+    @app.get("/api/pages/")
+    async def pages(request: Request):
+        # Top stories: pages/?type=news.NewsPage&...
+        return await respond(request, content.previews[:TOP_STORIES])
+
+    @app.get("/api/v2/pages/")
+    async def v2_pages(request: Request, offset: int = 0, limit: int = 20, order: str = "id"):
+        items = content.drug_pages
+        if order == "-last_published_at":
+            items = sorted(items, key=lambda page: page["last_published_at"], reverse=True)
+        return await respond(request, {
+            "meta": {"total_count": len(items)},
+            "items": items[offset:offset + limit],
+        })
+
+    def search_page(results, offset: int, limit: int):
+        return {"count": len(results), "offset": offset, "limit": limit, "results": results[offset:offset + limit]}
+
+    @app.get("/api/search/articles")
+    async def articles_search(request: Request, q: str = "", offset: int = 0, limit: int = 10):
+        return await respond(request, search_page(content.previews[:SEARCH_RESULTS], offset, limit))
+
+    @app.get("/api/search/conditions")
+    async def conditions_search(request: Request, q: str = "", offset: int = 0, limit: int = 10):
+        return await respond(request, search_page(content.conditions, offset, limit))
+
+    @app.get("/api/search/drugs")
+    async def drugs_search(request: Request, q: str = "", offset: int = 0, limit: int = 10):
+        return await respond(request, search_page(content.drug_previews, offset, limit))
+
+    @app.get("/api/articles/{slug}")
+    async def article(request: Request, slug: str):
+        article = content.articles.get(slug)
+        if article is None:
+            return Response(status_code=404)
+        return await respond(request, article)
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub CMS API for gateway benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mean response delay")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Uniform +/- variation of the delay")
+    parser.add_argument("--payload-bytes", type=int, default=20000, help="Size of article bodies")
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--drugs", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.payload_bytes, args.articles, args.drugs)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
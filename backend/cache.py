@@ -0,0 +1,257 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Extra time (seconds) an expired entry may still be served while it is refreshed
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", 600))
+
+# Memory budget for last-known-good CMS responses served during outages
+LKG_MAX_BYTES = int(os.getenv("LKG_MAX_BYTES", 32 * 1024 * 1024))
+
+# Fresh lifetime (seconds) of cached CMS responses, matched on the longest
+# endpoint prefix. Endpoints without an entry are never cached.
+CACHE_TTLS = {
+    "pages/?type=news.NewsPage": 300,  # /api/articles/top-stories
+    "articles/health-topics": 300,
+    "articles/paths": 900,
+    "api/conditions-index": 900,  # /api/conditions/index
+    "conditions/paths": 900,
+    "well-being": 300,
+}
+
+
+def ttl_for(endpoint: str) -> Optional[float]:
+    """
+    Look up the cache TTL for a CMS endpoint, or None if it is not cacheable
+    """
+    path = endpoint.lstrip("/")
+    ttl = None
+    matched = ""
+    for prefix, value in CACHE_TTLS.items():
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            matched = prefix
+            ttl = value
+    return ttl
+
+
+def cache_key(endpoint: str, params=None) -> str:
+    """
+    Build a stable cache key from an endpoint and its query parameters
+    """
+    key = endpoint.lstrip("/")
+    if params:
+        key += "|" + "&".join(f"{k}={v}" for k, v in sorted(dict(params).items()))
+    return key
+
+
+class StoredResponse(NamedTuple):
+    """
+    A decoded CMS payload with the validators the CMS sent for it
+    """
+    value: Any
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class CacheEntry:
+    __slots__ = (
+        "key", "value", "size", "etag", "last_modified", "fresh_until", "stale_until",
+        "encoded", "encoded_etag", "encoded_model",
+    )
+
+    def __init__(self, key: str, response: StoredResponse, ttl: float, stale_ttl: float):
+        now = time.monotonic()
+        self.key = key
+        self.value = response.value
+        self.size = response.size
+        self.etag = response.etag
+        self.last_modified = response.last_modified
+        self.fresh_until = now + ttl
+        self.stale_until = self.fresh_until + stale_ttl
+        # Validated, pre-encoded response body for the fast JSON path
+        self.encoded: Optional[bytes] = None
+        self.encoded_etag: Optional[str] = None
+        self.encoded_model = None
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def is_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of CMS payloads bounded by their encoded size.
+
+    Entries are fresh for their TTL and may then be served stale for a further
+    stale_ttl while a background refresh replaces them.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, stale_ttl: float = CACHE_STALE_TTL):
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Return the entry for key if it can still be served, counting the lookup
+        """
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None or not entry.is_usable(now):
+            if entry is not None:
+                self._remove(entry)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if entry.is_fresh(now):
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """
+        Return the entry for key without counting a lookup or touching LRU order
+        """
+        return self._entries.get(key)
+
+    def attach_encoded(self, entry: CacheEntry, body: bytes, etag: str, model):
+        """
+        Keep the encoded response body with its entry, charging it to the budget
+        """
+        if entry.encoded is not None:
+            entry.size -= len(entry.encoded)
+            if self._entries.get(entry.key) is entry:
+                self.current_bytes -= len(entry.encoded)
+        entry.encoded = body
+        entry.encoded_etag = etag
+        entry.encoded_model = model
+        entry.size += len(body)
+        if self._entries.get(entry.key) is entry:
+            self.current_bytes += len(body)
+
+    def set(self, key: str, response: StoredResponse, ttl: float) -> Optional[CacheEntry]:
+        """
+        Store a payload, evicting least recently used entries to stay in budget
+        """
+        if response.size > self.max_bytes:
+            logger.warning(f"Not caching {key}: {response.size} bytes exceeds cache size")
+            return None
+
+        existing = self._entries.get(key)
+        if existing is not None:
+            self._remove(existing)
+
+        entry = CacheEntry(key, response, ttl, self.stale_ttl)
+        self._entries[key] = entry
+        self.current_bytes += response.size
+
+        while self.current_bytes > self.max_bytes:
+            _, oldest = self._entries.popitem(last=False)
+            self.current_bytes -= oldest.size
+            self.evictions += 1
+        return entry
+
+    def delete(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._remove(entry)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """
+        Drop every entry whose key starts with the given endpoint prefix
+        """
+        prefix = prefix.lstrip("/")
+        doomed = [entry for key, entry in self._entries.items() if key.startswith(prefix)]
+        for entry in doomed:
+            self._remove(entry)
+        return len(doomed)
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def _remove(self, entry: CacheEntry):
+        del self._entries[entry.key]
+        self.current_bytes -= entry.size
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+
+class LastKnownGoodStore:
+    """
+    Most recent successful CMS payload per resource, kept without expiry.
+
+    Used as a fallback when the CMS is failing or its circuit is open, so users
+    see slightly old real content instead of an error, and as the source of
+    validators for conditional requests once a cache entry has expired.
+    Bounded by encoded size with least recently stored entries dropped first.
+    """
+
+    def __init__(self, max_bytes: int = LKG_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self.served = 0
+
+    def set(self, key: str, response: StoredResponse):
+        if response.size > self.max_bytes:
+            return
+        existing = self._entries.pop(key, None)
+        if existing is not None:
+            self.current_bytes -= existing.size
+        self._entries[key] = response
+        self.current_bytes += response.size
+        while self.current_bytes > self.max_bytes:
+            _, oldest = self._entries.popitem(last=False)
+            self.current_bytes -= oldest.size
+
+    def peek(self, key: str) -> Optional[StoredResponse]:
+        """
+        Return the stored response without counting it as served
+        """
+        return self._entries.get(key)
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        response = self._entries.get(key)
+        if response is not None:
+            self.served += 1
+        return response
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "served": self.served,
+        }
+
+
+response_cache = ResponseCache()
+last_known_good = LastKnownGoodStore()
@@ -0,0 +1,83 @@
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Consecutive upstream failures that open the circuit
+CMS_BREAKER_FAILURE_THRESHOLD = int(os.getenv("CMS_BREAKER_FAILURE_THRESHOLD", 5))
+# Seconds the circuit stays open before a probe request is let through
+CMS_BREAKER_RECOVERY_TIMEOUT = float(os.getenv("CMS_BREAKER_RECOVERY_TIMEOUT", 30.0))
+# Probe requests allowed at once while half-open
+CMS_BREAKER_HALF_OPEN_CALLS = int(os.getenv("CMS_BREAKER_HALF_OPEN_CALLS", 1))
+
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream that keeps failing.
+
+    closed: requests flow and consecutive failures are counted.
+    open: requests are rejected immediately until recovery_timeout elapses.
+    half_open: a limited number of probe requests are let through; a success
+    closes the circuit, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CMS_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout: float = CMS_BREAKER_RECOVERY_TIMEOUT,
+        half_open_max_calls: int = CMS_BREAKER_HALF_OPEN_CALLS,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.rejected = 0
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                self.rejected += 1
+                return False
+            logger.info(f"Circuit '{self.name}' half-open, probing upstream")
+            self.state = self.HALF_OPEN
+            self.half_open_calls = 0
+
+        if self.state == self.HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                return False
+            self.half_open_calls += 1
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed, upstream recovered")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.half_open_calls = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit '{self.name}' opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.half_open_calls = 0
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,327 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException
+
+from cache import CACHE_ENABLED, StoredResponse, cache_key, last_known_good, response_cache, ttl_for
+from conditional import note_upstream_last_modified
+from circuit_breaker import CircuitBreaker
+from metrics import cms_endpoint_label, cms_request_duration, cms_requests_in_flight
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Set the CMS API URL from environment variable with a fallback
+CMS_API_URL = os.getenv("CMS_API_URL", "http://localhost:8001/api")
+
+# Connection pool settings for the shared CMS client
+CMS_MAX_CONNECTIONS = int(os.getenv("CMS_MAX_CONNECTIONS", 100))
+CMS_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("CMS_MAX_KEEPALIVE_CONNECTIONS", 20))
+CMS_KEEPALIVE_EXPIRY = float(os.getenv("CMS_KEEPALIVE_EXPIRY", 30.0))
+
+# Timeouts (seconds) applied to every CMS request unless overridden below
+CMS_TIMEOUT = float(os.getenv("CMS_TIMEOUT", 10.0))
+CMS_CONNECT_TIMEOUT = float(os.getenv("CMS_CONNECT_TIMEOUT", 2.0))
+CMS_POOL_TIMEOUT = float(os.getenv("CMS_POOL_TIMEOUT", 2.0))
+
+# Read timeouts for specific endpoints, matched on the longest endpoint prefix
+ENDPOINT_TIMEOUTS = {
+    "search/": 3.0,
+    "symptom-checker": 3.0,
+    "suggest/corpus": 20.0,
+    "v2/pages": 20.0,
+}
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+CMS_HTTP2 = os.getenv("CMS_HTTP2", "true").lower() == "true" and HTTP2_AVAILABLE
+
+
+def timeout_for(endpoint: str) -> httpx.Timeout:
+    """
+    Build the timeout for a CMS endpoint from the per-endpoint overrides
+    """
+    path = endpoint.lstrip("/")
+    read_timeout = CMS_TIMEOUT
+    matched = ""
+    for prefix, value in ENDPOINT_TIMEOUTS.items():
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            matched = prefix
+            read_timeout = value
+    return httpx.Timeout(read_timeout, connect=CMS_CONNECT_TIMEOUT, pool=CMS_POOL_TIMEOUT)
+
+
+class CMSClient:
+    """
+    Keep-alive connection pool shared by every router that talks to the CMS.
+
+    The pool is opened and closed by the application lifespan in main.py. If a
+    request arrives outside the lifespan (scripts, direct calls) the client is
+    created on first use.
+    """
+
+    def __init__(self, base_url: str = CMS_API_URL):
+        self.base_url = base_url.rstrip("/")
+        self._client: Optional[httpx.AsyncClient] = None
+        self.not_modified = 0
+
+    async def start(self):
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            http2=CMS_HTTP2,
+            limits=httpx.Limits(
+                max_connections=CMS_MAX_CONNECTIONS,
+                max_keepalive_connections=CMS_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=CMS_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(CMS_TIMEOUT, connect=CMS_CONNECT_TIMEOUT, pool=CMS_POOL_TIMEOUT),
+            headers={"Accept": "application/json"},
+        )
+        logger.info(
+            f"CMS client started for {self.base_url} "
+            f"(http2={CMS_HTTP2}, max_connections={CMS_MAX_CONNECTIONS})"
+        )
+
+    async def close(self):
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+        logger.info("CMS client closed")
+
+    async def get(self, endpoint: str, params=None, headers=None) -> httpx.Response:
+        return await self.request("GET", endpoint, params=params, headers=headers)
+
+    async def post(self, endpoint: str, payload, headers=None) -> httpx.Response:
+        return await self.request("POST", endpoint, json=payload, headers=headers)
+
+    async def request(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        if self._client is None:
+            await self.start()
+        status = "error"
+        started = time.perf_counter()
+        cms_requests_in_flight.inc()
+        try:
+            response = await self._client.request(
+                method,
+                f"{self.base_url}/{endpoint.lstrip('/')}",
+                timeout=timeout_for(endpoint),
+                **kwargs,
+            )
+            status = str(response.status_code)
+            return response
+        finally:
+            cms_requests_in_flight.dec()
+            cms_request_duration.labels(cms_endpoint_label(endpoint), status).observe(
+                time.perf_counter() - started
+            )
+
+
+cms_client = CMSClient()
+
+
+async def _get_json(endpoint: str, params=None, known: Optional[StoredResponse] = None) -> StoredResponse:
+    """
+    Fetch a CMS endpoint and return its decoded payload, size and validators.
+
+    When a previous response is known, the request is made conditional and a
+    304 from the CMS returns that response again without re-downloading it.
+    """
+    headers = {}
+    if known is not None:
+        if known.etag:
+            headers["If-None-Match"] = known.etag
+        if known.last_modified:
+            headers["If-Modified-Since"] = known.last_modified
+    try:
+        response = await cms_client.get(endpoint, params=params, headers=headers)
+        if response.status_code == 304 and known is not None:
+            cms_client.not_modified += 1
+            return known
+        response.raise_for_status()
+        return StoredResponse(
+            response.json(),
+            len(response.content),
+            response.headers.get("etag"),
+            response.headers.get("last-modified"),
+        )
+    except httpx.RequestError as exc:
+        logger.error(f"Error fetching {endpoint}: {exc}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service unavailable: Unable to connect to CMS API."
+        )
+    except httpx.HTTPStatusError as exc:
+        logger.error(f"Error response {exc.response.status_code} from CMS: {exc}")
+        status_code = exc.response.status_code
+        try:
+            detail = exc.response.json()
+        except:
+            detail = str(exc)
+        raise HTTPException(status_code=status_code, detail=detail)
+    except Exception as exc:
+        logger.error(f"Unexpected error fetching {endpoint}: {exc}")
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+async def _load(endpoint: str, params, key: str, ttl: Optional[float]) -> StoredResponse:
+    if not cms_breaker.allow_request():
+        # Fail fast while the CMS is known to be down
+        return _last_known_good(endpoint, key, "CMS circuit open")
+
+    try:
+        # Revalidate against the last response we saw for this resource
+        response = await _get_json(endpoint, params, last_known_good.peek(key))
+    except HTTPException as exc:
+        if exc.status_code < 500:
+            # The CMS answered, so it is up even if the resource is not there
+            cms_breaker.record_success()
+            raise
+        cms_breaker.record_failure()
+        return _last_known_good(endpoint, key, exc.detail, exc)
+
+    cms_breaker.record_success()
+    last_known_good.set(key, response)
+    if ttl is not None:
+        response_cache.set(key, response, ttl)
+    return response
+
+
+def _last_known_good(endpoint: str, key: str, reason, exc: Optional[HTTPException] = None) -> StoredResponse:
+    """
+    Serve the most recent real response for a resource, or raise a 503
+    """
+    response = last_known_good.get(key)
+    if response is not None:
+        logger.warning(f"Serving last known good response for {endpoint}: {reason}")
+        return response
+    if exc is not None:
+        raise exc
+    raise HTTPException(
+        status_code=503,
+        detail=f"Service unavailable: {reason}."
+    )
+
+
+async def _load_shared(endpoint: str, params, key: str, ttl: Optional[float]):
+    """
+    Load an endpoint, sharing one upstream request between concurrent callers
+    """
+    return await cms_flights.do(key, lambda: _load(endpoint, params, key, ttl))
+
+
+async def _refresh(endpoint: str, params, key: str, ttl: float):
+    try:
+        await _load_shared(endpoint, params, key, ttl)
+    except HTTPException as exc:
+        logger.warning(f"Background refresh of {endpoint} failed: {exc.detail}")
+
+
+# Trips after repeated CMS failures so requests fail fast during an outage
+cms_breaker = CircuitBreaker("cms")
+
+# Concurrent identical CMS requests (including cache refreshes) share one call
+cms_flights = SingleFlight()
+
+# Keep references to background refreshes so they are not garbage collected
+_background_tasks = set()
+
+
+async def fetch_cms_entry(endpoint: str, params=None):
+    """
+    Fetch a CMS endpoint, returning its payload and the cache entry holding it.
+
+    The entry is None for endpoints that are not cached (or too large to cache).
+    """
+    ttl = ttl_for(endpoint) if CACHE_ENABLED else None
+    key = cache_key(endpoint, params)
+    if ttl is None:
+        response = await _load_shared(endpoint, params, key, None)
+        note_upstream_last_modified(response.last_modified)
+        return response.value, None
+
+    entry = response_cache.get(key)
+    if entry is None:
+        response = await _load_shared(endpoint, params, key, ttl)
+        note_upstream_last_modified(response.last_modified)
+        entry = response_cache.peek(key)
+        if entry is not None and entry.value is not response.value:
+            entry = None
+        return response.value, entry
+
+    # Serve stale entries immediately and refresh them in the background
+    if not entry.is_fresh(time.monotonic()) and not cms_flights.in_flight(key):
+        task = asyncio.create_task(_refresh(endpoint, params, key, ttl))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    note_upstream_last_modified(entry.last_modified)
+    return entry.value, entry
+
+
+async def fetch_uncached(endpoint: str, params=None):
+    """
+    Fetch a CMS endpoint through the circuit breaker, bypassing the response
+    cache and last-known-good store.
+
+    For callers such as the drugs index that keep their own derived copy of
+    the data and would otherwise fill the cache with one-off pages.
+    """
+    if not cms_breaker.allow_request():
+        raise HTTPException(status_code=503, detail="Service unavailable: CMS circuit open.")
+    try:
+        response = await _get_json(endpoint, params)
+    except HTTPException as exc:
+        if exc.status_code < 500:
+            cms_breaker.record_success()
+        else:
+            cms_breaker.record_failure()
+        raise
+    cms_breaker.record_success()
+    return response.value
+
+
+async def post_to_cms(endpoint: str, payload):
+    """
+    POST a JSON payload to a CMS endpoint through the circuit breaker and
+    return the decoded response. Never cached.
+    """
+    if not cms_breaker.allow_request():
+        raise HTTPException(status_code=503, detail="Service unavailable: CMS circuit open.")
+    try:
+        response = await cms_client.post(endpoint, payload)
+        response.raise_for_status()
+        value = response.json()
+    except httpx.RequestError as exc:
+        cms_breaker.record_failure()
+        logger.error(f"Error posting to {endpoint}: {exc}")
+        raise HTTPException(status_code=503, detail="Service unavailable: Unable to connect to CMS API.")
+    except httpx.HTTPStatusError as exc:
+        status_code = exc.response.status_code
+        if status_code >= 500:
+            cms_breaker.record_failure()
+        else:
+            cms_breaker.record_success()
+        logger.error(f"Error response {status_code} from CMS: {exc}")
+        try:
+            detail = exc.response.json()
+        except ValueError:
+            detail = str(exc)
+        raise HTTPException(status_code=status_code, detail=detail)
+    cms_breaker.record_success()
+    return value
+
+
+# Utility function to make requests to the CMS API
+async def fetch_from_cms(endpoint: str, params=None):
+    value, _ = await fetch_cms_entry(endpoint, params)
+    return value
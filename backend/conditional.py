@@ -0,0 +1,145 @@
+import hashlib
+import logging
+from contextvars import ContextVar
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Last-Modified values of the CMS responses used to build the current response.
+# The middleware installs a fresh list per request; fetch_from_cms appends to it.
+upstream_last_modified: ContextVar[Optional[List[Optional[str]]]] = ContextVar(
+    "upstream_last_modified", default=None
+)
+
+
+def note_upstream_last_modified(value: Optional[str]):
+    """
+    Record the Last-Modified of a CMS response used by the current request
+    """
+    validators = upstream_last_modified.get()
+    if validators is not None:
+        validators.append(value)
+
+
+def _parse_http_date(value: Optional[str]):
+    if not value:
+        return None
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        return date.replace(tzinfo=timezone.utc)
+    return date.astimezone(timezone.utc)
+
+
+def _combined_last_modified(validators: List[Optional[str]]):
+    """
+    Latest upstream Last-Modified, or None if any upstream response lacked one
+    """
+    dates = [_parse_http_date(value) for value in validators]
+    if not dates or any(date is None for date in dates):
+        return None
+    return max(dates)
+
+
+def body_etag(body: bytes) -> str:
+    """
+    Strong ETag for a response body
+    """
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore W/ prefixes
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ConditionalGetMiddleware:
+    """
+    Add ETag/Last-Modified to successful JSON GET responses and answer 304
+    when the client's If-None-Match or If-Modified-Since still holds.
+
+    The ETag is a hash of the response body, unless the endpoint already set
+    one (pre-encoded cache entries carry theirs). Last-Modified is the newest
+    Last-Modified of the CMS responses the endpoint used, and is only sent when
+    every one of them carried one.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        validators: List[Optional[str]] = []
+        token = upstream_last_modified.set(validators)
+        start_message = None
+        body_parts = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"")
+                if message["status"] != 200 or not content_type.startswith(b"application/json"):
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            if message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                await self._send_conditional(scope, send, start_message, b"".join(body_parts), validators)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            upstream_last_modified.reset(token)
+
+    async def _send_conditional(self, scope, send, start_message, body: bytes, validators):
+        response_headers = dict(start_message.get("headers", []))
+        etag = response_headers.get(b"etag", b"").decode("latin-1") or body_etag(body)
+        last_modified = _combined_last_modified(validators)
+
+        request_headers = dict(scope.get("headers", []))
+        if_none_match = request_headers.get(b"if-none-match")
+        if_modified_since = _parse_http_date(request_headers.get(b"if-modified-since", b"").decode("latin-1"))
+
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match.decode("latin-1"), etag)
+        else:
+            not_modified = bool(last_modified and if_modified_since and last_modified <= if_modified_since)
+
+        headers = [
+            (name, value) for name, value in start_message.get("headers", [])
+            if name != b"etag" and (not not_modified or name not in (b"content-length", b"content-type"))
+        ]
+        headers.append((b"etag", etag.encode("latin-1")))
+        if last_modified is not None:
+            headers.append((b"last-modified", format_datetime(last_modified, usegmt=True).encode("latin-1")))
+
+        if not_modified:
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers = [(name, value) for name, value in headers if name != b"content-length"]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
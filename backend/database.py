@@ -19,6 +19,110 @@ engine = create_engine(DATABASE_URL)
 # Create sessionmaker
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _async_database_url(url):
+    """
+    Map a synchronous DATABASE_URL onto its asyncio driver
+    """
+    scheme, _, rest = url.partition("://")
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
+# Async pool tuning. Every route in db read mode holds a connection only for the
+# duration of its queries, so the pool size bounds concurrent database reads per
+# worker; overflow connections absorb bursts and are closed once returned.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10.0))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 5000))
+
+# The async engine is only built when something reads through it, so tools that
+# just need the models (e.g. Alembic) do not require the asyncio driver
+_async_engine = None
+_async_session_factory = None
+_pool_counters = {"connections_opened": 0, "checkouts": 0}
+
+def _async_engine_options(url):
+    options = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if url.startswith("sqlite"):
+        return options
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    if url.startswith("postgresql+asyncpg"):
+        # Enforced by the server, so a runaway query cannot pin a pooled connection
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    return options
+
+def _count(counter):
+    def listener(*args):
+        _pool_counters[counter] += 1
+    return listener
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy import event
+        from sqlalchemy.ext.asyncio import create_async_engine
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, **_async_engine_options(ASYNC_DATABASE_URL))
+        event.listen(_async_engine.sync_engine.pool, "connect", _count("connections_opened"))
+        event.listen(_async_engine.sync_engine.pool, "checkout", _count("checkouts"))
+    return _async_engine
+
+def AsyncSessionLocal():
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _async_session_factory = async_sessionmaker(get_async_engine(), expire_on_commit=False)
+    return _async_session_factory()
+
+async def init_async_db():
+    """
+    Create the async engine and open its first connection so startup fails
+    fast on a bad DATABASE_URL instead of on the first request
+    """
+    async with get_async_engine().connect() as connection:
+        await connection.exec_driver_sql("SELECT 1")
+
+async def close_async_db():
+    """
+    Close every pooled connection
+    """
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+
+def pool_stats():
+    """
+    Utilisation of the async connection pool
+    """
+    if _async_engine is None:
+        return {"status": "not started"}
+    pool = _async_engine.sync_engine.pool
+    stats = {"status": "running"}
+    if hasattr(pool, "checkedout"):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    stats.update(_pool_counters)
+    return stats
+
 # Create base class for models
 Base = declarative_base()
 
@@ -28,4 +132,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Async dependency
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
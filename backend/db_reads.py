@@ -0,0 +1,226 @@
+import logging
+from typing import List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from database import AsyncSessionLocal
+from db_models import Article, Category, Condition, Drug, Tag
+
+logger = logging.getLogger(__name__)
+
+# Read path that serves articles, conditions and drugs straight from the gateway
+# database instead of the CMS API. Each function returns plain dicts shaped like
+# the route's response model, with the related rows it needs loaded eagerly.
+
+
+def _article_preview(article: Article) -> dict:
+    return {
+        "id": article.id,
+        "title": article.title,
+        "slug": article.slug,
+        "summary": article.summary,
+        "subtitle": article.subtitle,
+        "image": article.image,
+        "category": article.categories[0].name if article.categories else None,
+        "created_at": article.published_date or article.created_at,
+    }
+
+
+def _article_detail(article: Article) -> dict:
+    category = article.categories[0] if article.categories else None
+    return {
+        "id": article.id,
+        "title": article.title,
+        "slug": article.slug,
+        "summary": article.summary,
+        "subtitle": article.subtitle,
+        "image": article.image,
+        "content": article.content,
+        "author": {
+            "name": article.author.name,
+            "credentials": article.author.credentials,
+            "bio": article.author.bio,
+            "image": article.author.image,
+        } if article.author else None,
+        "published_date": article.published_date or article.created_at,
+        "updated_date": article.updated_date,
+        "tags": [tag.name for tag in article.tags],
+        "category": {"name": category.name, "slug": category.slug} if category else None,
+    }
+
+
+def _condition_detail(condition: Condition) -> dict:
+    return {
+        "id": condition.id,
+        "name": condition.name,
+        "slug": condition.slug,
+        "subtitle": condition.subtitle,
+        "overview": condition.overview,
+        "symptoms": condition.symptoms,
+        "causes": condition.causes,
+        "diagnosis": condition.diagnosis,
+        "treatments": condition.treatments,
+        "prevention": condition.prevention,
+        "complications": condition.complications,
+        "related_conditions": [
+            {"name": related.name, "slug": related.slug}
+            for related in condition.related_conditions
+        ],
+        "image": condition.image,
+        "also_known_as": condition.also_known_as,
+        "specialties": condition.specialties,
+        "prevalence": condition.prevalence,
+        "risk_factors": condition.risk_factors,
+    }
+
+
+def _brand_names(drug: Drug) -> List[str]:
+    return [name.strip() for name in (drug.brand_names or "").split(",") if name.strip()]
+
+
+def _drug_detail(drug: Drug) -> dict:
+    return {
+        "id": drug.id,
+        "name": drug.name,
+        "slug": drug.slug,
+        "type": drug.type,
+        "description": drug.description,
+        "uses": drug.uses,
+        "side_effects": drug.side_effects,
+        "precautions": drug.precautions,
+        "interactions": drug.interactions,
+        "dosage": drug.dosage,
+        "image": drug.image,
+        "generic_name": drug.generic_name,
+        "brand_names": _brand_names(drug),
+        "drug_class": drug.drug_class,
+    }
+
+
+# Articles
+
+async def get_top_stories(limit: int = 5) -> List[dict]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Article)
+            .options(selectinload(Article.categories))
+            .where(Article.featured.is_(True))
+            .order_by(Article.published_date.desc())
+            .limit(limit)
+        )
+        return [_article_preview(article) for article in result.scalars()]
+
+
+async def get_article_paths() -> List[str]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Article.slug))
+        return list(result.scalars())
+
+
+async def get_article(slug: str) -> Optional[dict]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Article)
+            .options(
+                joinedload(Article.author),
+                selectinload(Article.tags),
+                selectinload(Article.categories),
+            )
+            .where(Article.slug == slug)
+        )
+        article = result.scalars().first()
+        return _article_detail(article) if article else None
+
+
+async def get_related_articles(slug: str, limit: int = 3) -> List[dict]:
+    """
+    Articles sharing a tag or category with the given article
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Article)
+            .options(selectinload(Article.tags), selectinload(Article.categories))
+            .where(Article.slug == slug)
+        )
+        article = result.scalars().first()
+        if article is None:
+            return []
+
+        tag_ids = [tag.id for tag in article.tags]
+        category_ids = [category.id for category in article.categories]
+        if not tag_ids and not category_ids:
+            return []
+
+        result = await db.execute(
+            select(Article)
+            .options(selectinload(Article.categories))
+            .where(
+                Article.id != article.id,
+                or_(
+                    Article.tags.any(Tag.id.in_(tag_ids)),
+                    Article.categories.any(Category.id.in_(category_ids)),
+                ),
+            )
+            .order_by(Article.published_date.desc())
+            .limit(limit)
+        )
+        return [_article_preview(related) for related in result.scalars()]
+
+
+# Conditions
+
+async def get_conditions_index() -> List[dict]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Condition.id, Condition.name, Condition.slug, Condition.subtitle)
+            .order_by(Condition.name)
+        )
+        return [dict(row._mapping) for row in result]
+
+
+async def get_condition_paths() -> List[str]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Condition.slug))
+        return list(result.scalars())
+
+
+async def get_condition(slug: str) -> Optional[dict]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Condition)
+            .options(selectinload(Condition.related_conditions))
+            .where(Condition.slug == slug)
+        )
+        condition = result.scalars().first()
+        return _condition_detail(condition) if condition else None
+
+
+# Drugs
+
+async def get_drugs_index() -> List[dict]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(
+                Drug.id, Drug.name, Drug.slug, Drug.drug_class, Drug.generic_name, Drug.brand_names
+            )
+        )
+        drugs = [
+            {
+                "id": row.id,
+                "title": row.generic_name or row.name,
+                "meta": {"slug": row.slug},
+                "drug_class": row.drug_class or "",
+                "generic_name": row.generic_name or "",
+                "brand_names": row.brand_names or "",
+            }
+            for row in result
+        ]
+        return sorted(drugs, key=lambda drug: drug["title"].upper())
+
+
+async def get_drug(slug: str) -> Optional[dict]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Drug).where(Drug.slug == slug))
+        drug = result.scalars().first()
+        return _drug_detail(drug) if drug else None
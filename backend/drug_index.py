@@ -0,0 +1,301 @@
+import os
+import time
+import asyncio
+import logging
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from cms_client import fetch_uncached
+from conditional import body_etag
+from fast_json import dumps
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Wagtail caps v2 API pages at WAGTAILAPI_LIMIT_MAX (50 in the CMS settings)
+DRUG_INDEX_PAGE_SIZE = int(os.getenv("DRUG_INDEX_PAGE_SIZE", 50))
+DRUG_INDEX_CONCURRENCY = int(os.getenv("DRUG_INDEX_CONCURRENCY", 8))
+
+# Seconds after a sync before the next request triggers an incremental refresh
+DRUG_INDEX_REFRESH_INTERVAL = float(os.getenv("DRUG_INDEX_REFRESH_INTERVAL", 300))
+
+# Seconds between full scans of the live page ids. Unpublished drugs normally
+# leave through their content event; the scan catches events that were lost
+DRUG_INDEX_ID_SCAN_INTERVAL = float(os.getenv("DRUG_INDEX_ID_SCAN_INTERVAL", 3600))
+
+DRUG_PAGES_ENDPOINT = "v2/pages/"
+
+# Only the fields the index rows are built from; "_" drops Wagtail's defaults
+DRUG_INDEX_FIELDS = "_,id,slug,title,generic_name,brand_names,drug_class,last_published_at"
+DRUG_ID_FIELDS = "_,id"
+
+
+def _published_at(item: dict) -> Optional[datetime]:
+    value = item.get("last_published_at")
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _entry(item: dict) -> Optional[dict]:
+    """
+    Build an index row from a v2 API page item, or None if it has no name
+    """
+    title = item.get("title") or ""
+    generic_name = item.get("generic_name") or ""
+    # Use generic name if available, otherwise use title
+    display_name = generic_name or title
+    if not display_name:
+        return None
+    return {
+        "id": item["id"],
+        "title": display_name,
+        "meta": {"slug": item.get("meta", {}).get("slug", item.get("slug", ""))},
+        "drug_class": item.get("drug_class") or "",
+        "generic_name": generic_name,
+        "brand_names": item.get("brand_names") or "",
+    }
+
+
+def _sort_key(entry: dict) -> Tuple[str, int]:
+    return (entry["title"].upper(), entry["id"])
+
+
+class DrugIndex:
+    """
+    A-Z index of every live drug page, built from the CMS and kept in memory.
+
+    The first request pages through the whole catalogue concurrently and sorts
+    it once. Later syncs only fetch pages published since the newest one seen
+    and move the changed rows into place. Unpublished pages are dropped by
+    remove() when their content event arrives. A sync lists the live page ids
+    only when the CMS count disagrees with the index, or once every
+    DRUG_INDEX_ID_SCAN_INTERVAL for removals whose event was lost. Each change
+    bumps the version, and the encoded body and ETag are built once per
+    version.
+    """
+
+    def __init__(self):
+        self._entries: Dict[int, dict] = {}
+        self._order: List[Tuple[Tuple[str, int], int]] = []
+        # Every page id seen, including pages skipped for having no name
+        self._page_ids: Set[int] = set()
+        self._latest_published: Optional[datetime] = None
+        self._synced_at: Optional[float] = None
+        self._ids_scanned_at: Optional[float] = None
+        self._flights = SingleFlight()
+        self._background: Set[asyncio.Task] = set()
+        self._encoded_version = -1
+        self._letters: Dict[str, Tuple[bytes, str]] = {}
+        self._body = b"[]"
+        self._etag = body_etag(self._body)
+        self.version = 0
+        self.full_builds = 0
+        self.incremental_syncs = 0
+
+    async def get(self) -> Tuple[bytes, str]:
+        """
+        Encoded index and its ETag, building or refreshing the index as needed
+        """
+        if self._synced_at is None:
+            await self.sync()
+        elif time.monotonic() - self._synced_at > DRUG_INDEX_REFRESH_INTERVAL and not self._flights.in_flight("sync"):
+            # Serve the current index while it catches up in the background
+            task = asyncio.create_task(self._background_sync())
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        return self._encoded()
+
+    async def sync(self):
+        """
+        Bring the index up to date, sharing one sync between concurrent callers
+        """
+        work = self._full_build if self._synced_at is None else self._incremental_sync
+        await self._flights.do("sync", work)
+
+    async def _background_sync(self):
+        try:
+            await self.sync()
+        except Exception as exc:
+            logger.warning(f"Drugs index refresh failed, serving version {self.version}: {exc}")
+
+    async def get_letter(self, letter: str) -> Tuple[bytes, str]:
+        """
+        Encoded rows whose title starts with the given letter, and their ETag
+        """
+        await self.get()
+        self._encoded()
+        letter = letter.upper()
+        if letter not in self._letters:
+            start = bisect_left(self._order, ((letter,),))
+            end = bisect_left(self._order, ((chr(ord(letter) + 1),),), lo=start)
+            body = dumps([self._entries[page_id] for _, page_id in self._order[start:end]])
+            self._letters[letter] = (body, body_etag(body))
+        return self._letters[letter]
+
+    def _encoded(self) -> Tuple[bytes, str]:
+        if self._encoded_version != self.version:
+            self._body = dumps([self._entries[page_id] for _, page_id in self._order])
+            self._etag = body_etag(self._body)
+            self._letters = {}
+            self._encoded_version = self.version
+        return self._body, self._etag
+
+    async def _fetch_page(self, offset: int, order: str, fields: str = DRUG_INDEX_FIELDS) -> dict:
+        return await fetch_uncached(DRUG_PAGES_ENDPOINT, {
+            "type": "drugs.DrugPage",
+            "fields": fields,
+            "order": order,
+            "limit": DRUG_INDEX_PAGE_SIZE,
+            "offset": offset,
+        })
+
+    async def _fetch_all(self, fields: str) -> List[dict]:
+        """
+        Every page of drug pages, fetched concurrently after the first
+        """
+        # Ordering by id keeps page boundaries stable while pages are fetched
+        first = await self._fetch_page(0, "id", fields)
+        total = first["meta"]["total_count"]
+
+        semaphore = asyncio.Semaphore(DRUG_INDEX_CONCURRENCY)
+
+        async def fetch(offset):
+            async with semaphore:
+                return await self._fetch_page(offset, "id", fields)
+
+        rest = await asyncio.gather(*[
+            fetch(offset) for offset in range(DRUG_INDEX_PAGE_SIZE, total, DRUG_INDEX_PAGE_SIZE)
+        ])
+        return [first, *rest]
+
+    async def _full_build(self):
+        started = time.monotonic()
+        pages = await self._fetch_all(DRUG_INDEX_FIELDS)
+
+        entries = {}
+        page_ids = set()
+        latest = None
+        for page in pages:
+            for item in page["items"]:
+                page_ids.add(item["id"])
+                published = _published_at(item)
+                if published and (latest is None or published > latest):
+                    latest = published
+                entry = _entry(item)
+                if entry is not None:
+                    entries[entry["id"]] = entry
+
+        self._entries = entries
+        self._order = sorted((_sort_key(entry), page_id) for page_id, entry in entries.items())
+        self._page_ids = page_ids
+        self._latest_published = latest
+        self._synced_at = self._ids_scanned_at = time.monotonic()
+        self.version += 1
+        self.full_builds += 1
+        logger.info(
+            f"Built drugs index: {len(entries)} drugs from {len(pages)} pages "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+
+    async def _incremental_sync(self):
+        # Walk pages newest first until reaching what the index already has
+        changed = []
+        offset = 0
+        total = None
+        while True:
+            page = await self._fetch_page(offset, "-last_published_at")
+            total = page["meta"]["total_count"]
+            items = page["items"]
+            done = False
+            for item in items:
+                published = _published_at(item)
+                if self._latest_published and published and published < self._latest_published:
+                    done = True
+                    break
+                changed.append(item)
+            offset += DRUG_INDEX_PAGE_SIZE
+            if done or len(items) < DRUG_INDEX_PAGE_SIZE or offset >= total:
+                break
+
+        updated = False
+        for item in changed:
+            updated |= self._upsert(item)
+
+        # Removals normally arrive as events; compare the ids themselves only
+        # when the count shows something was missed, or now and then since an
+        # unpublish and a publish between syncs leave the count unchanged
+        scan_due = time.monotonic() - self._ids_scanned_at > DRUG_INDEX_ID_SCAN_INTERVAL
+        if total != len(self._page_ids) or scan_due:
+            live = {item["id"] for page in await self._fetch_all(DRUG_ID_FIELDS) for item in page["items"]}
+            self._ids_scanned_at = time.monotonic()
+            if live - self._page_ids:
+                # Live pages older than the newest one seen; only a full pass has their fields
+                logger.info(f"Drugs index is missing {len(live - self._page_ids)} live pages, rebuilding")
+                await self._full_build()
+                return
+            for page_id in self._page_ids - live:
+                updated |= self._remove(page_id)
+
+        self._synced_at = time.monotonic()
+        self.incremental_syncs += 1
+        if updated:
+            self.version += 1
+            logger.info(f"Drugs index updated to version {self.version} ({len(changed)} pages checked)")
+
+    def _upsert(self, item: dict) -> bool:
+        """
+        Apply one page to the index, returning whether the index changed
+        """
+        page_id = item["id"]
+        self._page_ids.add(page_id)
+        published = _published_at(item)
+        if published and (self._latest_published is None or published > self._latest_published):
+            self._latest_published = published
+
+        entry = _entry(item)
+        existing = self._entries.get(page_id)
+        if entry == existing:
+            return False
+
+        if existing is not None:
+            del self._order[bisect_left(self._order, (_sort_key(existing), page_id))]
+            del self._entries[page_id]
+        if entry is not None:
+            self._entries[page_id] = entry
+            insort(self._order, (_sort_key(entry), page_id))
+        return True
+
+    def remove(self, page_id: int):
+        """
+        Drop a page the CMS reported as unpublished, without asking the CMS
+        """
+        if self._remove(page_id):
+            self.version += 1
+
+    def _remove(self, page_id: int) -> bool:
+        """
+        Drop a page that is no longer live, returning whether the index changed
+        """
+        self._page_ids.discard(page_id)
+        existing = self._entries.pop(page_id, None)
+        if existing is None:
+            return False
+        del self._order[bisect_left(self._order, (_sort_key(existing), page_id))]
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "drugs": len(self._entries),
+            "version": self.version,
+            "full_builds": self.full_builds,
+            "incremental_syncs": self.incremental_syncs,
+            "age": round(time.monotonic() - self._synced_at, 1) if self._synced_at is not None else None,
+        }
+
+
+drug_index = DrugIndex()
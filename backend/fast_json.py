@@ -0,0 +1,92 @@
+import os
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter, ValidationError
+
+from cache import response_cache
+from cms_client import fetch_cms_entry
+from conditional import body_etag
+
+logger = logging.getLogger(__name__)
+
+# orjson is optional; without it raw payloads are encoded with the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Opt-in: without it routes return raw payloads for FastAPI to validate and encode
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_ENABLED", "false").lower() == "true"
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode a plain JSON payload to bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def encode(value: Any, model) -> Optional[bytes]:
+    """
+    Validate a CMS payload against the route's response model and encode it,
+    or return None when it does not match so the caller can hand it to the
+    normal response_model path instead
+    """
+    adapter = _adapter(model)
+    try:
+        return adapter.dump_json(adapter.validate_python(value))
+    except ValidationError as exc:
+        logger.warning(f"CMS payload does not match {model}: {exc.error_count()} errors, not using the fast path")
+        return None
+
+
+class EncodedJSONResponse(Response):
+    """
+    JSON response whose body has already been encoded
+    """
+    media_type = "application/json"
+
+    def __init__(self, body: bytes, etag: Optional[str] = None, **kwargs):
+        super().__init__(content=body, **kwargs)
+        if etag:
+            self.headers["etag"] = etag
+
+
+async def fetch_json_response(endpoint: str, model, params=None):
+    """
+    Fetch a CMS endpoint and return it as a ready-to-send JSON response.
+
+    Routes opt in by returning this instead of the raw payload, which skips
+    FastAPI's per-request response_model validation and encoding when
+    FAST_JSON_ENABLED is set. For cached endpoints the payload is validated
+    and encoded once per cache entry and every hit reuses the same bytes and
+    ETag; a payload that fails validation is returned raw for FastAPI's
+    normal response_model path to handle.
+    """
+    if not FAST_JSON_ENABLED:
+        value, _ = await fetch_cms_entry(endpoint, params)
+        return value
+
+    value, entry = await fetch_cms_entry(endpoint, params)
+    if entry is not None and entry.encoded is not None and entry.encoded_model == model:
+        return EncodedJSONResponse(entry.encoded, entry.encoded_etag)
+
+    body = encode(value, model)
+    if body is None:
+        # FastAPI validates the raw payload against response_model as usual
+        return value
+    if entry is None:
+        return EncodedJSONResponse(body, body_etag(body))
+    response_cache.attach_encoded(entry, body, body_etag(body), model)
+    return EncodedJSONResponse(body, entry.encoded_etag)
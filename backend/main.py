@@ -1,13 +1,25 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import os
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi_socketio import SocketManager
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
 
-from routers import articles, conditions, symptoms, drugs
+from routers import articles, conditions, symptoms, drugs, batch, events, suggest
 from models import ErrorResponse
+from cms_client import cms_breaker, cms_client, cms_flights
+from cache import last_known_good, response_cache
+from conditional import ConditionalGetMiddleware
+from drug_index import drug_index
+from suggest_index import suggest_index
+from profiling import PROFILING_ENABLED, ProfilingMiddleware
+from warmup import WARMUP_STATS_FILE, AccessStatsMiddleware, access_stats, warmup, warmup_paths
+from metrics import METRICS_ENABLED, PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, add_collector, render_metrics
+import realtime
 
 # Configure logging
 logging.basicConfig(
@@ -17,17 +29,38 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# In db read mode the content routes query the gateway database directly
+DB_READ_MODE = os.getenv("GATEWAY_READ_MODE", "cms") == "db"
+
+if DB_READ_MODE:
+    import database
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared CMS connection pool once per worker
+    await cms_client.start()
+    # Listen for events relayed by other workers before any client connects
+    realtime.start(app.sio)
+    if DB_READ_MODE:
+        await database.init_async_db()
+    # Fill caches in the background; /api/ready reports 503 until this is done
+    warmup.start(app, warmup_paths())
+    yield
+    await warmup.stop()
+    access_stats.save()
+    if DB_READ_MODE:
+        await database.close_async_db()
+    await cms_client.close()
+
 app = FastAPI(
     title="HealthInfo API",
     description="API for the HealthInfo medical information website",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
-socket_manager = SocketManager(app=app, cors_allowed_origins="*")
-
-@socket_manager.on('message')
-async def handle_message(sid: str, message: Dict[str, Any]):
-    await socket_manager.emit('message', message)
+# Answer revalidation requests with 304 Not Modified where possible
+app.add_middleware(ConditionalGetMiddleware)
 
 # Add CORS middleware
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5000").split(",")
@@ -40,8 +73,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure Socket.IO CORS
-socket_manager = SocketManager(app=app, cors_allowed_origins="*")
+# Record which paths are hot so the next start warms them up
+if WARMUP_STATS_FILE:
+    app.add_middleware(AccessStatsMiddleware)
+
+# Profile requests that ask with a signed X-Profile header, or a sample of all
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Time every request by route; outermost, so it includes the middleware above
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Configure Socket.IO CORS; events reach clients on every worker through the
+# pub/sub backend selected by SOCKETIO_BACKEND. Starlette mounts keep the full
+# request path, so the Engine.IO path has to include the /ws mount point.
+socket_manager = SocketManager(
+    app=app,
+    socketio_path="ws/socket.io",
+    cors_allowed_origins="*",
+    client_manager=realtime.create_client_manager(),
+)
+
+# Chat messages go to the room they name instead of every connected client
+DEFAULT_CHAT_ROOM = "chat"
+
+def _room_name(data) -> Optional[str]:
+    room = data.get("room") if isinstance(data, dict) else data
+    if isinstance(room, str) and 0 < len(room) <= 100:
+        return room
+    return None
+
+@socket_manager.on('connect')
+async def handle_connect(sid: str, environ: Dict[str, Any], auth=None):
+    await socket_manager.enter_room(sid, DEFAULT_CHAT_ROOM)
+
+@socket_manager.on('join')
+async def handle_join(sid: str, data):
+    room = _room_name(data)
+    if room:
+        await socket_manager.enter_room(sid, room)
+
+@socket_manager.on('leave')
+async def handle_leave(sid: str, data):
+    room = _room_name(data)
+    if room:
+        await socket_manager.leave_room(sid, room)
+
+@socket_manager.on('message')
+async def handle_message(sid: str, message: Dict[str, Any]):
+    if not isinstance(message, dict):
+        return
+    room = _room_name(message.get("room", DEFAULT_CHAT_ROOM))
+    if room is None or room not in app.sio.rooms(sid):
+        return
+    await socket_manager.emit('message', message, room=room)
+
+# Content change events from the CMS evict cached responses on every worker
+app.sio.manager.add_hook(events.CONTENT_CHANGED_EVENT, events.evict_for_event)
 
 
 # Include routers
@@ -49,6 +138,9 @@ app.include_router(articles.router, prefix="/api", tags=["Articles"])
 app.include_router(conditions.router, prefix="/api", tags=["Conditions"])
 app.include_router(symptoms.router, prefix="/api", tags=["Symptoms"])
 app.include_router(drugs.router, prefix="/api", tags=["Drugs"])
+app.include_router(suggest.router, prefix="/api", tags=["Search"])
+app.include_router(batch.router, prefix="/api", tags=["Batch"])
+app.include_router(events.router, prefix="/api", tags=["Internal"])
 
 # Exception handler for unhandled errors
 @app.exception_handler(Exception)
@@ -67,32 +159,174 @@ async def health_check():
     """
     Health check endpoint for the API
     """
-    return {"status": "healthy"}
+    health = {"status": "healthy", "cms": cms_breaker.stats()}
+    if DB_READ_MODE:
+        health["database"] = database.pool_stats()
+    return health
+
+@app.get("/api/ready", tags=["Health"])
+async def readiness_check():
+    """
+    Readiness probe: 503 until this worker has finished warming its caches
+    """
+    stats = warmup.stats()
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up", "warmup": stats})
+    return {"status": "ready", "warmup": stats}
+
+@app.get("/api/cache/stats", tags=["Health"])
+async def cache_stats():
+    """
+    Hit/miss counters and size of the CMS response cache
+    """
+    stats = response_cache.stats()
+    stats["coalesced_requests"] = cms_flights.shared
+    stats["cms_not_modified"] = cms_client.not_modified
+    stats["last_known_good"] = last_known_good.stats()
+    stats["drug_index"] = drug_index.stats()
+    stats["suggest_index"] = suggest_index.stats()
+    stats["socketio"] = app.sio.manager.stats()
+    return stats
+
+def _collect_gateway_state():
+    """
+    Cache, circuit breaker and Socket.IO counters, read at scrape time
+    """
+    cache = response_cache.stats()
+    lookups = CounterMetricFamily("gateway_cache_lookups", "Response cache lookups by result", labels=("result",))
+    lookups.add_metric(("hit",), cache["hits"])
+    lookups.add_metric(("stale_hit",), cache["stale_hits"])
+    lookups.add_metric(("miss",), cache["misses"])
+    breaker = cms_breaker.stats()
+    sockets = app.sio.manager.stats()
+    return [
+        lookups,
+        CounterMetricFamily("gateway_cache_evictions", "Entries evicted to keep the cache in budget",
+                            value=cache["evictions"]),
+        GaugeMetricFamily("gateway_cache_hit_ratio", "Share of cache lookups served from the cache",
+                          value=cache["hit_ratio"]),
+        GaugeMetricFamily("gateway_cache_bytes", "Bytes held by the response cache", value=cache["bytes"]),
+        GaugeMetricFamily("gateway_cache_entries", "Entries held by the response cache", value=cache["entries"]),
+        CounterMetricFamily("gateway_cms_coalesced_requests", "Requests that shared another's CMS call",
+                            value=cms_flights.shared),
+        CounterMetricFamily("gateway_cms_not_modified", "CMS revalidations answered with 304",
+                            value=cms_client.not_modified),
+        CounterMetricFamily("gateway_last_known_good_served", "Stale responses served while the CMS failed",
+                            value=last_known_good.stats()["served"]),
+        GaugeMetricFamily("gateway_cms_circuit_open", "1 while the CMS circuit breaker is open",
+                          value=1 if breaker["state"] == "open" else 0),
+        CounterMetricFamily("gateway_cms_circuit_rejected", "CMS calls refused by the open circuit",
+                            value=breaker["rejected"]),
+        GaugeMetricFamily("gateway_drug_index_version", "Version of the in-memory drugs index",
+                          value=drug_index.stats()["version"]),
+        GaugeMetricFamily("gateway_suggest_index_version", "Version of the in-memory typeahead index",
+                          value=suggest_index.stats()["version"]),
+        GaugeMetricFamily("gateway_socketio_clients", "Socket.IO clients connected to this worker",
+                          value=sockets["clients"]),
+        CounterMetricFamily("gateway_socketio_dropped", "Socket.IO events dropped for slow clients",
+                            value=sockets["dropped"]),
+    ]
+
+add_collector(_collect_gateway_state)
+
+def _collect_database_pool():
+    """
+    Async connection pool utilisation in db read mode, read at scrape time
+    """
+    stats = database.pool_stats()
+    if stats["status"] != "running":
+        return []
+    families = [
+        CounterMetricFamily("gateway_db_pool_connections_opened", "Database connections opened by the pool",
+                            value=stats["connections_opened"]),
+        CounterMetricFamily("gateway_db_pool_checkouts", "Connections checked out of the pool",
+                            value=stats["checkouts"]),
+    ]
+    # Only queue pools have a size; static and null pools do not report one
+    if "size" in stats:
+        families += [
+            GaugeMetricFamily("gateway_db_pool_size", "Persistent connections the pool keeps", value=stats["size"]),
+            GaugeMetricFamily("gateway_db_pool_checked_out", "Pooled connections in use",
+                              value=stats["checked_out"]),
+            GaugeMetricFamily("gateway_db_pool_checked_in", "Pooled connections idle",
+                              value=stats["checked_in"]),
+            GaugeMetricFamily("gateway_db_pool_overflow", "Overflow connections open beyond the pool size",
+                              value=stats["overflow"]),
+        ]
+    return families
+
+if DB_READ_MODE:
+    add_collector(_collect_database_pool)
+
+@app.get("/api/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """
+    Metrics of this worker in the Prometheus text format
+    """
+    return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+# Results of each type per page of the unified search, matching the CMS
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_PAGE_SIZE = 50
+
+# Per-leg timeouts (seconds) for the unified search fan-out
+SEARCH_TIMEOUTS = {
+    "articles": float(os.getenv("SEARCH_ARTICLES_TIMEOUT", 3.0)),
+    "conditions": float(os.getenv("SEARCH_CONDITIONS_TIMEOUT", 3.0)),
+    "drugs": float(os.getenv("SEARCH_DRUGS_TIMEOUT", 3.0)),
+}
+
+async def _search_leg(name: str, lookup, timeout: float):
+    """
+    Run one search lookup, degrading to no results if it fails or times out
+    """
+    try:
+        return await asyncio.wait_for(lookup, timeout), True
+    except asyncio.TimeoutError:
+        logger.warning(f"Search leg '{name}' timed out after {timeout}s")
+    except Exception as exc:
+        logger.error(f"Search leg '{name}' failed: {exc}")
+    return {"count": 0, "results": []}, False
 
 @app.get("/api/search", tags=["Search"])
-async def search(q: str = ""):
+async def search(
+    q: str = "",
+    offset: int = Query(0, ge=0, description="Results of each type to skip"),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE, description="Results of each type to return"),
+):
     """
-    Search articles, conditions, and drugs
+    Search articles, conditions, and drugs, one page of each type at a time
     """
     if not q or len(q.strip()) < 2:
         return {
             "articles": [],
             "conditions": [],
-            "drugs": []
+            "drugs": [],
+            "totals": {"articles": 0, "conditions": 0, "drugs": 0},
+            "offset": offset,
+            "limit": limit,
         }
     
-    # For now, call individual search endpoints
-    articles_results = await articles.search_articles(q)
-    conditions_results = await conditions.search_conditions(q)
-    
-    # Mock data for drugs until that endpoint is implemented
-    drugs_results = []
-    
-    return {
-        "articles": articles_results,
-        "conditions": conditions_results,
-        "drugs": drugs_results
+    # Run every lookup concurrently so the slowest leg bounds the latency
+    legs = {
+        "articles": articles.search_articles(q, offset, limit),
+        "conditions": conditions.search_conditions(q, offset, limit),
+        "drugs": drugs.find_drugs(q, offset, limit),
     }
+    results = await asyncio.gather(*[
+        _search_leg(name, lookup, SEARCH_TIMEOUTS[name])
+        for name, lookup in legs.items()
+    ])
+    response = {name: page["results"] for name, (page, _) in zip(legs, results)}
+    response["totals"] = {name: page["count"] for name, (page, _) in zip(legs, results)}
+    response["offset"] = offset
+    response["limit"] = limit
+
+    # Tell clients which legs are missing from a partial response
+    incomplete = [name for name, (_, ok) in zip(legs, results) if not ok]
+    if incomplete:
+        response["incomplete"] = incomplete
+    return response
 
 if __name__ == "__main__":
     import uvicorn
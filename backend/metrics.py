@@ -0,0 +1,175 @@
+import os
+import time
+import logging
+from typing import Callable, Dict, Iterable
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Gauge, Histogram, disable_created_metrics, generate_latest,
+)
+from prometheus_client.core import Metric
+
+logger = logging.getLogger(__name__)
+
+# Metrics are cheap (a dict lookup and a few additions per request), so they
+# are on unless explicitly disabled
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# Counters are read as totals; the extra *_created series only add scrape weight
+disable_created_metrics()
+
+# CMS endpoints without a slug segment, reported as they are; any other
+# endpoint has its second segment replaced by {slug} to bound label values
+STATIC_CMS_ENDPOINTS = {
+    "api/conditions-index",
+    "articles/health-topics",
+    "articles/paths",
+    "articles/top-stories",
+    "conditions/index",
+    "conditions/paths",
+    "pages",
+    "search/articles",
+    "search/conditions",
+    "search/drugs",
+    "suggest/corpus",
+    "v2/pages",
+    "well-being",
+}
+
+
+class _StateCollector:
+    """
+    Collector whose metric families are built by a function at scrape time
+    """
+
+    def __init__(self, build: Callable[[], Iterable[Metric]]):
+        self.build = build
+
+    def collect(self) -> Iterable[Metric]:
+        try:
+            return list(self.build())
+        except Exception as exc:
+            logger.error(f"Metrics collector {self.build.__name__} failed: {exc}")
+            return []
+
+
+# Metrics of this worker only, without the client library's process defaults
+registry = CollectorRegistry()
+
+
+def add_collector(build: Callable[[], Iterable[Metric]]):
+    """
+    Call build() on every scrape for metrics read from state other modules
+    already keep (cache, circuit breaker, Socket.IO), instead of updating
+    them twice on the request path
+    """
+    registry.register(_StateCollector(build))
+
+
+def render_metrics() -> bytes:
+    return generate_latest(registry)
+
+
+http_request_duration = Histogram(
+    "gateway_http_request_duration_seconds",
+    "Time to serve a gateway request, by route template and status",
+    ("method", "route", "status"),
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+http_requests_in_flight = Gauge(
+    "gateway_http_requests_in_flight",
+    "Gateway requests currently being served",
+    registry=registry,
+)
+cms_request_duration = Histogram(
+    "gateway_cms_request_duration_seconds",
+    "Time for upstream CMS requests, by endpoint and status",
+    ("endpoint", "status"),
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+cms_requests_in_flight = Gauge(
+    "gateway_cms_requests_in_flight",
+    "Upstream CMS requests currently waiting on a response",
+    registry=registry,
+)
+
+
+def cms_endpoint_label(endpoint: str) -> str:
+    """
+    Bounded label for a CMS endpoint: query string dropped, slugs collapsed
+    """
+    path = endpoint.split("?", 1)[0].strip("/")
+    if path in STATIC_CMS_ENDPOINTS:
+        return path
+    segments = path.split("/")
+    if len(segments) > 1:
+        segments[1] = "{slug}"
+    return "/".join(segments)
+
+
+# Full route template per route object, worked out on its first request
+_route_templates: Dict[int, str] = {}
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    route_path = getattr(route, "path", None)
+    if route_path is None:
+        return "unmatched"
+    template = _route_templates.get(id(route))
+    if template is None:
+        # Routes of included routers may only know their path below the
+        # router prefix; recover the prefix from the part of the request path
+        # the route's own pattern does not cover
+        template = route_path
+        path = scope["path"]
+        regex = getattr(route, "path_regex", None)
+        if regex is not None and not regex.match(path):
+            for position, char in enumerate(path):
+                if char == "/" and regex.match(path[position:]):
+                    template = path[:position] + route_path
+                    break
+        _route_templates[id(route)] = template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Record latency and status of every HTTP request against its route template
+    (/api/articles/{slug}, not the concrete path) so label values stay bounded.
+
+    Added last so it is the outermost middleware and its timings include the
+    other middleware.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            http_request_duration.labels(scope["method"], _route_label(scope), str(status)).observe(
+                time.perf_counter() - started
+            )
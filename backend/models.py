@@ -1,6 +1,6 @@
 from enum import Enum
 from pydantic import BaseModel, Field, HttpUrl
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 class Gender(str, Enum):
@@ -97,6 +97,30 @@ class Drug(DrugBase):
     brand_names: Optional[List[str]] = None
     drug_class: Optional[str] = None
 
+class DrugIndexMeta(BaseModel):
+    slug: str
+
+class DrugIndexEntry(BaseModel):
+    id: int
+    title: str  # Generic name when set, otherwise the page title
+    meta: DrugIndexMeta
+    drug_class: str = ""
+    generic_name: str = ""
+    brand_names: str = ""
+
+# Typeahead suggestion models
+class Suggestion(BaseModel):
+    type: str  # article, condition or drug
+    id: int
+    title: str
+    slug: str
+    text: str  # The name that matched, which may be an alias or in Hindi
+    lang: str
+
+class SuggestResponse(BaseModel):
+    query: str
+    suggestions: List[Suggestion]
+
 # Symptom checker models
 class SymptomRequest(BaseModel):
     age: int = Field(..., ge=1, le=120)
@@ -105,6 +129,7 @@ class SymptomRequest(BaseModel):
 
 class PossibleCondition(BaseModel):
     name: str
+    slug: Optional[str] = None
     description: str
     probability: float  # 0-100
     urgency: int  # 1-5, with 5 being most urgent
@@ -115,4 +140,32 @@ class SymptomResponse(BaseModel):
 
 class WellBeingResponse(BaseModel):
     featured: List[ArticlePreview]
-    articles: List[ArticlePreview]
\ No newline at end of file
+    articles: List[ArticlePreview]
+
+# Content change events sent by the CMS on publish/unpublish
+class ContentEventAction(str, Enum):
+    PUBLISHED = "published"
+    UNPUBLISHED = "unpublished"
+
+class ContentEvent(BaseModel):
+    type: str  # "article", "news", "condition" or "drug"
+    id: int
+    slug: str
+    version: Optional[int] = None
+    action: ContentEventAction
+
+# Batch models
+class BatchSubRequest(BaseModel):
+    id: str
+    path: str
+    params: Optional[Dict[str, str]] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest] = Field(..., min_length=1)
+
+class BatchSubResponse(BaseModel):
+    status: int
+    body: Any = None
+
+class BatchResponse(BaseModel):
+    responses: Dict[str, BatchSubResponse]
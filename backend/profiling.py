@@ -0,0 +1,158 @@
+import os
+import io
+import re
+import sys
+import hmac
+import time
+import random
+import asyncio
+import cProfile
+import hashlib
+import logging
+import pstats
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Key for X-Profile request tokens; without it only sampling can profile
+PROFILING_SECRET = os.getenv("PROFILING_SECRET", "")
+
+# Share of requests profiled without being asked (0.001 = one in a thousand)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+
+# Where profiles are written, as pstats files readable by pstats/snakeviz
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# Functions listed in inline profiles, by cumulative time
+PROFILE_INLINE_LIMIT = int(os.getenv("PROFILE_INLINE_LIMIT", 60))
+
+# Lifetime (seconds) of tokens made by `python profiling.py sign`
+PROFILE_TOKEN_TTL = 300
+
+PROFILING_ENABLED = bool(PROFILING_SECRET) or PROFILE_SAMPLE_RATE > 0
+
+# Only one request is profiled at a time; cProfile sees everything running
+# on the event loop, so overlapping profiles would just duplicate each other
+_profiling = False
+
+
+def _digest(expires: str, path: str) -> str:
+    message = f"{expires}:{path}".encode("utf-8")
+    return hmac.new(PROFILING_SECRET.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def sign(path: str, ttl: int = PROFILE_TOKEN_TTL) -> str:
+    """
+    X-Profile token allowing one path to be profiled until it expires
+    """
+    expires = str(int(time.time()) + ttl)
+    return f"{expires}.{_digest(expires, path)}"
+
+
+def token_valid(token: str, path: str) -> bool:
+    if not PROFILING_SECRET:
+        return False
+    expires, _, digest = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(_digest(expires, path), digest)
+
+
+def _profile_name(method: str, path: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-") or "root"
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{time.monotonic_ns() % 1000000:06d}-{method}-{slug[:80]}.prof"
+
+
+def _save(profiler: cProfile.Profile, name: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    filename = os.path.join(PROFILE_DIR, name)
+    profiler.dump_stats(filename)
+    return filename
+
+
+def _report(profiler: cProfile.Profile) -> bytes:
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats("cumulative").print_stats(PROFILE_INLINE_LIMIT)
+    return output.getvalue().encode("utf-8")
+
+
+class ProfilingMiddleware:
+    """
+    Profile single requests with cProfile, on demand or by sampling.
+
+    A request carrying a valid X-Profile token (see sign()) is profiled and its
+    profile saved to PROFILE_DIR, or, with `X-Profile-Output: inline`, returned
+    as a text report in place of the response body. Sampled requests are
+    always saved. The profile covers the whole request, including the wait on
+    the CMS and the encoding of the response.
+
+    Only installed when PROFILING_SECRET or PROFILE_SAMPLE_RATE is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _wanted(self, scope) -> Optional[bool]:
+        """
+        None if the request should not be profiled, else whether the report
+        goes inline
+        """
+        headers = dict(scope.get("headers", []))
+        token = headers.get(b"x-profile")
+        if token is not None:
+            if token_valid(token.decode("latin-1"), scope["path"]):
+                return headers.get(b"x-profile-output") == b"inline"
+            logger.warning(f"Ignoring invalid X-Profile token for {scope['path']}")
+        if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+            return False
+        return None
+
+    async def __call__(self, scope, receive, send):
+        global _profiling
+        if scope["type"] != "http" or _profiling:
+            await self.app(scope, receive, send)
+            return
+        inline = self._wanted(scope)
+        if inline is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = None
+
+        async def capture(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        profiler = cProfile.Profile()
+        _profiling = True
+        profiler.enable()
+        try:
+            await self.app(scope, receive, capture if inline else send)
+        finally:
+            profiler.disable()
+            _profiling = False
+
+        if inline:
+            body = await asyncio.to_thread(_report, profiler)
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"x-profiled-status", str(status).encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        filename = await asyncio.to_thread(_save, profiler, _profile_name(scope["method"], scope["path"]))
+        logger.info(f"Profiled {scope['method']} {scope['path']} ({status}) to {filename}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "sign" or not PROFILING_SECRET:
+        sys.exit("usage: PROFILING_SECRET=... python profiling.py sign <path>")
+    print(sign(sys.argv[2]))
@@ -0,0 +1,279 @@
+import os
+import sys
+import json
+import asyncio
+import inspect
+import logging
+from typing import Callable, Dict, List, Optional, Set
+
+import socketio
+from socketio.async_manager import AsyncManager
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+logger = logging.getLogger(__name__)
+
+# Pub/sub backend shared by the Socket.IO servers of every worker:
+#   memory - single process only (the default, and what tests use)
+#   broker - the TCP broker in this module, for several workers on one host
+#   redis  - Redis pub/sub (needs the redis package), for several hosts
+SOCKETIO_BACKEND = os.getenv("SOCKETIO_BACKEND", "memory")
+SOCKETIO_CHANNEL = os.getenv("SOCKETIO_CHANNEL", "healthinfo")
+SOCKETIO_BROKER_HOST = os.getenv("SOCKETIO_BROKER_HOST", "127.0.0.1")
+SOCKETIO_BROKER_PORT = int(os.getenv("SOCKETIO_BROKER_PORT", 8765))
+SOCKETIO_REDIS_URL = os.getenv("SOCKETIO_REDIS_URL", "redis://localhost:6379/0")
+
+# Packets allowed to wait in a client's send queue before further events to
+# that client are dropped, and how many consecutive drops disconnect it
+SOCKETIO_CLIENT_QUEUE_LIMIT = int(os.getenv("SOCKETIO_CLIENT_QUEUE_LIMIT", 100))
+SOCKETIO_SLOW_CLIENT_DROPS = int(os.getenv("SOCKETIO_SLOW_CLIENT_DROPS", 50))
+
+# Seconds to wait before reconnecting to the broker after losing it
+BROKER_RECONNECT_DELAY = 1.0
+
+
+class BoundedDeliveryMixin(AsyncManager):
+    """
+    Local delivery with a bound on each client's send queue.
+
+    Engine.IO queues outgoing packets per client without limit, so a client
+    that reads slower than events arrive grows its queue until the worker runs
+    out of memory. Events for a client whose queue is full are dropped instead,
+    and a client that keeps falling behind is disconnected so it reconnects
+    and resyncs. Every other recipient is unaffected.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._drops: Dict[str, int] = {}
+        self._hooks: Dict[str, List[Callable]] = {}
+        self.dropped = 0
+        self.slow_disconnects = 0
+
+    def add_hook(self, event: str, hook: Callable):
+        """
+        Call hook(data) on every worker each time the event is emitted from
+        any worker, whether or not this worker has clients to deliver it to
+        """
+        self._hooks.setdefault(event, []).append(hook)
+
+    async def _run_hooks(self, event, data):
+        for hook in self._hooks.get(event, ()):
+            try:
+                result = hook(data)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as exc:
+                logger.error(f"Socket.IO hook for '{event}' failed: {exc}")
+
+    def _queue_depth(self, eio_sid: str) -> int:
+        eio_socket = self.server.eio.sockets.get(eio_sid)
+        if eio_socket is None:
+            return 0
+        return eio_socket.queue.qsize()
+
+    async def emit(self, event, data, namespace, room=None, skip_sid=None, callback=None, to=None, **kwargs):
+        room = to or room
+        await self._run_hooks(event, data)
+        if callback is not None or namespace not in self.rooms:
+            # Acknowledged emits address a single client and are not throttled
+            return await super().emit(
+                event, data, namespace, room=room, skip_sid=skip_sid, callback=callback, **kwargs
+            )
+
+        skip = skip_sid if isinstance(skip_sid, list) else [skip_sid]
+        slow = set()
+        for sid, eio_sid in self.get_participants(namespace, room):
+            if sid in skip:
+                continue
+            if self._queue_depth(eio_sid) >= SOCKETIO_CLIENT_QUEUE_LIMIT:
+                slow.add(sid)
+                self._drops[sid] = self._drops.get(sid, 0) + 1
+                self.dropped += 1
+            else:
+                self._drops.pop(sid, None)
+
+        for sid in slow:
+            if self._drops[sid] >= SOCKETIO_SLOW_CLIENT_DROPS:
+                logger.warning(f"Disconnecting slow Socket.IO client {sid}")
+                self._drops.pop(sid, None)
+                self.slow_disconnects += 1
+                asyncio.ensure_future(self.server.disconnect(sid, namespace=namespace, ignore_queue=True))
+
+        await super().emit(event, data, namespace, room=room, skip_sid=[*skip, *slow], **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "clients": sum(len(self.rooms[namespace].get(None, {})) for namespace in self.rooms),
+            "dropped": self.dropped,
+            "slow_disconnects": self.slow_disconnects,
+        }
+
+
+class InMemoryBroker:
+    """
+    Fan-out of pub/sub messages between managers in one process
+    """
+
+    def __init__(self):
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, message: dict):
+        for queue in self._subscribers:
+            queue.put_nowait(message)
+
+
+memory_broker = InMemoryBroker()
+
+
+class InMemoryManager(AsyncPubSubManager, BoundedDeliveryMixin):
+    """
+    Socket.IO client manager backed by an in-process broker
+    """
+    name = "memory"
+
+    def __init__(self, broker: InMemoryBroker = memory_broker, channel=SOCKETIO_CHANNEL, write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.broker = broker
+
+    async def _publish(self, data):
+        self.broker.publish(data)
+
+    async def _listen(self):
+        queue = self.broker.subscribe()
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.broker.unsubscribe(queue)
+
+
+class BrokerManager(AsyncPubSubManager, BoundedDeliveryMixin):
+    """
+    Socket.IO client manager that shares events through the TCP broker
+    started with `python realtime.py broker`.
+
+    Messages are newline-delimited JSON; the broker relays every line it
+    receives to all connected workers, and each worker ignores its own.
+    """
+    name = "broker"
+
+    def __init__(self, host=SOCKETIO_BROKER_HOST, port=SOCKETIO_BROKER_PORT, channel=SOCKETIO_CHANNEL,
+                 write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.host = host
+        self.port = port
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._write_lock = asyncio.Lock()
+
+    async def _publish(self, data):
+        line = json.dumps(data, separators=(",", ":")).encode("utf-8") + b"\n"
+        async with self._write_lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None or self._writer.is_closing():
+                        _, self._writer = await asyncio.open_connection(self.host, self.port)
+                    self._writer.write(line)
+                    await self._writer.drain()
+                    return
+                except OSError as exc:
+                    self._writer = None
+                    if attempt:
+                        logger.error(f"Could not publish to Socket.IO broker {self.host}:{self.port}: {exc}")
+
+    async def _listen(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as exc:
+                logger.warning(f"Socket.IO broker {self.host}:{self.port} unavailable: {exc}")
+                await asyncio.sleep(BROKER_RECONNECT_DELAY)
+                continue
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    yield line
+            finally:
+                writer.close()
+            logger.warning("Lost connection to Socket.IO broker, reconnecting")
+            await asyncio.sleep(BROKER_RECONNECT_DELAY)
+
+
+class RedisManager(socketio.AsyncRedisManager, BoundedDeliveryMixin):
+    """
+    Socket.IO client manager backed by Redis pub/sub
+    """
+    name = "redis"
+
+
+def create_client_manager(backend: str = SOCKETIO_BACKEND):
+    """
+    Client manager for the configured pub/sub backend
+    """
+    if backend == "broker":
+        return BrokerManager()
+    if backend == "redis":
+        return RedisManager(SOCKETIO_REDIS_URL, channel=SOCKETIO_CHANNEL)
+    if backend != "memory":
+        logger.warning(f"Unknown SOCKETIO_BACKEND '{backend}', using memory")
+    return InMemoryManager()
+
+
+def start(server: socketio.AsyncServer):
+    """
+    Start listening on the pub/sub backend now instead of on the first client
+    connection, so workers without clients still run hooks for remote events
+    """
+    if not server.manager_initialized:
+        server.manager_initialized = True
+        server.manager.initialize()
+
+
+async def start_broker(host: str = SOCKETIO_BROKER_HOST, port: int = SOCKETIO_BROKER_PORT) -> asyncio.AbstractServer:
+    """
+    Start the TCP broker that relays Socket.IO pub/sub messages between workers
+    """
+    connections: Set[asyncio.StreamWriter] = set()
+
+    async def relay(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connections.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for connection in list(connections):
+                    try:
+                        connection.write(line)
+                    except Exception:
+                        connections.discard(connection)
+        finally:
+            connections.discard(writer)
+            writer.close()
+
+    server = await asyncio.start_server(relay, host, port)
+    logger.info(f"Socket.IO broker listening on {host}:{port}")
+    return server
+
+
+async def _run_broker():
+    server = await start_broker()
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["broker"]:
+        sys.exit("usage: python realtime.py broker")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    asyncio.run(_run_broker())
@@ -1,42 +1,21 @@
 from fastapi import APIRouter, HTTPException, Query, Path
 from typing import List, Optional
-import httpx
 import os
 import logging
 from datetime import datetime
 
 from models import ArticlePreview, Article, ErrorResponse
+from cms_client import fetch_from_cms
+from fast_json import fetch_json_response
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Set the CMS API URL from environment variable with a fallback
-CMS_API_URL = os.getenv("CMS_API_URL", "http://localhost:8001/api")
+# Serve reads straight from the gateway database instead of the CMS API
+READ_MODE = os.getenv("GATEWAY_READ_MODE", "cms")
 
-# Utility function to make requests to the CMS API
-async def fetch_from_cms(endpoint: str, params=None):
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{CMS_API_URL}/{endpoint}", params=params, timeout=10.0)
-            response.raise_for_status()
-            return response.json()
-        except httpx.RequestError as exc:
-            logger.error(f"Error fetching {endpoint}: {exc}")
-            raise HTTPException(
-                status_code=503,
-                detail=f"Service unavailable: Unable to connect to CMS API."
-            )
-        except httpx.HTTPStatusError as exc:
-            logger.error(f"Error response {exc.response.status_code} from CMS: {exc}")
-            status_code = exc.response.status_code
-            try:
-                detail = exc.response.json()
-            except:
-                detail = str(exc)
-            raise HTTPException(status_code=status_code, detail=detail)
-        except Exception as exc:
-            logger.error(f"Unexpected error fetching {endpoint}: {exc}")
-            raise HTTPException(status_code=500, detail=str(exc))
+if READ_MODE == "db":
+    import db_reads
 
 # Mock data for development (will be replaced with actual CMS API calls)
 mock_articles = [
@@ -83,15 +62,16 @@ async def get_top_stories():
     """
     Retrieve the top stories/featured articles
     """
+    if READ_MODE == "db":
+        return await db_reads.get_top_stories()
+
     try:
         # Try to fetch from CMS API
-        articles = await fetch_from_cms("pages/?type=news.NewsPage&fields=title,subtitle,summary,body,publish_date,featured,image,category&order=-first_published_at")
-        return articles
-    except HTTPException as exc:
-        if exc.status_code == 503:
-            # If CMS is unavailable, use mock data for now
-            logger.warning("CMS unavailable, returning mock top stories")
-            return mock_articles
+        return await fetch_json_response(
+            "pages/?type=news.NewsPage&fields=title,subtitle,summary,body,publish_date,featured,image,category&order=-first_published_at",
+            List[ArticlePreview],
+        )
+    except HTTPException:
         raise
     except Exception as exc:
         # For development, return mock data
@@ -109,13 +89,8 @@ async def get_health_topics():
     """
     try:
         # Try to fetch from CMS API
-        articles = await fetch_from_cms("articles/health-topics")
-        return articles
-    except HTTPException as exc:
-        if exc.status_code == 503:
-            # If CMS is unavailable, use mock data for now
-            logger.warning("CMS unavailable, returning mock health topics")
-            return mock_articles[:2]
+        return await fetch_json_response("articles/health-topics", List[ArticlePreview])
+    except HTTPException:
         raise
     except Exception as exc:
         # For development, return mock data
@@ -131,15 +106,13 @@ async def get_article_paths():
     """
     Get all article slugs for static path generation
     """
+    if READ_MODE == "db":
+        return await db_reads.get_article_paths()
+
     try:
         # Try to fetch from CMS API
-        paths = await fetch_from_cms("articles/paths")
-        return paths
-    except HTTPException as exc:
-        if exc.status_code == 503:
-            # If CMS is unavailable, log warning and return a few paths
-            logger.warning("CMS unavailable, returning limited article paths")
-            return ["reduce-bloating", "health-benefits-pistachios", "alcohol-affects-skin"]
+        return await fetch_json_response("articles/paths", List[str])
+    except HTTPException:
         raise
     except Exception as exc:
         # For development, return mock paths
@@ -155,39 +128,18 @@ async def get_article(slug: str = Path(..., description="The slug of the article
     """
     Get a single article by its slug
     """
+    if READ_MODE == "db":
+        article = await db_reads.get_article(slug)
+        if article is None:
+            raise HTTPException(status_code=404, detail=f"Article with slug '{slug}' not found")
+        return article
+
     try:
         # Try to fetch from CMS API
-        article = await fetch_from_cms(f"articles/{slug}")
-        return article
+        return await fetch_json_response(f"articles/{slug}", Article)
     except HTTPException as exc:
         if exc.status_code == 404:
             raise HTTPException(status_code=404, detail=f"Article with slug '{slug}' not found")
-        elif exc.status_code == 503:
-            # If CMS is unavailable, check if we have this article in our mock data
-            logger.warning(f"CMS unavailable, trying to serve mock article {slug}")
-            for article in mock_articles:
-                if article.slug == slug:
-                    # Convert to a full Article with content
-                    return Article(
-                        id=article.id,
-                        title=article.title,
-                        slug=article.slug,
-                        summary=article.summary,
-                        subtitle=article.summary,
-                        image=article.image,
-                        content=f"<p>This is the full content of the article about {article.title}.</p><p>Lorem ipsum dolor sit amet, consectetur adipiscing elit. Proin euismod, nunc nec aliquam lacinia, nisl nisl aliquam nisl, eget aliquam nisl nisl sit amet nisl.</p>",
-                        author={
-                            "name": "Dr. Jane Smith",
-                            "credentials": "MD, PhD",
-                            "bio": "Dr. Smith is a specialist in internal medicine with over 15 years of experience.",
-                        },
-                        published_date=article.created_at,
-                        updated_date=None,
-                        tags=["Health", "Wellness"],
-                    )
-
-            # If not found in mock data, return 404
-            raise HTTPException(status_code=404, detail=f"Article with slug '{slug}' not found")
         raise
     except Exception as exc:
         # For development, return mock data
@@ -224,19 +176,16 @@ async def get_related_articles(slug: str = Path(..., description="The slug of th
     """
     Get articles related to the specified article
     """
+    if READ_MODE == "db":
+        return await db_reads.get_related_articles(slug)
+
     try:
         # Try to fetch from CMS API
-        articles = await fetch_from_cms(f"articles/{slug}/related")
-        return articles
+        return await fetch_json_response(f"articles/{slug}/related", List[ArticlePreview])
     except HTTPException as exc:
         if exc.status_code == 404:
             # If the article doesn't exist, return empty list
             return []
-        if exc.status_code == 503:
-            # If CMS is unavailable, use mock data
-            logger.warning("CMS unavailable, returning mock related articles")
-            # Exclude the current article
-            return [article for article in mock_articles if article.slug != slug][:3]
         raise
     except Exception as exc:
         # For development, return mock data
@@ -255,16 +204,8 @@ async def get_well_being_articles():
     """
     try:
         # Try to fetch from CMS API
-        data = await fetch_from_cms("well-being")
-        return data
-    except HTTPException as exc:
-        if exc.status_code == 503:
-            # If CMS is unavailable, use mock data for now
-            logger.warning("CMS unavailable, returning mock well-being data")
-            return {
-                "featured": mock_articles[:3],
-                "articles": mock_articles
-            }
+        return await fetch_json_response("well-being", dict)
+    except HTTPException:
         raise
     except Exception as exc:
         # For development, return mock data
@@ -278,33 +219,25 @@ async def get_well_being_articles():
         logger.error(f"Error fetching well-being articles: {exc}")
         return {"featured": [], "articles": []}
 
-async def search_articles(query: str):
+async def search_articles(query: str, offset: int = 0, limit: int = 10):
     """
-    Search articles by query string
+    One page of articles matching the query string, with the total count
     """
     try:
         # Try to fetch from CMS API
-        articles = await fetch_from_cms("articles/search", {"q": query})
-        return articles
-    except HTTPException as exc:
-        if exc.status_code == 503:
-            # If CMS is unavailable, use mock search results
-            logger.warning("CMS unavailable, returning mock search results")
-            return [
-                article for article in mock_articles 
-                if query.lower() in article.title.lower() or 
-                   (article.summary and query.lower() in article.summary.lower())
-            ]
+        return await fetch_from_cms("search/articles", {"q": query, "offset": offset, "limit": limit})
+    except HTTPException:
         raise
     except Exception as exc:
         # For development, return filtered mock data
         if os.getenv("ENV", "development") == "development":
             logger.info(f"Using mock data for article search: {query}")
-            return [
+            matches = [
                 article for article in mock_articles 
                 if query.lower() in article.title.lower() or 
                    (article.summary and query.lower() in article.summary.lower())
             ]
+            return {"count": len(matches), "offset": offset, "limit": limit, "results": matches[offset:offset + limit]}
 
         logger.error(f"Error searching articles: {exc}")
-        return []
\ No newline at end of file
+        return {"count": 0, "offset": offset, "limit": limit, "results": []}
\ No newline at end of file
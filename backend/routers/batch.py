@@ -0,0 +1,79 @@
+from fastapi import APIRouter, HTTPException, Request
+import asyncio
+import httpx
+import os
+import logging
+
+from models import BatchRequest, BatchResponse, BatchSubResponse
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Upper bound on sub-requests per batch and the time allowed for each one
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", 20))
+BATCH_TIMEOUT = float(os.getenv("BATCH_TIMEOUT", 10.0))
+
+
+def _dedup_key(path: str, params) -> tuple:
+    return (path, tuple(sorted((params or {}).items())))
+
+
+async def _run_sub_request(client: httpx.AsyncClient, path: str, params) -> BatchSubResponse:
+    """
+    Dispatch one GET through the gateway app in-process and capture its result
+    """
+    try:
+        # The ASGI transport ignores httpx timeouts, so bound the call itself
+        response = await asyncio.wait_for(client.get(path, params=params), BATCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"Batch sub-request {path} timed out")
+        return BatchSubResponse(status=504, body={"detail": "Sub-request timed out"})
+    except Exception as exc:
+        logger.error(f"Batch sub-request {path} failed: {exc}")
+        return BatchSubResponse(status=500, body={"detail": str(exc)})
+
+    try:
+        body = response.json()
+    except ValueError:
+        body = response.text
+    return BatchSubResponse(status=response.status_code, body=body)
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def batch(batch_request: BatchRequest, request: Request):
+    """
+    Execute several GET requests against this API in one round trip.
+
+    Sub-requests run concurrently; identical path/params pairs are executed
+    once and their result shared by every id that asked for them.
+    """
+    sub_requests = batch_request.requests
+    if len(sub_requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {BATCH_MAX_REQUESTS} requests"
+        )
+
+    for sub_request in sub_requests:
+        if not sub_request.path.startswith("/api/") or sub_request.path.startswith("/api/batch"):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid batch path '{sub_request.path}'"
+            )
+
+    unique = {}
+    for sub_request in sub_requests:
+        unique.setdefault(_dedup_key(sub_request.path, sub_request.params), sub_request)
+
+    transport = httpx.ASGITransport(app=request.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        results = await asyncio.gather(*[
+            _run_sub_request(client, sub_request.path, sub_request.params)
+            for sub_request in unique.values()
+        ])
+
+    by_key = dict(zip(unique.keys(), results))
+    return BatchResponse(responses={
+        sub_request.id: by_key[_dedup_key(sub_request.path, sub_request.params)]
+        for sub_request in sub_requests
+    })
@@ -1,42 +1,21 @@
 from fastapi import APIRouter, HTTPException, Query, Path
 from typing import List, Optional
-import httpx
 import os
 import logging
 from datetime import datetime
 
 from models import ConditionPreview, Condition, ErrorResponse
+from cms_client import fetch_from_cms
+from fast_json import fetch_json_response
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Set the CMS API URL from environment variable with a fallback
-CMS_API_URL = os.getenv("CMS_API_URL", "http://localhost:8001/api")
+# Serve reads straight from the gateway database instead of the CMS API
+READ_MODE = os.getenv("GATEWAY_READ_MODE", "cms")
 
-# Utility function to make requests to the CMS API
-async def fetch_from_cms(endpoint: str, params=None):
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{CMS_API_URL}/{endpoint}", params=params, timeout=10.0)
-            response.raise_for_status()
-            return response.json()
-        except httpx.RequestError as exc:
-            logger.error(f"Error fetching {endpoint}: {exc}")
-            raise HTTPException(
-                status_code=503,
-                detail=f"Service unavailable: Unable to connect to CMS API."
-            )
-        except httpx.HTTPStatusError as exc:
-            logger.error(f"Error response {exc.response.status_code} from CMS: {exc}")
-            status_code = exc.response.status_code
-            try:
-                detail = exc.response.json()
-            except:
-                detail = str(exc)
-            raise HTTPException(status_code=status_code, detail=detail)
-        except Exception as exc:
-            logger.error(f"Unexpected error fetching {endpoint}: {exc}")
-            raise HTTPException(status_code=500, detail=str(exc))
+if READ_MODE == "db":
+    import db_reads
 
 # Mock data for development (will be replaced with actual CMS API calls)
 mock_conditions = [
@@ -71,15 +50,13 @@ async def get_conditions_index():
     """
     Retrieve a complete index of all health conditions
     """
+    if READ_MODE == "db":
+        return await db_reads.get_conditions_index()
+
     try:
         # Try to fetch from CMS API
-        conditions = await fetch_from_cms("api/conditions-index")
-        return conditions
-    except HTTPException as exc:
-        if exc.status_code == 503:
-            # If CMS is unavailable, use mock data
-            logger.warning("CMS unavailable, returning mock conditions index")
-            return mock_conditions
+        return await fetch_json_response("api/conditions-index", List[ConditionPreview])
+    except HTTPException:
         raise
     except Exception as exc:
         # For development, return mock data
@@ -95,15 +72,13 @@ async def get_condition_paths():
     """
     Get all condition slugs for static path generation
     """
+    if READ_MODE == "db":
+        return await db_reads.get_condition_paths()
+
     try:
         # Try to fetch from CMS API
-        paths = await fetch_from_cms("conditions/paths")
-        return paths
-    except HTTPException as exc:
-        if exc.status_code == 503:
-            # If CMS is unavailable, log warning and return a few paths
-            logger.warning("CMS unavailable, returning limited condition paths")
-            return ["type-2-diabetes", "hypertension", "asthma", "migraine"]
+        return await fetch_json_response("conditions/paths", List[str])
+    except HTTPException:
         raise
     except Exception as exc:
         # For development, return mock paths
@@ -119,39 +94,18 @@ async def get_condition(slug: str = Path(..., description="The slug of the condi
     """
     Get a single condition by its slug
     """
+    if READ_MODE == "db":
+        condition = await db_reads.get_condition(slug)
+        if condition is None:
+            raise HTTPException(status_code=404, detail=f"Condition with slug '{slug}' not found")
+        return condition
+
     try:
         # Try to fetch from CMS API
-        condition = await fetch_from_cms(f"conditions/{slug}")
-        return condition
+        return await fetch_json_response(f"conditions/{slug}", Condition)
     except HTTPException as exc:
         if exc.status_code == 404:
             raise HTTPException(status_code=404, detail=f"Condition with slug '{slug}' not found")
-        elif exc.status_code == 503:
-            # If CMS is unavailable, check for mock data
-            logger.warning(f"CMS unavailable, trying to serve mock condition {slug}")
-            for condition in mock_conditions:
-                if condition.slug == slug:
-                    # Convert to a full Condition with content
-                    return Condition(
-                        id=condition.id,
-                        name=condition.name,
-                        slug=condition.slug,
-                        subtitle=condition.subtitle,
-                        overview="<p>This is an overview of the condition.</p>",
-                        symptoms="<p>Common symptoms include...</p>",
-                        causes="<p>This condition is usually caused by...</p>",
-                        diagnosis="<p>Diagnosis typically involves...</p>",
-                        treatments="<p>Treatment options include...</p>",
-                        prevention="<p>To reduce your risk, consider...</p>",
-                        complications="<p>If left untreated, complications may include...</p>",
-                        image="https://images.unsplash.com/photo-1576091160550-2173dba999ef?ixlib=rb-4.0.3&auto=format&fit=crop&w=1200&h=600&q=80",
-                        related_conditions=[
-                            {"name": rc.name, "slug": rc.slug} 
-                            for rc in mock_conditions if rc.id != condition.id
-                        ][:2],
-                    )
-            # If not found, return 404
-            raise HTTPException(status_code=404, detail=f"Condition with slug '{slug}' not found")
         raise
     except Exception as exc:
         # For development, return mock data
@@ -184,33 +138,25 @@ async def get_condition(slug: str = Path(..., description="The slug of the condi
         logger.error(f"Error fetching condition {slug}: {exc}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve condition: {str(exc)}")
 
-async def search_conditions(query: str):
+async def search_conditions(query: str, offset: int = 0, limit: int = 10):
     """
-    Search conditions by query string
+    One page of conditions matching the query string, with the total count
     """
     try:
         # Try to fetch from CMS API
-        conditions = await fetch_from_cms("conditions/search", {"q": query})
-        return conditions
-    except HTTPException as exc:
-        if exc.status_code == 503:
-            # If CMS is unavailable, use mock data
-            logger.warning("CMS unavailable, returning mock search results")
-            return [
-                condition for condition in mock_conditions
-                if query.lower() in condition.name.lower() or 
-                  (condition.subtitle and query.lower() in condition.subtitle.lower())
-            ]
+        return await fetch_from_cms("search/conditions", {"q": query, "offset": offset, "limit": limit})
+    except HTTPException:
         raise
     except Exception as exc:
         # For development, return filtered mock data
         if os.getenv("ENV", "development") == "development":
             logger.info(f"Using mock data for condition search: {query}")
-            return [
+            matches = [
                 condition for condition in mock_conditions
                 if query.lower() in condition.name.lower() or 
                   (condition.subtitle and query.lower() in condition.subtitle.lower())
             ]
+            return {"count": len(matches), "offset": offset, "limit": limit, "results": matches[offset:offset + limit]}
         
         logger.error(f"Error searching conditions: {exc}")
-        return []
\ No newline at end of file
+        return {"count": 0, "offset": offset, "limit": limit, "results": []}
\ No newline at end of file
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import ValidationError
+import asyncio
+import hashlib
+import hmac
+import os
+import logging
+
+from models import ContentEvent
+from cache import response_cache
+from drug_index import drug_index
+from suggest_index import SUGGEST_TYPES, suggest_index
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Shared with the CMS (GATEWAY_EVENTS_SECRET there); events are rejected without it
+CONTENT_EVENTS_SECRET = os.getenv("CONTENT_EVENTS_SECRET", "")
+
+# Socket.IO event carrying content changes to clients
+CONTENT_CHANGED_EVENT = "content_changed"
+
+# Cached CMS endpoints that may include a page of each type
+EVICT_PREFIXES = {
+    "article": ["articles/", "well-being", "search/articles"],
+    "news": ["pages/?type=news.NewsPage"],
+    "condition": ["conditions/", "api/conditions-index", "search/conditions"],
+    "drug": ["drugs/", "search/drugs"],
+}
+
+# Keep references to background index syncs so they are not garbage collected
+_background_tasks = set()
+
+
+def content_rooms(event: dict) -> list:
+    """
+    Socket.IO rooms told about a change: everything, the type, and the page
+    """
+    return ["content", f"content:{event['type']}", f"content:{event['type']}:{event['slug']}"]
+
+
+async def evict_for_event(event: dict):
+    """
+    Drop this worker's cached copies of anything the changed page appears in.
+
+    Registered as a Socket.IO hook, so it runs on every worker when any worker
+    relays an event.
+    """
+    evicted = sum(response_cache.delete_prefix(prefix) for prefix in EVICT_PREFIXES.get(event.get("type"), ()))
+    logger.info(f"{event.get('action')} {event.get('type')} {event.get('slug')}: evicted {evicted} cache entries")
+    if event.get("type") == "drug" and event.get("action") == "unpublished":
+        drug_index.remove(event["id"])
+    elif event.get("type") == "drug":
+        task = asyncio.create_task(drug_index.sync())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    if event.get("type") in SUGGEST_TYPES:
+        suggest_index.refresh()
+
+
+def _signature_valid(body: bytes, signature: str) -> bool:
+    expected = "sha256=" + hmac.new(CONTENT_EVENTS_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+@router.post("/internal/events", status_code=202, include_in_schema=False)
+async def receive_content_event(request: Request):
+    """
+    Accept a signed publish/unpublish event from the CMS and relay it to the
+    subscribed Socket.IO rooms
+    """
+    if not CONTENT_EVENTS_SECRET:
+        raise HTTPException(status_code=403, detail="Content events are not enabled")
+
+    body = await request.body()
+    if not _signature_valid(body, request.headers.get("x-events-signature", "")):
+        raise HTTPException(status_code=403, detail="Invalid event signature")
+
+    try:
+        event = ContentEvent.model_validate_json(body)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors())
+
+    payload = event.model_dump(mode="json")
+    await request.app.sio.emit(CONTENT_CHANGED_EVENT, payload, to=content_rooms(payload))
+    return {"status": "accepted"}
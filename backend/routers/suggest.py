@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+import logging
+
+from models import SuggestResponse
+from fast_json import EncodedJSONResponse, dumps
+from suggest_index import SUGGEST_DEFAULT_LIMIT, SUGGEST_MAX_LIMIT, SUGGEST_TYPES, suggest_index
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest(
+    q: str = Query(..., max_length=100, description="What has been typed so far"),
+    limit: int = Query(SUGGEST_DEFAULT_LIMIT, ge=1, le=SUGGEST_MAX_LIMIT),
+    types: Optional[str] = Query(None, description="Comma separated subset of article, condition, drug"),
+):
+    """
+    Complete a partly typed article title, condition or drug name
+    """
+    wanted = SUGGEST_TYPES
+    if types:
+        wanted = tuple(sorted({name.strip() for name in types.split(",") if name.strip()}))
+        unknown = [name for name in wanted if name not in SUGGEST_TYPES]
+        if unknown or not wanted:
+            raise HTTPException(status_code=400, detail=f"Unknown suggestion types: {', '.join(unknown)}")
+
+    try:
+        suggestions = await suggest_index.suggest(q, limit, wanted)
+        return EncodedJSONResponse(dumps({"query": q, "suggestions": suggestions}))
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.error(f"Error suggesting completions for {q}: {exc}")
+        raise HTTPException(status_code=500, detail=str(exc))
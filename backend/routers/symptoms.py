@@ -1,3 +1,21 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+import logging
 
-router = APIRouter()
\ No newline at end of file
+from models import SymptomRequest, SymptomResponse
+from cms_client import post_to_cms
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.post("/symptom-checker", response_model=SymptomResponse)
+async def check_symptoms(request: SymptomRequest):
+    """
+    Rank possible conditions for the reported symptoms, age and gender
+    """
+    try:
+        return await post_to_cms("symptom-checker/", request.model_dump(mode="json"))
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.error(f"Error checking symptoms: {exc}")
+        raise HTTPException(status_code=500, detail=str(exc))
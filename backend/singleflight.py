@@ -0,0 +1,42 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it runs
+    await the same task instead of starting their own. The task is shielded, so
+    a caller that is cancelled (e.g. the client disconnected) does not cancel
+    the work for everyone else.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.started = 0
+        self.shared = 0
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.started += 1
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved when every caller has gone away
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Shared call {key} failed: {task.exception()}")
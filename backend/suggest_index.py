@@ -0,0 +1,234 @@
+import os
+import re
+import time
+import heapq
+import asyncio
+import logging
+import unicodedata
+from bisect import bisect_left
+from itertools import chain
+from typing import Dict, List, Optional, Set, Tuple
+
+from cms_client import fetch_uncached
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_CORPUS_ENDPOINT = "suggest/corpus"
+
+# Seconds after a build before the next request triggers a background rebuild;
+# publish events rebuild the index straight away
+SUGGEST_REFRESH_INTERVAL = float(os.getenv("SUGGEST_REFRESH_INTERVAL", 600))
+
+SUGGEST_DEFAULT_LIMIT = 8
+SUGGEST_MAX_LIMIT = 20
+
+# Prefixes up to this long are ranked for every page type when the index is
+# built, since the first few typed letters match a large share of all names
+SUGGEST_RANKED_PREFIX_LENGTH = 3
+
+# Longer prefixes still matching at least this many names have their ranked
+# results kept until the next rebuild
+SUGGEST_MEMO_MIN_MATCHES = 200
+SUGGEST_MEMO_MAX_ENTRIES = 5000
+
+SUGGEST_TYPES = ("article", "condition", "drug")
+
+# Anything but letters, digits and Devanagari (whose vowel signs are not \w)
+_SEPARATORS = re.compile(r"[^\w\u0900-\u097F]+")
+
+# (rank, entry number, name, language); lower ranks sort first
+Posting = Tuple[Tuple[int, int, int, int], int, str, str]
+
+
+def _rank_short_prefixes(keys: List[str], postings: List[Posting], entries: List[dict]):
+    """
+    Best SUGGEST_MAX_LIMIT postings, one per page, for every short prefix and
+    page type, keyed by (prefix, type)
+    """
+    best: Dict[Tuple[str, str], Dict[int, Posting]] = {}
+    for key, posting in zip(keys, postings):
+        entry_number = posting[1]
+        page_type = entries[entry_number]["type"]
+        for length in range(1, min(len(key), SUGGEST_RANKED_PREFIX_LENGTH) + 1):
+            group = best.setdefault((key[:length], page_type), {})
+            current = group.get(entry_number)
+            if current is None or posting < current:
+                group[entry_number] = posting
+    return {group_key: heapq.nsmallest(SUGGEST_MAX_LIMIT, group.values()) for group_key, group in best.items()}
+
+
+def _index_corpus(corpus: List[dict]):
+    """
+    Sorted keys, their postings, page entries and ranked short prefixes for
+    the corpus served by the CMS
+    """
+    entries = []
+    keyed: List[Tuple[str, Posting]] = []
+    for item in corpus:
+        entry_number = len(entries)
+        entries.append({"type": item["type"], "id": item["id"], "title": item["title"], "slug": item["slug"]})
+        popularity = item.get("popularity") or 0
+        seen = set()
+        for lang, names in item.get("names", {}).items():
+            for alias, name in enumerate(names):
+                key = normalize(name)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                # Full names before later words, titles before other names
+                rank = (0, min(alias, 1), -popularity, len(key))
+                keyed.append((key, (rank, entry_number, name, lang)))
+                for position, character in enumerate(key):
+                    if character == " ":
+                        keyed.append((key[position + 1:], ((1,) + rank[1:], entry_number, name, lang)))
+    keyed.sort(key=lambda item: item[0])
+    keys = [key for key, _ in keyed]
+    postings = [posting for _, posting in keyed]
+    return keys, postings, entries, _rank_short_prefixes(keys, postings, entries)
+
+
+def normalize(text: str) -> str:
+    """
+    Case- and punctuation-insensitive form of a name or typed prefix
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(_SEPARATORS.sub(" ", text).split())
+
+
+class SuggestIndex:
+    """
+    Typeahead completions over article titles, condition names and drug
+    names, in English and Hindi, built from the CMS and kept in memory.
+
+    Every name is normalized and stored under its full text and under the text
+    from each later word on, so "pressure" completes "High blood pressure".
+    The keys sit in one sorted list; a prefix is two bisections giving the
+    slice of matching names, which are ranked by where the match starts,
+    whether it is the page's own title, popularity and length. Short prefixes,
+    whose slices are long, are ranked ahead of time instead. The whole corpus
+    is one CMS request, so changes rebuild the index from scratch.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._postings: List[Posting] = []
+        self._entries: List[dict] = []
+        self._ranked: Dict[Tuple[str, str], List[Posting]] = {}
+        self._memo: Dict[Tuple[str, Tuple[str, ...], int], List[dict]] = {}
+        self._built_at: Optional[float] = None
+        self._stale = False
+        self._flights = SingleFlight()
+        self._background: Set[asyncio.Task] = set()
+        self.version = 0
+        self.builds = 0
+
+    async def suggest(self, query: str, limit: int = SUGGEST_DEFAULT_LIMIT,
+                      types: Tuple[str, ...] = SUGGEST_TYPES) -> List[dict]:
+        """
+        Best completions of a typed prefix, at most one per page
+        """
+        if self._built_at is None:
+            await self.sync()
+        elif time.monotonic() - self._built_at > SUGGEST_REFRESH_INTERVAL:
+            self.refresh()
+        return self.lookup(query, limit, types)
+
+    def lookup(self, query: str, limit: int, types: Tuple[str, ...]) -> List[dict]:
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        if len(prefix) <= SUGGEST_RANKED_PREFIX_LENGTH:
+            ranked = chain.from_iterable(self._ranked.get((prefix, page_type), ()) for page_type in types)
+            return self._suggestions(heapq.nsmallest(limit, ranked))
+
+        memo_key = (prefix, types, limit)
+        if memo_key in self._memo:
+            return self._memo[memo_key]
+
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix + "\uffff", lo=start)
+        wanted = set(types)
+        best: Dict[int, Posting] = {}
+        for posting in self._postings[start:end]:
+            entry_number = posting[1]
+            if self._entries[entry_number]["type"] not in wanted:
+                continue
+            current = best.get(entry_number)
+            if current is None or posting < current:
+                best[entry_number] = posting
+
+        suggestions = self._suggestions(heapq.nsmallest(limit, best.values()))
+        if end - start >= SUGGEST_MEMO_MIN_MATCHES and len(self._memo) < SUGGEST_MEMO_MAX_ENTRIES:
+            self._memo[memo_key] = suggestions
+        return suggestions
+
+    def _suggestions(self, postings: List[Posting]) -> List[dict]:
+        return [
+            {**self._entries[entry_number], "text": name, "lang": lang}
+            for _, entry_number, name, lang in postings
+        ]
+
+    async def sync(self):
+        """
+        Rebuild the index, sharing one rebuild between concurrent callers
+        """
+        await self._flights.do("build", self._build_until_current)
+
+    def refresh(self):
+        """
+        Rebuild in the background, serving the current index meanwhile; called
+        for publish events
+        """
+        if self._built_at is None:
+            # Not used yet; the first request builds it
+            return
+        self._stale = True
+        if self._flights.in_flight("build"):
+            # The running build may have fetched the corpus before the change
+            return
+        task = asyncio.create_task(self._background_sync())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _background_sync(self):
+        try:
+            await self.sync()
+        except Exception as exc:
+            logger.warning(f"Suggest index rebuild failed, serving version {self.version}: {exc}")
+
+    async def _build_until_current(self):
+        self._stale = False
+        await self._build()
+        while self._stale:
+            self._stale = False
+            await self._build()
+
+    async def _build(self):
+        started = time.monotonic()
+        corpus = await fetch_uncached(SUGGEST_CORPUS_ENDPOINT)
+        # Sorting and ranking a large corpus takes a while; keep it off the loop
+        keys, postings, entries, ranked = await asyncio.to_thread(_index_corpus, corpus)
+
+        self._keys, self._postings, self._entries, self._ranked = keys, postings, entries, ranked
+        self._memo = {}
+        self._built_at = time.monotonic()
+        self.version += 1
+        self.builds += 1
+        logger.info(
+            f"Built suggest index: {len(keys)} keys for {len(entries)} pages "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+
+    def stats(self) -> dict:
+        return {
+            "pages": len(self._entries),
+            "keys": len(self._keys),
+            "memoized": len(self._memo),
+            "version": self.version,
+            "builds": self.builds,
+            "age": round(time.monotonic() - self._built_at, 1) if self._built_at is not None else None,
+        }
+
+
+suggest_index = SuggestIndex()
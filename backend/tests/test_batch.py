@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+import routers.batch as batch_module
+
+
+def make_app():
+    app = FastAPI()
+    app.include_router(batch_module.router, prefix="/api")
+
+    @app.get("/api/fast")
+    async def fast():
+        return {"ok": True}
+
+    @app.get("/api/slow")
+    async def slow():
+        await asyncio.sleep(2)
+        return {"ok": True}
+
+    return app
+
+
+def test_slow_sub_request_times_out_without_holding_the_batch(monkeypatch):
+    monkeypatch.setattr(batch_module, "BATCH_TIMEOUT", 0.2)
+
+    async def run():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            started = asyncio.get_running_loop().time()
+            response = await client.post("/api/batch", json={"requests": [
+                {"id": "fast", "path": "/api/fast"},
+                {"id": "slow", "path": "/api/slow"},
+            ]})
+            return response, asyncio.get_running_loop().time() - started
+
+    response, elapsed = asyncio.run(run())
+    assert response.status_code == 200
+    responses = response.json()["responses"]
+    assert responses["fast"] == {"status": 200, "body": {"ok": True}}
+    assert responses["slow"]["status"] == 504
+    assert elapsed < 1
+
+
+def test_identical_sub_requests_share_one_result():
+    async def run():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            return await client.post("/api/batch", json={"requests": [
+                {"id": "a", "path": "/api/fast"},
+                {"id": "b", "path": "/api/fast"},
+            ]})
+
+    responses = asyncio.run(run()).json()["responses"]
+    assert responses["a"] == responses["b"] == {"status": 200, "body": {"ok": True}}
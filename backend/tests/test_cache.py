@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import cms_client as cms_client_module
+from cache import LastKnownGoodStore, ResponseCache, StoredResponse, cache_key
+from circuit_breaker import CircuitBreaker
+from singleflight import SingleFlight
+
+
+def stored(value, size=10):
+    return StoredResponse(value, size)
+
+
+def test_lru_evicts_least_recently_used_entry_over_budget():
+    cache = ResponseCache(max_bytes=30)
+    cache.set("a", stored("a"), ttl=60)
+    cache.set("b", stored("b"), ttl=60)
+    cache.set("c", stored("c"), ttl=60)
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a").value == "a"
+
+    cache.set("d", stored("d"), ttl=60)
+
+    assert cache.peek("b") is None
+    assert [cache.peek(key).value for key in ("a", "c", "d")] == ["a", "c", "d"]
+    assert cache.stats()["evictions"] == 1
+    assert cache.current_bytes == 30
+
+
+def test_entry_larger_than_budget_is_not_cached():
+    cache = ResponseCache(max_bytes=5)
+    assert cache.set("a", stored("a", size=6), ttl=60) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entry_is_served_stale_then_dropped():
+    cache = ResponseCache(stale_ttl=60)
+    cache.set("a", stored("a"), ttl=0)
+    assert cache.get("a").value == "a"
+    assert cache.stats()["stale_hits"] == 1
+
+    cache = ResponseCache(stale_ttl=0)
+    cache.set("a", stored("a"), ttl=0)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def use_fresh_state(monkeypatch, cache):
+    monkeypatch.setattr(cms_client_module, "CACHE_ENABLED", True)
+    monkeypatch.setattr(cms_client_module, "response_cache", cache)
+    monkeypatch.setattr(cms_client_module, "last_known_good", LastKnownGoodStore())
+    monkeypatch.setattr(cms_client_module, "cms_breaker", CircuitBreaker("test"))
+    monkeypatch.setattr(cms_client_module, "cms_flights", SingleFlight())
+
+
+def test_stale_entry_is_served_while_refreshed_in_the_background(monkeypatch):
+    cache = ResponseCache(stale_ttl=60)
+    use_fresh_state(monkeypatch, cache)
+    calls = []
+
+    async def get_json(endpoint, params=None, known=None):
+        calls.append(endpoint)
+        await asyncio.sleep(0)
+        return stored("new")
+
+    monkeypatch.setattr(cms_client_module, "_get_json", get_json)
+
+    async def run():
+        cache.set(cache_key("well-being"), stored("old"), ttl=0)
+        first = await cms_client_module.fetch_from_cms("well-being")
+        # A second stale read while the refresh runs does not start another
+        second = await cms_client_module.fetch_from_cms("well-being")
+        await asyncio.gather(*cms_client_module._background_tasks)
+        third = await cms_client_module.fetch_from_cms("well-being")
+        return first, second, third
+
+    assert asyncio.run(run()) == ("old", "old", "new")
+    assert calls == ["well-being"]
+    assert cache.peek(cache_key("well-being")).is_fresh(time.monotonic())
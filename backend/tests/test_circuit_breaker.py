@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import circuit_breaker as circuit_breaker_module
+import cms_client as cms_client_module
+from cache import LastKnownGoodStore, ResponseCache, StoredResponse
+from circuit_breaker import CircuitBreaker
+from singleflight import SingleFlight
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_after_threshold_and_half_opens_after_recovery_timeout(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker_module.time, "monotonic", clock)
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=30, half_open_max_calls=1)
+
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    clock.now += 30
+    # One probe is let through, the rest are rejected until it reports back
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+    assert breaker.stats()["rejected"] == 2
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_failed_probe_opens_the_circuit_again(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker_module.time, "monotonic", clock)
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30)
+
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29
+    assert not breaker.allow_request()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+class FlakyCMS:
+    def __init__(self):
+        self.up = True
+        self.calls = 0
+
+    async def get_json(self, endpoint, params=None, known=None):
+        self.calls += 1
+        if not self.up:
+            raise HTTPException(status_code=503, detail="Service unavailable: Unable to connect to CMS API.")
+        return StoredResponse({"endpoint": endpoint}, 10)
+
+
+@pytest.fixture
+def cms(monkeypatch):
+    flaky = FlakyCMS()
+    monkeypatch.setattr(cms_client_module, "_get_json", flaky.get_json)
+    monkeypatch.setattr(cms_client_module, "response_cache", ResponseCache())
+    monkeypatch.setattr(cms_client_module, "last_known_good", LastKnownGoodStore())
+    monkeypatch.setattr(cms_client_module, "cms_breaker", CircuitBreaker("test", failure_threshold=2))
+    monkeypatch.setattr(cms_client_module, "cms_flights", SingleFlight())
+    return flaky
+
+
+def test_failures_fall_back_to_last_known_good_and_open_circuit_skips_upstream(cms):
+    async def run():
+        # Not a cached endpoint, so every call goes upstream while it can
+        fresh = await cms_client_module.fetch_from_cms("conditions/asthma")
+        cms.up = False
+        during_failures = [await cms_client_module.fetch_from_cms("conditions/asthma") for _ in range(2)]
+        calls_when_opened = cms.calls
+        while_open = await cms_client_module.fetch_from_cms("conditions/asthma")
+        return fresh, during_failures, calls_when_opened, while_open
+
+    fresh, during_failures, calls_when_opened, while_open = asyncio.run(run())
+    assert during_failures == [fresh, fresh]
+    assert cms_client_module.cms_breaker.state == CircuitBreaker.OPEN
+    assert while_open == fresh
+    assert cms.calls == calls_when_opened
+    assert cms_client_module.last_known_good.stats()["served"] == 3
+
+
+def test_failure_without_last_known_good_is_an_error(cms):
+    cms.up = False
+
+    async def run():
+        with pytest.raises(HTTPException) as failure:
+            await cms_client_module.fetch_from_cms("conditions/asthma")
+        assert failure.value.status_code == 503
+        with pytest.raises(HTTPException):
+            await cms_client_module.fetch_from_cms("conditions/asthma")
+        # Open now: rejected without calling the CMS
+        with pytest.raises(HTTPException) as rejected:
+            await cms_client_module.fetch_from_cms("conditions/asthma")
+        assert rejected.value.detail == "Service unavailable: CMS circuit open."
+
+    asyncio.run(run())
+    assert cms.calls == 2
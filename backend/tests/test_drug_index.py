@@ -0,0 +1,130 @@
+import asyncio
+
+import drug_index as drug_index_module
+from drug_index import DrugIndex
+
+
+class FakeCMS:
+    """
+    Drug pages served the way the Wagtail v2 pages endpoint pages them
+    """
+
+    def __init__(self, pages):
+        self.pages = {page["id"]: page for page in pages}
+        self.requests = []
+
+    async def fetch(self, endpoint, params):
+        self.requests.append(params)
+        key = "last_published_at" if params["order"].lstrip("-") == "last_published_at" else "id"
+        items = sorted(self.pages.values(), key=lambda page: page[key], reverse=params["order"].startswith("-"))
+        window = items[params["offset"]:params["offset"] + params["limit"]]
+        if params["fields"] == drug_index_module.DRUG_ID_FIELDS:
+            window = [{"id": page["id"]} for page in window]
+        return {"meta": {"total_count": len(items)}, "items": window}
+
+
+def drug(page_id, title, published):
+    return {
+        "id": page_id, "slug": title.lower(), "title": title, "generic_name": "", "brand_names": "",
+        "drug_class": "", "last_published_at": f"2026-10-{published:02d}T00:00:00+00:00",
+    }
+
+
+def titles(index):
+    return [entry["title"] for entry in index._entries.values()]
+
+
+def test_unpublish_event_drops_the_drug_without_listing_ids(monkeypatch):
+    cms = FakeCMS([drug(1, "Aspirin", 1), drug(2, "Ibuprofen", 2)])
+    monkeypatch.setattr(drug_index_module, "fetch_uncached", cms.fetch)
+
+    async def run():
+        index = DrugIndex()
+        await index.sync()
+
+        # Same count as before, different pages
+        del cms.pages[1]
+        index.remove(1)
+        cms.pages[3] = drug(3, "Naproxen", 3)
+        cms.requests.clear()
+        await index.sync()
+
+        assert sorted(titles(index)) == ["Ibuprofen", "Naproxen"]
+        assert index.stats()["full_builds"] == 1
+        assert [params["fields"] for params in cms.requests] == [drug_index_module.DRUG_INDEX_FIELDS]
+        body, _ = await index.get_letter("A")
+        assert body == b"[]"
+
+    asyncio.run(run())
+
+
+def test_periodic_id_scan_catches_what_the_count_cannot(monkeypatch):
+    cms = FakeCMS([drug(1, "Aspirin", 5), drug(2, "Ibuprofen", 6)])
+    monkeypatch.setattr(drug_index_module, "fetch_uncached", cms.fetch)
+
+    async def run():
+        index = DrugIndex()
+        await index.sync()
+
+        # Unpublished without an event, and a page older than the newest seen
+        # takes its place, so the count still matches
+        del cms.pages[1]
+        cms.pages[3] = drug(3, "Codeine", 1)
+        await index.sync()
+        assert sorted(titles(index)) == ["Aspirin", "Ibuprofen"]
+
+        monkeypatch.setattr(drug_index_module, "DRUG_INDEX_ID_SCAN_INTERVAL", 0)
+        await index.sync()
+        assert sorted(titles(index)) == ["Codeine", "Ibuprofen"]
+
+    asyncio.run(run())
+
+
+def test_count_mismatch_lists_ids_at_once(monkeypatch):
+    cms = FakeCMS([drug(1, "Aspirin", 1), drug(2, "Ibuprofen", 2)])
+    monkeypatch.setattr(drug_index_module, "fetch_uncached", cms.fetch)
+
+    async def run():
+        index = DrugIndex()
+        await index.sync()
+        # Deleted without an event
+        del cms.pages[1]
+        await index.sync()
+
+        assert titles(index) == ["Ibuprofen"]
+
+    asyncio.run(run())
+
+
+def test_missing_older_page_falls_back_to_full_build(monkeypatch):
+    cms = FakeCMS([drug(1, "Aspirin", 5)])
+    monkeypatch.setattr(drug_index_module, "fetch_uncached", cms.fetch)
+
+    async def run():
+        index = DrugIndex()
+        await index.sync()
+        # Published before the newest page the index has seen
+        cms.pages[2] = drug(2, "Codeine", 1)
+        await index.sync()
+
+        assert sorted(titles(index)) == ["Aspirin", "Codeine"]
+        assert index.stats()["full_builds"] == 2
+
+    asyncio.run(run())
+
+
+def test_unpublish_event_reaches_the_index(monkeypatch):
+    import routers.events as events_module
+
+    cms = FakeCMS([drug(1, "Aspirin", 1)])
+    monkeypatch.setattr(drug_index_module, "fetch_uncached", cms.fetch)
+    index = DrugIndex()
+    monkeypatch.setattr(events_module, "drug_index", index)
+
+    async def run():
+        await index.sync()
+        await events_module.evict_for_event({"type": "drug", "action": "unpublished", "id": 1, "slug": "aspirin"})
+
+    asyncio.run(run())
+    assert titles(index) == []
+    assert index.version == 2
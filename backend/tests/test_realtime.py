@@ -0,0 +1,140 @@
+import asyncio
+from unittest import mock
+
+import socketio
+
+import realtime
+
+
+class FakeQueue:
+    def __init__(self, depth: int = 0):
+        self.depth = depth
+
+    def qsize(self) -> int:
+        return self.depth
+
+
+async def make_server(manager):
+    """
+    Socket.IO server around the manager that records packets instead of
+    sending them and starts listening on the pub/sub backend at once
+    """
+    server = socketio.AsyncServer(async_mode="asgi", client_manager=manager)
+    server.sent = []
+
+    async def send_eio_packet(eio_sid, eio_packet):
+        server.sent.append((eio_sid, eio_packet.data))
+
+    server._send_eio_packet = send_eio_packet
+    server.disconnect = mock.AsyncMock()
+    realtime.start(server)
+    return server
+
+
+async def connect(server, eio_sid: str, depth: int = 0) -> str:
+    server.eio.sockets[eio_sid] = mock.Mock(queue=FakeQueue(depth))
+    return await server.manager.connect(eio_sid, "/")
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def recipients(server):
+    return [eio_sid for eio_sid, _ in server.sent]
+
+
+def test_memory_emit_reaches_other_manager():
+    async def run():
+        broker = realtime.InMemoryBroker()
+        sender = await make_server(realtime.InMemoryManager(broker=broker))
+        receiver = await make_server(realtime.InMemoryManager(broker=broker))
+        hook_calls = []
+        receiver.manager.add_hook("content_updated", hook_calls.append)
+        await connect(receiver, "remote")
+        await asyncio.sleep(0)
+
+        await sender.emit("content_updated", {"id": 1})
+
+        await wait_for(lambda: recipients(receiver) == ["remote"])
+        assert hook_calls == [{"id": 1}]
+        assert sender.sent == []
+
+    asyncio.run(run())
+
+
+def test_broker_emit_reaches_other_manager():
+    async def run():
+        broker = await realtime.start_broker("127.0.0.1", 0)
+        port = broker.sockets[0].getsockname()[1]
+        try:
+            sender = await make_server(realtime.BrokerManager(host="127.0.0.1", port=port))
+            receiver = await make_server(realtime.BrokerManager(host="127.0.0.1", port=port))
+            await connect(sender, "local")
+            await connect(receiver, "remote")
+            # Both listeners must be connected to the broker before the emit
+            await asyncio.sleep(0.2)
+
+            await sender.emit("content_updated", {"id": 2})
+
+            await wait_for(lambda: recipients(receiver) == ["remote"])
+            await wait_for(lambda: recipients(sender) == ["local"])
+            assert recipients(receiver) == ["remote"]
+        finally:
+            broker.close()
+
+    asyncio.run(run())
+
+
+def test_full_queue_drops_event_for_that_client_only():
+    async def run():
+        server = await make_server(realtime.InMemoryManager(broker=realtime.InMemoryBroker()))
+        await connect(server, "slow", depth=realtime.SOCKETIO_CLIENT_QUEUE_LIMIT)
+        await connect(server, "fast")
+
+        await server.emit("content_updated", {"id": 3})
+
+        assert recipients(server) == ["fast"]
+        assert server.manager.stats()["dropped"] == 1
+        server.disconnect.assert_not_called()
+
+    asyncio.run(run())
+
+
+def test_client_that_keeps_falling_behind_is_disconnected():
+    async def run():
+        server = await make_server(realtime.InMemoryManager(broker=realtime.InMemoryBroker()))
+        slow_sid = await connect(server, "slow", depth=realtime.SOCKETIO_CLIENT_QUEUE_LIMIT)
+
+        with mock.patch.object(realtime, "SOCKETIO_SLOW_CLIENT_DROPS", 3):
+            for event_id in range(3):
+                await server.emit("content_updated", {"id": event_id})
+        await asyncio.sleep(0)
+
+        server.disconnect.assert_awaited_once_with(slow_sid, namespace="/", ignore_queue=True)
+        assert server.manager.stats()["slow_disconnects"] == 1
+        assert server.sent == []
+
+    asyncio.run(run())
+
+
+def test_client_that_catches_up_is_not_disconnected():
+    async def run():
+        server = await make_server(realtime.InMemoryManager(broker=realtime.InMemoryBroker()))
+        await connect(server, "bursty", depth=realtime.SOCKETIO_CLIENT_QUEUE_LIMIT)
+        queue = server.eio.sockets["bursty"].queue
+
+        with mock.patch.object(realtime, "SOCKETIO_SLOW_CLIENT_DROPS", 3):
+            for event_id in range(4):
+                # Drained once after two drops, so the drops never reach three in a row
+                queue.depth = 0 if event_id == 2 else realtime.SOCKETIO_CLIENT_QUEUE_LIMIT
+                await server.emit("content_updated", {"id": event_id})
+
+        server.disconnect.assert_not_called()
+        assert recipients(server) == ["bursty"]
+        assert server.manager.stats()["dropped"] == 3
+
+    asyncio.run(run())
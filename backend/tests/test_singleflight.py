@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*[flights.do("key", work) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert len(calls) == 1
+    assert (flights.started, flights.shared) == (1, 4)
+    assert not flights.in_flight("key")
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight()
+    calls = []
+
+    async def work(key):
+        calls.append(key)
+        await asyncio.sleep(0)
+        return key
+
+    async def run():
+        return await asyncio.gather(flights.do("a", lambda: work("a")), flights.do("b", lambda: work("b")))
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_error_reaches_every_waiting_caller_and_is_not_kept():
+    flights = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def succeeding():
+        return "recovered"
+
+    async def run():
+        results = await asyncio.gather(*[flights.do("key", failing) for _ in range(3)], return_exceptions=True)
+        # The failure is not cached; the next call starts new work
+        return results, await flights.do("key", succeeding)
+
+    results, after = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert after == "recovered"
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run():
+        first = asyncio.create_task(flights.do("key", work))
+        second = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "value"
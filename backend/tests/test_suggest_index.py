@@ -0,0 +1,68 @@
+import asyncio
+
+import suggest_index as suggest_index_module
+from suggest_index import SuggestIndex, normalize
+
+CORPUS = [
+    {"type": "condition", "id": 1, "title": "High blood pressure", "slug": "hypertension", "popularity": 5,
+     "names": {"en": ["High blood pressure", "Hypertension"], "hi": ["उच्च रक्तचाप"]}},
+    {"type": "condition", "id": 2, "title": "Hay fever", "slug": "hay-fever", "popularity": 50,
+     "names": {"en": ["Hay fever"], "hi": ["\u0939\u0947 \u095e\u0940\u0935\u0930"]}},
+    {"type": "drug", "id": 3, "title": "Hydralazine", "slug": "hydralazine", "popularity": 1,
+     "names": {"en": ["Hydralazine"], "hi": []}},
+    {"type": "article", "id": 4, "title": "Pressure sores", "slug": "pressure-sores", "popularity": 0,
+     "names": {"en": ["Pressure sores"], "hi": []}},
+]
+
+
+def built_index(monkeypatch):
+    async def fetch(endpoint, params=None):
+        return CORPUS
+
+    monkeypatch.setattr(suggest_index_module, "fetch_uncached", fetch)
+    index = SuggestIndex()
+    asyncio.run(index.sync())
+    return index
+
+
+def texts(suggestions):
+    return [suggestion["text"] for suggestion in suggestions]
+
+
+def test_short_prefix_is_ranked_by_popularity_with_one_result_per_page(monkeypatch):
+    index = built_index(monkeypatch)
+    # "High blood pressure" and "Hypertension" both match; the page appears once, under its title
+    assert texts(index.lookup("H", 8, ("condition",))) == ["Hay fever", "High blood pressure"]
+    # Page titles come before other names of a page, whatever the popularity
+    assert texts(index.lookup("hy", 8, ("condition", "drug"))) == ["Hydralazine", "Hypertension"]
+
+
+def test_short_prefix_respects_types(monkeypatch):
+    index = built_index(monkeypatch)
+    assert texts(index.lookup("hy", 8, ("drug",))) == ["Hydralazine"]
+
+
+def test_longer_prefix_matches_later_words_after_full_names(monkeypatch):
+    index = built_index(monkeypatch)
+    suggestions = index.lookup("pressu", 8, suggest_index_module.SUGGEST_TYPES)
+    assert [(item["slug"], item["text"]) for item in suggestions] == [
+        ("pressure-sores", "Pressure sores"),
+        ("hypertension", "High blood pressure"),
+    ]
+
+
+def test_devanagari_prefixes_match_whole_names_and_later_words(monkeypatch):
+    index = built_index(monkeypatch)
+    # Short prefix, ranked ahead of time
+    assert [(item["text"], item["lang"]) for item in index.lookup("उच", 8, ("condition",))] == [
+        ("उच्च रक्तचाप", "hi"),
+    ]
+    # Longer prefix of the second word, vowel signs and virama included
+    assert texts(index.lookup("रक्तचा", 8, ("condition",))) == ["उच्च रक्तचाप"]
+
+
+def test_nukta_typed_separately_matches_the_precomposed_letter(monkeypatch):
+    index = built_index(monkeypatch)
+    # The name has precomposed U+095E; here it is typed as U+092B and the nukta sign U+093C
+    for typed in ("\u092b\u093c\u0940", "\u092b\u093c\u0940\u0935"):
+        assert [item["slug"] for item in index.lookup(typed, 8, ("condition",))] == ["hay-fever"]
@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+from fastapi import FastAPI, HTTPException
+
+import warmup as warmup_module
+from warmup import AccessStats, Warmup
+
+
+def test_workers_merge_their_counts(tmp_path):
+    filename = str(tmp_path / "warmup-stats.json")
+    first, second = AccessStats(filename), AccessStats(filename)
+    for _ in range(3):
+        first.record("/api/conditions/asthma")
+    second.record("/api/drugs/index")
+    second.record("/api/conditions/asthma")
+
+    first.save()
+    second.save()
+
+    with open(filename) as stats_file:
+        counts = json.load(stats_file)["counts"]
+    assert counts == {"/api/conditions/asthma": 4, "/api/drugs/index": 1}
+    assert AccessStats(filename).load() == ["/api/conditions/asthma", "/api/drugs/index"]
+
+
+def test_counts_of_earlier_runs_decay(tmp_path):
+    filename = str(tmp_path / "warmup-stats.json")
+    with open(filename, "w") as stats_file:
+        json.dump({"saved_at": 0, "counts": {"/api/old": 10}}, stats_file)
+    stats = AccessStats(filename)
+    stats.record("/api/new")
+    stats.save()
+
+    with open(filename) as stats_file:
+        assert json.load(stats_file)["counts"] == {"/api/old": 10 * warmup_module.ACCESS_STATS_DECAY, "/api/new": 1}
+
+
+def make_app(healthy):
+    app = FastAPI()
+
+    @app.get("/api/hot")
+    async def hot():
+        if not healthy[0]:
+            raise HTTPException(status_code=503)
+        return {}
+
+    @app.get("/api/gone")
+    async def gone():
+        raise HTTPException(status_code=404)
+
+    return app
+
+
+def test_not_ready_until_something_warms_up(monkeypatch):
+    monkeypatch.setattr(warmup_module, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(warmup_module, "WARMUP_RETRY_INTERVAL", 0.05)
+    healthy = [False]
+
+    async def run():
+        warmup = Warmup()
+        warmup.start(make_app(healthy), ["/api/hot", "/api/gone"])
+        await asyncio.sleep(0.2)
+        assert not warmup.ready
+
+        healthy[0] = True
+        await asyncio.wait_for(warmup._task, 1)
+        assert warmup.ready
+        assert warmup.stats()["resources"] == {"/api/hot": "200", "/api/gone": "404"}
+
+    asyncio.run(run())
@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import fcntl
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+
+# Gateway paths requested at startup, before the worker reports ready
+WARMUP_PATHS = [
+    path.strip() for path in os.getenv(
+        "WARMUP_PATHS",
+        "/api/articles/top-stories,/api/articles/health-topics,/api/articles/paths,"
+        "/api/conditions/index,/api/conditions/paths,/api/drugs/index,/api/well-being,/api/suggest?q=a",
+    ).split(",") if path.strip()
+]
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", 8))
+
+# Seconds after which a warm-up attempt stops waiting; the worker reports ready
+# if anything was warmed by then, so one slow resource cannot keep it out of
+# rotation
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", 30))
+
+# Seconds between warm-up attempts while every warm-up request fails, during
+# which the worker stays not ready
+WARMUP_RETRY_INTERVAL = float(os.getenv("WARMUP_RETRY_INTERVAL", 5))
+
+# File holding the most requested paths of previous runs, which are warmed up
+# along with WARMUP_PATHS; unset to not record access statistics
+WARMUP_STATS_FILE = os.getenv("WARMUP_STATS_FILE", "")
+WARMUP_STATS_TOP = int(os.getenv("WARMUP_STATS_TOP", 50))
+
+# Distinct paths counted per worker, and kept in the stats file; further new
+# paths are not counted
+ACCESS_STATS_MAX_PATHS = 10000
+
+# Weight of the counts saved by previous runs when this run's are merged in,
+# so paths that stopped being hot age out
+ACCESS_STATS_DECAY = 0.5
+
+# Probes and monitoring, never worth warming up
+ACCESS_STATS_EXCLUDE = {"/api/health", "/api/ready", "/api/metrics", "/api/cache/stats"}
+
+# Marks the warm-up's own requests
+WARMUP_HEADER = b"x-gateway-warmup"
+
+
+class AccessStats:
+    """
+    Request counts of successful GET /api paths, saved on shutdown so the next
+    start can warm up what was actually hot.
+
+    Every worker merges its counts into the shared file under a lock, so the
+    file holds the traffic of all workers rather than of whichever exited
+    last. Counts from earlier runs are decayed as this run's are added.
+    """
+
+    def __init__(self, filename: str = WARMUP_STATS_FILE):
+        self.filename = filename
+        self._counts: Dict[str, int] = {}
+        self._started_at = time.time()
+
+    def record(self, path: str):
+        count = self._counts.get(path)
+        if count is not None:
+            self._counts[path] = count + 1
+        elif len(self._counts) < ACCESS_STATS_MAX_PATHS:
+            self._counts[path] = 1
+
+    def top(self, limit: int = WARMUP_STATS_TOP) -> List[str]:
+        return sorted(self._counts, key=self._counts.get, reverse=True)[:limit]
+
+    def _read(self) -> dict:
+        try:
+            with open(self.filename) as stats_file:
+                saved = json.load(stats_file)
+        except FileNotFoundError:
+            return {}
+        counts = saved.get("counts")
+        if counts is None:
+            # Files written before counts were kept list the top paths in order
+            paths = [path for path in saved.get("paths", []) if isinstance(path, str)]
+            counts = {path: len(paths) - rank for rank, path in enumerate(paths)}
+        if not isinstance(counts, dict):
+            return {}
+        return {
+            "saved_at": saved.get("saved_at", 0),
+            "counts": {path: count for path, count in counts.items() if isinstance(count, (int, float))},
+        }
+
+    def load(self, limit: int = WARMUP_STATS_TOP) -> List[str]:
+        """
+        Most requested paths saved by the workers of previous runs, if any
+        """
+        if not self.filename:
+            return []
+        try:
+            counts = self._read().get("counts", {})
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Could not read warm-up stats from {self.filename}: {exc}")
+            return []
+        return sorted(counts, key=counts.get, reverse=True)[:limit]
+
+    def save(self):
+        """
+        Merge this worker's counts into the stats file
+        """
+        if not self.filename or not self._counts:
+            return
+        temporary = f"{self.filename}.{os.getpid()}.tmp"
+        try:
+            # Workers shut down together; the lock keeps their merges from
+            # overwriting each other, and the rename means readers never see
+            # a partial file
+            with open(f"{self.filename}.lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    saved = self._read()
+                except ValueError:
+                    saved = {}
+                counts = saved.get("counts", {})
+                if saved.get("saved_at", 0) < self._started_at:
+                    # Saved by an earlier run, not by another worker of this one
+                    counts = {path: count * ACCESS_STATS_DECAY for path, count in counts.items()}
+                for path, count in self._counts.items():
+                    counts[path] = counts.get(path, 0) + count
+                kept = sorted(counts, key=counts.get, reverse=True)[:ACCESS_STATS_MAX_PATHS]
+                with open(temporary, "w") as stats_file:
+                    json.dump({"saved_at": time.time(), "counts": {path: counts[path] for path in kept}}, stats_file)
+                os.replace(temporary, self.filename)
+        except OSError as exc:
+            logger.warning(f"Could not save warm-up stats to {self.filename}: {exc}")
+
+
+class AccessStatsMiddleware:
+    """
+    Count successful GET requests under /api in access_stats, leaving out the
+    warm-up's own requests
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith("/api/")
+                or scope["path"] in ACCESS_STATS_EXCLUDE or (WARMUP_HEADER, b"1") in scope.get("headers", ())):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                query = scope.get("query_string", b"")
+                access_stats.record(scope["path"] + ("?" + query.decode("latin-1") if query else ""))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class Warmup:
+    """
+    Request the hot resources through the app itself when a worker starts, so
+    the response cache, encoded bodies and drugs index are filled before the
+    worker is reported ready.
+    """
+
+    def __init__(self):
+        self.ready = not WARMUP_ENABLED
+        self.results: Dict[str, str] = {}
+        self.duration: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, app, paths: List[str]):
+        if not WARMUP_ENABLED:
+            return
+        self._task = asyncio.create_task(self._run(app, paths))
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self, app, paths: List[str]):
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(WARMUP_CONCURRENCY)
+        transport = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://warmup", headers={WARMUP_HEADER.decode(): "1"}
+        ) as client:
+            async def fetch(path):
+                async with semaphore:
+                    try:
+                        response = await client.get(path)
+                        self.results[path] = str(response.status_code)
+                    except Exception as exc:
+                        self.results[path] = f"error: {exc}"
+
+            while True:
+                self.results = {}
+                try:
+                    await asyncio.wait_for(asyncio.gather(*[fetch(path) for path in paths]), WARMUP_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Warm-up incomplete after {WARMUP_TIMEOUT}s")
+
+                for path in paths:
+                    self.results.setdefault(path, "timed out")
+                failed = {path: result for path, result in self.results.items() if result != "200"}
+                if failed:
+                    logger.warning(
+                        f"Warm-up failed for {len(failed)}/{len(paths)} resources: "
+                        + ", ".join(f"{path} ({result})" for path, result in failed.items())
+                    )
+                if not paths or len(failed) < len(paths):
+                    break
+                logger.warning(f"Nothing warmed up, staying not ready and retrying in {WARMUP_RETRY_INTERVAL}s")
+                await asyncio.sleep(WARMUP_RETRY_INTERVAL)
+
+        self.duration = time.monotonic() - started
+        self.ready = True
+        logger.info(f"Warmed up {len(paths) - len(failed)}/{len(paths)} resources in {self.duration:.2f}s")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": WARMUP_ENABLED,
+            "ready": self.ready,
+            "duration": round(self.duration, 3) if self.duration is not None else None,
+            "resources": self.results,
+        }
+
+
+def warmup_paths() -> List[str]:
+    """
+    Configured hot paths followed by the most requested paths of the last run
+    """
+    paths = list(WARMUP_PATHS)
+    for path in access_stats.load():
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+access_stats = AccessStats()
+warmup = Warmup()
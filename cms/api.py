@@ -9,6 +9,7 @@ from articles.models import ArticlePage, ArticleCategory, ArticleAuthor
 from conditions.models import ConditionPage, ConditionCategory
 from drugs.models import DrugPage
 from news.models import NewsPage
+from api.view_counts import view_counter
 
 api_router = WagtailAPIRouter('wagtailapi')
 
@@ -134,7 +135,7 @@ def article_detail(request, slug):
         raise Http404("Article not found")
     
     # Record the view
-    article.increase_view_count()
+    view_counter.record(ArticlePage, article.id)
     
     # Prepare the response
     data = {
@@ -226,7 +227,7 @@ def condition_detail(request, slug):
         raise Http404("Condition not found")
     
     # Record the view
-    condition.increase_view_count()
+    view_counter.record(ConditionPage, condition.id)
     
     # Prepare the response
     data = {
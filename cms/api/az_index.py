@@ -0,0 +1,143 @@
+import string
+import threading
+import time
+from bisect import bisect_left
+
+from django.db.models import Count, Max
+from wagtail.models import Site
+
+LETTERS = string.ascii_uppercase
+
+# Seconds between checks that the index still matches the database. Publishing
+# in this process drops the index at once (see api.signals); the check catches
+# publishes handled by other worker processes.
+AZ_INDEX_CHECK_INTERVAL = 5
+
+
+class AlphabeticalIndex:
+    """
+    Live pages of one model, sorted by title once and kept in memory.
+
+    Rows are plain dicts, so templates and JSON views can both use them
+    without touching the page objects. Letter buckets are slices of the sorted
+    rows found in a single pass, and prefix lookups bisect the sorted keys, so
+    serving a letter or a prefix costs O(log n + matches) instead of a scan.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self._lock = threading.Lock()
+        self._rows = []
+        self._keys = []
+        self._buckets = {}
+        self._state = None
+        self._checked_at = None
+        self.builds = 0
+
+    def _current_state(self):
+        state = self.model.objects.live().aggregate(latest=Max('last_published_at'), count=Count('id'))
+        return state['latest'], state['count']
+
+    def _build(self, state):
+        pages = self.model.objects.live()
+        root_paths = Site.get_site_root_paths()
+
+        rows = []
+        for page in pages:
+            # Share one site lookup across every page instead of one per url
+            page._wagtail_cached_site_root_paths = root_paths
+            row = {'id': page.id, 'title': page.title, 'slug': page.slug, 'url': page.url}
+            for field in self.fields:
+                row[field] = getattr(page, field)
+            rows.append(row)
+        rows.sort(key=lambda row: (row['title'].upper(), row['id']))
+
+        keys = [row['title'].upper() for row in rows]
+        buckets = {letter: (0, 0) for letter in LETTERS}
+        start = 0
+        for position in range(1, len(keys) + 1):
+            if position == len(keys) or keys[position][:1] != keys[start][:1]:
+                letter = keys[start][:1]
+                if letter in buckets:
+                    buckets[letter] = (start, position)
+                start = position
+
+        self._rows, self._keys, self._buckets = rows, keys, buckets
+        self._state = state
+        self.builds += 1
+
+    def _ensure_current(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < AZ_INDEX_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < AZ_INDEX_CHECK_INTERVAL:
+                return
+            state = self._current_state()
+            if state != self._state:
+                self._build(state)
+            self._checked_at = now
+
+    def invalidate(self):
+        """Rebuild on next use; called when a page of this model is published or removed"""
+        with self._lock:
+            self._state = None
+            self._checked_at = None
+
+    def rows(self):
+        self._ensure_current()
+        return self._rows
+
+    def letter(self, letter):
+        self._ensure_current()
+        start, end = self._buckets.get(letter.upper(), (0, 0))
+        return self._rows[start:end]
+
+    def by_letter(self):
+        self._ensure_current()
+        return {letter: self._rows[start:end] for letter, (start, end) in self._buckets.items()}
+
+    def letter_counts(self):
+        self._ensure_current()
+        return {letter: end - start for letter, (start, end) in self._buckets.items()}
+
+    def prefix(self, prefix, limit=None):
+        self._ensure_current()
+        prefix = prefix.upper()
+        if not prefix:
+            return []
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix + '\uffff', lo=start)
+        if limit is not None:
+            end = min(end, start + limit)
+        return self._rows[start:end]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _get_index(name, model, fields):
+    index = _indexes.get(name)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(name, AlphabeticalIndex(model, fields))
+    return index
+
+
+def drug_index():
+    from drugs.models import DrugPage
+    return _get_index('drugs', DrugPage, ('generic_name', 'brand_names', 'drug_class'))
+
+
+def condition_index():
+    from conditions.models import ConditionPage
+    return _get_index('conditions', ConditionPage, ('subtitle',))
+
+
+def invalidate(model):
+    """Drop the index built from the given page model, if there is one"""
+    for index in list(_indexes.values()):
+        if issubclass(model, index.model):
+            index.invalidate()
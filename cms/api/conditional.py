@@ -0,0 +1,130 @@
+import hashlib
+from functools import wraps
+from urllib.parse import unquote
+
+from django.db.models import Count, Max, Q
+from django.views.decorators.http import condition
+
+
+def _digest(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def collection_state(request, models):
+    """
+    Latest last_published_at and live count of each model, read once per request
+    """
+    states = request.__dict__.setdefault('_collection_states', {})
+    if models not in states:
+        states[models] = [
+            model.objects.live().aggregate(latest=Max('last_published_at'), count=Count('id'))
+            for model in models
+        ]
+    return states[models]
+
+
+def collection_version(request, *models):
+    """
+    Digest that changes whenever a page of the models is published, unpublished or deleted
+    """
+    parts = []
+    for model_state in collection_state(request, models):
+        parts += [model_state['count'], model_state['latest']]
+    return _digest(*parts)
+
+
+def collection_condition(*models):
+    """
+    Conditional GET for views that list live pages of the given models.
+
+    The ETag changes whenever a page of those types is published, unpublished
+    or deleted (latest last_published_at and live count), and with the query
+    string so each language/filter variant gets its own validator.
+    """
+    def etag(request, *args, **kwargs):
+        return _digest(request.path, request.GET.urlencode(), collection_version(request, *models))
+
+    def last_modified(request, *args, **kwargs):
+        latest = [model_state['latest'] for model_state in collection_state(request, models) if model_state['latest']]
+        return max(latest) if latest else None
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def neighbour_condition(model):
+    """
+    Conditional GET for views that list the precomputed neighbours of one page.
+
+    model is the neighbour table (article, related, computed_at). The
+    validator is read from the requested page's own rows only: their latest
+    computed_at, and the count and latest last_published_at of the live
+    neighbours. It changes when the neighbours are recomputed or one of them
+    is republished or unpublished, without aggregating the whole table.
+    """
+    def lookup(request, slug):
+        if not hasattr(request, '_neighbour_state'):
+            request._neighbour_state = model.objects.filter(
+                article__slug=slug, article__live=True, related__live=True,
+            ).aggregate(
+                computed=Max('computed_at'), published=Max('related__last_published_at'), count=Count('id'),
+            )
+        return request._neighbour_state
+
+    def etag(request, slug, *args, **kwargs):
+        state = lookup(request, slug)
+        return _digest(request.path, request.GET.urlencode(), state['count'], state['computed'], state['published'])
+
+    def last_modified(request, slug, *args, **kwargs):
+        state = lookup(request, slug)
+        latest = [value for value in (state['computed'], state['published']) if value]
+        return max(latest) if latest else None
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def page_condition(model, slug_fields=('slug',), on_view=None):
+    """
+    Conditional GET for views that return a single live page looked up by slug.
+
+    The ETag is built from the page id and last_published_at, so it only
+    changes when that page is republished. A 304 never reaches the view, so
+    on_view(model, page_id), when given, is called here for every request
+    answered with the page, whether in full or as Not Modified.
+    """
+    def lookup(request, slug):
+        if not hasattr(request, '_page_state'):
+            decoded_slug = unquote(slug.strip('/'))
+            query = Q()
+            for field in slug_fields:
+                query |= Q(**{field: decoded_slug})
+            request._page_state = model.objects.live().filter(query).values_list(
+                'id', 'last_published_at'
+            ).first()
+        return request._page_state
+
+    def etag(request, slug, *args, **kwargs):
+        page_state = lookup(request, slug)
+        if page_state is None:
+            return None
+        return _digest(request.path, request.GET.urlencode(), *page_state)
+
+    def last_modified(request, slug, *args, **kwargs):
+        page_state = lookup(request, slug)
+        return page_state[1] if page_state else None
+
+    conditional = condition(etag_func=etag, last_modified_func=last_modified)
+    if on_view is None:
+        return conditional
+
+    def decorator(view):
+        conditional_view = conditional(view)
+
+        @wraps(view)
+        def wrapper(request, slug, *args, **kwargs):
+            response = conditional_view(request, slug, *args, **kwargs)
+            page_state = lookup(request, slug)
+            if page_state is not None and response.status_code in (200, 304):
+                on_view(model, page_state[0])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,80 @@
+import hashlib
+import hmac
+import json
+import logging
+import queue
+import threading
+import urllib.request
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for the gateway before giving up on an event
+GATEWAY_EVENTS_TIMEOUT = 2
+
+# Events waiting to be sent; beyond this, new events are dropped and clients
+# fall back to the cache TTLs
+GATEWAY_EVENTS_QUEUE_SIZE = 1000
+
+_queue = queue.Queue(maxsize=GATEWAY_EVENTS_QUEUE_SIZE)
+_sender = None
+_sender_lock = threading.Lock()
+
+
+def sign(body):
+    """HMAC-SHA256 signature of an event body with the shared gateway secret"""
+    digest = hmac.new(settings.GATEWAY_EVENTS_SECRET.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return f'sha256={digest}'
+
+
+def _post(event):
+    body = json.dumps(event, separators=(',', ':')).encode('utf-8')
+    request = urllib.request.Request(
+        settings.GATEWAY_EVENTS_URL,
+        data=body,
+        headers={'Content-Type': 'application/json', 'X-Events-Signature': sign(body)},
+        method='POST',
+    )
+    with urllib.request.urlopen(request, timeout=GATEWAY_EVENTS_TIMEOUT) as response:
+        response.read()
+
+
+def _send_forever():
+    while True:
+        event = _queue.get()
+        try:
+            _post(event)
+        except Exception as exc:
+            logger.warning(f"Could not send {event['action']} event for {event['type']} {event['id']} to the gateway: {exc}")
+
+
+def _ensure_sender():
+    global _sender
+    with _sender_lock:
+        if _sender is None or not _sender.is_alive():
+            _sender = threading.Thread(target=_send_forever, name='gateway-events', daemon=True)
+            _sender.start()
+
+
+def send_content_event(content_type, page, action):
+    """
+    Queue a compact change event for the gateway.
+
+    Sent from a background thread so publishing never waits on the gateway.
+    """
+    if not settings.GATEWAY_EVENTS_URL or not settings.GATEWAY_EVENTS_SECRET:
+        return
+    event = {
+        'type': content_type,
+        'id': page.id,
+        'slug': page.slug,
+        'version': page.live_revision_id or page.latest_revision_id,
+        'action': action,
+    }
+    try:
+        _queue.put_nowait(event)
+    except queue.Full:
+        logger.warning(f"Gateway event queue full, dropping {action} event for {content_type} {page.id}")
+        return
+    _ensure_sender()
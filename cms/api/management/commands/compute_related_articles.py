@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.related_articles import rebuild_related_articles
+
+
+class Command(BaseCommand):
+    help = 'Recompute the content-similarity neighbours of every live article'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild_related_articles()
+        self.stdout.write(f'Related articles stored for {count} articles in {time.monotonic() - started:.2f}s')
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import sign
+
+
+class Command(BaseCommand):
+    help = 'Print an X-Profile header value that profiles requests for a path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Request path, e.g. /api/articles/some-slug/related')
+        parser.add_argument('--ttl', type=int, default=300, help='Seconds until the token expires')
+
+    def handle(self, *args, **options):
+        if not settings.PROFILING_SECRET:
+            raise CommandError('PROFILING_SECRET is not set')
+        self.stdout.write(sign(options['path'], options['ttl']))
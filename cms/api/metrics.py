@@ -0,0 +1,127 @@
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, disable_created_metrics, generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Upper bounds (seconds) of the request latency buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the queries-per-request buckets; a view that climbs into the
+# top buckets is usually missing a select_related/prefetch_related
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+PROMETHEUS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# Counters are read as totals; the extra *_created series only add scrape weight
+disable_created_metrics()
+
+
+class _StateCollector:
+    """Collector whose metric families are built by a function at scrape time"""
+
+    def __init__(self, build):
+        self.build = build
+
+    def collect(self):
+        return self.build()
+
+
+# Metrics of this process only, without the client library's process defaults
+registry = CollectorRegistry()
+
+
+def add_collector(build):
+    """build() returns metric families read from existing state on each scrape"""
+    registry.register(_StateCollector(build))
+
+
+def render_metrics():
+    return generate_latest(registry)
+
+
+request_duration = Histogram(
+    'cms_http_request_duration_seconds',
+    'Time to serve a CMS request, by view and status',
+    ('method', 'view', 'status'),
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+requests_in_flight = Gauge(
+    'cms_http_requests_in_flight',
+    'CMS requests currently being served',
+    registry=registry,
+)
+db_queries = Counter(
+    'cms_db_queries_total',
+    'Database queries run while serving each view',
+    ('view',),
+    registry=registry,
+)
+db_query_seconds = Counter(
+    'cms_db_query_seconds_total',
+    'Time spent in database queries while serving each view',
+    ('view',),
+    registry=registry,
+)
+db_queries_per_request = Histogram(
+    'cms_db_queries_per_request',
+    'Database queries run by a single request, by view',
+    ('view',),
+    buckets=QUERY_COUNT_BUCKETS,
+    registry=registry,
+)
+
+
+def _collect_az_indexes():
+    from .az_index import _indexes
+
+    builds = CounterMetricFamily('cms_az_index_builds', 'Rebuilds of the in-memory A-Z indexes', labels=('index',))
+    for name, index in list(_indexes.items()):
+        builds.add_metric((name,), index.builds)
+    return [builds]
+
+
+add_collector(_collect_az_indexes)
+
+
+def _collect_symptom_engine():
+    from .symptom_engine import symptom_engine
+
+    stats = symptom_engine.stats()
+    return [
+        GaugeMetricFamily('cms_symptom_engine_conditions', 'Conditions scored by the symptom checker',
+                          value=stats['conditions']),
+        CounterMetricFamily('cms_symptom_engine_builds', 'Full rebuilds of the symptom checker matrix',
+                            value=stats['builds']),
+    ]
+
+
+add_collector(_collect_symptom_engine)
+
+
+def _collect_search_cache():
+    from search.cache import search_cache
+
+    stats = search_cache.stats()
+    lookups = CounterMetricFamily('cms_search_cache_lookups', 'Search result cache lookups', labels=('result',))
+    lookups.add_metric(('hit',), stats['hits'])
+    lookups.add_metric(('miss',), stats['misses'])
+    entries = GaugeMetricFamily('cms_search_cache_entries', 'Pages of search results cached in this process',
+                                value=stats['entries'])
+    return [lookups, entries]
+
+
+add_collector(_collect_search_cache)
+
+
+def _collect_view_counts():
+    from .view_counts import view_counter
+
+    stats = view_counter.stats()
+    return [
+        GaugeMetricFamily('cms_page_views_pending', 'Page views counted but not yet written', value=stats['pending']),
+        CounterMetricFamily('cms_page_views_flushed', 'Page views written to view_count', value=stats['flushed']),
+    ]
+
+
+add_collector(_collect_view_counts)
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from . import metrics
+
+
+class QueryTimer:
+    """Database execute wrapper counting the queries of one request and the time they take"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def _view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Record the latency, status and database queries of every request against
+    the URL name of the view that served it.
+
+    First in MIDDLEWARE so the timings include every other middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        status = 500
+        started = time.perf_counter()
+        metrics.requests_in_flight.inc()
+        try:
+            with connection.execute_wrapper(timer):
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.requests_in_flight.dec()
+            view = _view_label(request)
+            metrics.request_duration.labels(request.method, view, str(status)).observe(elapsed)
+            metrics.db_queries_per_request.labels(view).observe(timer.count)
+            if timer.count:
+                metrics.db_queries.labels(view).inc(timer.count)
+                metrics.db_query_seconds.labels(view).inc(timer.seconds)
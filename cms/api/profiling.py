@@ -0,0 +1,114 @@
+import cProfile
+import hashlib
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# One profile at a time: newer Pythons allow only one active profiler per process
+_profile_lock = threading.Lock()
+
+
+def _digest(expires, path):
+    message = f'{expires}:{path}'.encode('utf-8')
+    return hmac.new(settings.PROFILING_SECRET.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def sign(path, ttl=300):
+    """X-Profile token allowing requests for one path to be profiled until it expires"""
+    expires = str(int(time.time()) + ttl)
+    return f'{expires}.{_digest(expires, path)}'
+
+
+def token_valid(token, path):
+    if not settings.PROFILING_SECRET:
+        return False
+    expires, _, digest = token.partition('.')
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(_digest(expires, path), digest)
+
+
+def _save(profiler, request):
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.monotonic_ns() % 1000000:06d}-{request.method}-{slug[:80]}.prof"
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    filename = os.path.join(settings.PROFILE_DIR, name)
+    profiler.dump_stats(filename)
+    return filename
+
+
+def _report(profiler):
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(settings.PROFILE_INLINE_LIMIT)
+    return output.getvalue()
+
+
+class ProfilingMiddleware:
+    """
+    Profile single requests with cProfile, on demand or by sampling.
+
+    Requests with a valid X-Profile token (`manage.py profile_token <path>`)
+    are profiled, as is a PROFILE_SAMPLE_RATE share of all requests. The
+    profile covers the view and everything it calls, ORM queries and image
+    renditions included. It is saved to PROFILE_DIR, or returned as a text
+    report instead of the response when the request sends
+    `X-Profile-Output: inline`.
+
+    Removed from the middleware chain when neither PROFILING_SECRET nor
+    PROFILE_SAMPLE_RATE is set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_SECRET and not settings.PROFILE_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def _wanted(self, request):
+        """None if the request should not be profiled, else whether the report goes inline"""
+        token = request.headers.get('X-Profile')
+        if token is not None:
+            if token_valid(token, request.path):
+                return request.headers.get('X-Profile-Output') == 'inline'
+            logger.warning(f"Ignoring invalid X-Profile token for {request.path}")
+        if settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+            return False
+        return None
+
+    def __call__(self, request):
+        inline = self._wanted(request)
+        if inline is None or not _profile_lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+                if not response.streaming:
+                    # Lazy template responses render here, inside the profile
+                    response.content
+            finally:
+                profiler.disable()
+        finally:
+            _profile_lock.release()
+
+        if inline:
+            report = HttpResponse(_report(profiler), content_type='text/plain; charset=utf-8')
+            report['X-Profiled-Status'] = str(response.status_code)
+            return report
+
+        filename = _save(profiler, request)
+        logger.info(f"Profiled {request.method} {request.path} ({response.status_code}) to {filename}")
+        return response
@@ -0,0 +1,298 @@
+import logging
+import math
+import queue
+import re
+import threading
+from collections import Counter, defaultdict, namedtuple
+
+import numpy as np
+from django.db import connections, transaction
+from django.db.models import Q
+
+from .symptom_engine import STOPWORDS, plain_text
+
+logger = logging.getLogger(__name__)
+
+# Neighbours stored per article; the endpoints show the first few
+RELATED_ARTICLES_STORED = 6
+
+# How many times each part of an article counts towards its term frequencies
+SECTION_WEIGHTS = {'title': 3, 'tags': 3, 'summary': 2, 'body': 1}
+
+# Terms in more than this share of articles say nothing about similarity,
+# once there are enough articles for the share to mean anything
+MAX_DOCUMENT_SHARE = 0.5
+MIN_DOCUMENT_LIMIT = 10
+
+# Neighbour lists read per query when placing a published article among them
+CANDIDATE_BATCH_SIZE = 500
+
+_WORD = re.compile(r'[a-z][a-z0-9]+')
+
+# Term weights of every live article as a compressed sparse column matrix
+# (the articles using term t are indices[indptr[t]:indptr[t + 1]]), plus each
+# article's own terms and weights to query it with
+Corpus = namedtuple('Corpus', 'ids positions indptr indices data article_terms article_weights')
+
+
+def _words(text):
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def article_documents(page_ids=None):
+    """
+    Term counts of every live article, or of the given ones, title, tags and
+    summary weighted over body text
+    """
+    from articles.models import ArticlePage, ArticlePageTag
+
+    tagged = ArticlePageTag.objects.all()
+    articles = ArticlePage.objects.live()
+    if page_ids is not None:
+        tagged = tagged.filter(content_object_id__in=page_ids)
+        articles = articles.filter(id__in=page_ids)
+
+    tags = defaultdict(list)
+    for page_id, name in tagged.values_list('content_object_id', 'tag__name'):
+        tags[page_id].append(name)
+
+    documents = {}
+    for article in articles.values('id', 'title', 'summary', 'body'):
+        sections = {
+            'title': article['title'],
+            'tags': ' '.join(tags[article['id']]),
+            'summary': article['summary'],
+            'body': plain_text(article['body']),
+        }
+        counts = Counter()
+        for section, text in sections.items():
+            for word in _words(text or ''):
+                counts[word] += SECTION_WEIGHTS[section]
+        documents[article['id']] = counts
+    return documents
+
+
+def build_corpus(documents):
+    """Sublinear tf-idf weights of the documents, rows L2-normalised"""
+    ids = list(documents)
+    document_frequency = Counter(term for counts in documents.values() for term in counts)
+    limit = max(MIN_DOCUMENT_LIMIT, MAX_DOCUMENT_SHARE * len(ids))
+    # Terms of a single article cannot relate it to anything
+    vocabulary = {
+        term: column for column, term in enumerate(
+            term for term, frequency in document_frequency.items() if 1 < frequency <= limit
+        )
+    }
+    idf = {term: math.log((1 + len(ids)) / (1 + document_frequency[term])) + 1 for term in vocabulary}
+
+    columns, rows, weights = [], [], []
+    article_terms, article_weights = [], []
+    for row, page_id in enumerate(ids):
+        terms = [term for term in documents[page_id] if term in vocabulary]
+        row_weights = np.array(
+            [(1 + math.log(documents[page_id][term])) * idf[term] for term in terms], dtype=np.float32,
+        )
+        norm = float(np.sqrt((row_weights * row_weights).sum()))
+        if norm:
+            row_weights /= norm
+        row_columns = np.array([vocabulary[term] for term in terms], dtype=np.int64)
+        article_terms.append(row_columns)
+        article_weights.append(row_weights)
+        columns.extend(row_columns)
+        rows.extend([row] * len(terms))
+        weights.extend(row_weights)
+
+    columns = np.asarray(columns, dtype=np.int64)
+    order = np.argsort(columns, kind='stable')
+    indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(columns, minlength=len(vocabulary)), out=indptr[1:])
+    return Corpus(
+        ids, {page_id: row for row, page_id in enumerate(ids)}, indptr,
+        np.asarray(rows, dtype=np.int64)[order], np.asarray(weights, dtype=np.float32)[order],
+        article_terms, article_weights,
+    )
+
+
+class ArticleDocuments:
+    """
+    Term counts of every live article, kept between publishes.
+
+    Each sync reads only ids and last_published_at, then tokenises just the
+    articles published since the previous sync, so a publish costs one
+    article's body rather than every article's. The tf-idf matrix itself is
+    rebuilt from these counts, since every publish shifts the idf weights,
+    but that is array work on terms already extracted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents = {}
+        self._published = {}
+        self.tokenised = 0
+
+    def current(self):
+        from articles.models import ArticlePage
+
+        with self._lock:
+            published = dict(ArticlePage.objects.live().values_list('id', 'last_published_at'))
+            changed = [
+                page_id for page_id, at in published.items()
+                if page_id not in self._published or self._published[page_id] != at
+            ]
+            for page_id in set(self._documents) - set(published):
+                del self._documents[page_id]
+            if changed:
+                self._documents.update(article_documents(changed))
+            self._published = published
+            self.tokenised += len(changed)
+            return dict(self._documents)
+
+
+live_documents = ArticleDocuments()
+
+
+def similarities(corpus, row):
+    """Cosine similarity of one article to every article, itself excluded"""
+    columns = corpus.article_terms[row]
+    starts = corpus.indptr[columns]
+    lengths = corpus.indptr[columns + 1] - starts
+    offsets = np.cumsum(lengths) - lengths
+    positions = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+    contributions = corpus.data[positions] * np.repeat(corpus.article_weights[row], lengths)
+    scores = np.bincount(corpus.indices[positions], weights=contributions, minlength=len(corpus.ids))
+    scores[row] = 0
+    return scores
+
+
+def nearest(corpus, scores, count=RELATED_ARTICLES_STORED):
+    """The (page id, score) of the best matches, best first"""
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > count:
+        candidates = candidates[np.argpartition(-scores[candidates], count - 1)[:count]]
+    candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return [(corpus.ids[row], float(scores[row])) for row in candidates]
+
+
+def _neighbour_rows(page_id, neighbours):
+    from articles.models import RelatedArticle
+
+    return [
+        RelatedArticle(article_id=page_id, related_id=related_id, rank=rank, score=score)
+        for rank, (related_id, score) in enumerate(neighbours)
+    ]
+
+
+def rebuild_related_articles():
+    """Recompute the neighbours of every live article; returns how many articles have some"""
+    from articles.models import RelatedArticle
+
+    corpus = build_corpus(article_documents())
+    rows = []
+    for row, page_id in enumerate(corpus.ids):
+        rows += _neighbour_rows(page_id, nearest(corpus, similarities(corpus, row)))
+    with transaction.atomic():
+        RelatedArticle.objects.all().delete()
+        RelatedArticle.objects.bulk_create(rows, batch_size=1000)
+    return len({row.article_id for row in rows})
+
+
+def update_related_articles(page_ids):
+    """
+    Recompute the neighbours of published articles, and place each among the
+    neighbours of the articles it is now similar to.
+
+    Similarity is symmetric, so one pass over a published article's terms
+    scores it against every article in both directions. Other articles'
+    lists are merged rather than recomputed, and idf drifts as articles are
+    added, so a periodic rebuild_related_articles() keeps everything exact.
+    """
+    corpus = build_corpus(live_documents.current())
+    for page_id in page_ids:
+        _update_neighbours(corpus, page_id)
+
+
+def _update_neighbours(corpus, page_id):
+    from articles.models import RelatedArticle
+
+    row = corpus.positions.get(page_id)
+    if row is None:
+        return
+    scores = similarities(corpus, row)
+
+    # Only lists the article can now enter, or is already in, can change
+    candidates = {corpus.ids[other_row] for other_row in np.flatnonzero(scores > 0)}
+    candidates.update(RelatedArticle.objects.filter(related_id=page_id).values_list('article_id', flat=True))
+    candidates.discard(page_id)
+    candidates = sorted(candidates)
+    stored = defaultdict(list)
+    for start in range(0, len(candidates), CANDIDATE_BATCH_SIZE):
+        for article_id, related_id, score in RelatedArticle.objects.filter(
+            article_id__in=candidates[start:start + CANDIDATE_BATCH_SIZE],
+        ).order_by('article_id', 'rank').values_list('article_id', 'related_id', 'score'):
+            stored[article_id].append((related_id, score))
+
+    changed = {}
+    for other_row in np.flatnonzero(scores > 0):
+        other_id = corpus.ids[other_row]
+        current = [(related_id, score) for related_id, score in stored[other_id] if related_id != page_id]
+        merged = sorted(current + [(page_id, float(scores[other_row]))], key=lambda item: -item[1])
+        merged = merged[:RELATED_ARTICLES_STORED]
+        if merged != stored[other_id]:
+            changed[other_id] = merged
+    # Articles no longer similar at all just lose it
+    for other_id, neighbours in stored.items():
+        if other_id not in changed and any(related_id == page_id for related_id, _ in neighbours):
+            changed[other_id] = [(related_id, score) for related_id, score in neighbours if related_id != page_id]
+
+    rows = _neighbour_rows(page_id, nearest(corpus, scores))
+    for other_id, neighbours in changed.items():
+        rows += _neighbour_rows(other_id, neighbours)
+    with transaction.atomic():
+        RelatedArticle.objects.filter(article_id__in=[page_id, *changed]).delete()
+        RelatedArticle.objects.bulk_create(rows)
+
+
+# Published articles waiting for their neighbours to be recomputed
+_queue = queue.Queue()
+_updater = None
+_updater_lock = threading.Lock()
+
+
+def _update_forever():
+    while True:
+        page_ids = {_queue.get()}
+        # Publishes that arrived meanwhile share one corpus build
+        while True:
+            try:
+                page_ids.add(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            update_related_articles(sorted(page_ids))
+        except Exception as exc:
+            logger.warning(f"Could not update related articles of {sorted(page_ids)}: {exc}")
+        finally:
+            connections.close_all()
+
+
+def queue_related_articles(page_id):
+    """
+    Recompute a published article's neighbours from a background thread, so
+    publishing never waits on the similarity search
+    """
+    global _updater
+    with _updater_lock:
+        if _updater is None or not _updater.is_alive():
+            _updater = threading.Thread(target=_update_forever, name='related-articles', daemon=True)
+            _updater.start()
+    _queue.put(page_id)
+
+
+def remove_related_articles(page_id):
+    """
+    Drop an unpublished article's neighbours and its place in other lists,
+    which are read in rank order and so tolerate the gap
+    """
+    from articles.models import RelatedArticle
+
+    RelatedArticle.objects.filter(Q(article_id=page_id) | Q(related_id=page_id)).delete()
@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from wagtail.signals import page_published, page_unpublished
+
+from articles.models import ArticlePage
+from conditions.models import ConditionPage
+from drugs.models import DrugPage
+from news.models import NewsPage
+
+from . import az_index
+from .events import send_content_event
+from .related_articles import queue_related_articles, remove_related_articles
+from .symptom_engine import symptom_engine
+
+# Page types the gateway is told about, by the name used in its events
+CONTENT_TYPES = {
+    ArticlePage: 'article',
+    NewsPage: 'news',
+    ConditionPage: 'condition',
+    DrugPage: 'drug',
+}
+
+
+@receiver(page_published, sender=DrugPage)
+@receiver(page_unpublished, sender=DrugPage)
+@receiver(post_delete, sender=DrugPage)
+@receiver(page_published, sender=ConditionPage)
+@receiver(page_unpublished, sender=ConditionPage)
+@receiver(post_delete, sender=ConditionPage)
+def refresh_az_index(sender, **kwargs):
+    """Rebuild the A-Z index for the page type on its next use"""
+    az_index.invalidate(sender)
+
+
+@receiver(page_published, sender=ConditionPage)
+def update_symptom_engine(sender, instance, **kwargs):
+    """Re-parse only the published condition"""
+    symptom_engine.update_page(instance)
+
+
+@receiver(page_unpublished, sender=ConditionPage)
+@receiver(post_delete, sender=ConditionPage)
+def remove_from_symptom_engine(sender, instance, **kwargs):
+    symptom_engine.remove_page(instance.id)
+
+
+@receiver(page_published, sender=ArticlePage)
+def refresh_related_articles(sender, instance, **kwargs):
+    """Find the published article's neighbours once its changes are committed"""
+    transaction.on_commit(lambda: queue_related_articles(instance.id))
+
+
+@receiver(page_unpublished, sender=ArticlePage)
+def drop_related_articles(sender, instance, **kwargs):
+    remove_related_articles(instance.id)
+
+
+def _notify_gateway(sender, instance, action):
+    content_type = CONTENT_TYPES[sender]
+    # Only tell the gateway once the change is visible to its requests
+    transaction.on_commit(lambda: send_content_event(content_type, instance, action))
+
+
+def content_published(sender, instance, **kwargs):
+    _notify_gateway(sender, instance, 'published')
+
+
+def content_unpublished(sender, instance, **kwargs):
+    _notify_gateway(sender, instance, 'unpublished')
+
+
+for model in CONTENT_TYPES:
+    page_published.connect(content_published, sender=model)
+    page_unpublished.connect(content_unpublished, sender=model)
@@ -0,0 +1,285 @@
+import html
+import math
+import re
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+from django.db.models import Count, Max
+
+# Seconds between checks for condition pages published by other processes.
+# Publishing in this process updates the engine at once (see api.signals).
+SYMPTOM_ENGINE_CHECK_INTERVAL = 5
+
+# How much each field of a condition page counts towards its symptom profile
+FIELD_WEIGHTS = {'symptoms': 1.0, 'risk_factors': 0.5}
+
+# Weight of the age and gender terms added to a query, relative to a symptom
+DEMOGRAPHIC_WEIGHT = 0.3
+
+# Phrases in a condition's symptoms or complications that raise its urgency
+URGENCY_PHRASES = (
+    ('call 911', 5),
+    ('emergency', 5),
+    ('life-threatening', 5),
+    ('life threatening', 5),
+    ('immediate medical', 5),
+    ('urgent', 4),
+    ('seek medical attention', 4),
+    ('see a doctor', 3),
+    ('see your doctor', 3),
+    ('consult', 2),
+)
+
+STOPWORDS = frozenset("""
+    a about after also an and any are as at be been being but by can could do does during each
+    either for from has have having if in into is it its may might more most much not of on or
+    other over some such than that the their them then there these they this those through to
+    under until very was were what when which while who will with within without you your
+""".split())
+
+_TAG = re.compile(r'<[^>]+>')
+_CLAUSE = re.compile(r'[.,;:!?()\n•/]+')
+_WORD = re.compile(r'[a-z]+')
+
+# Immutable snapshot the scorer reads; rebuilt whenever a condition changes.
+# The weights are a compressed sparse column matrix: the conditions using
+# term t are indices[indptr[t]:indptr[t + 1]], with weights in data.
+Matrix = namedtuple('Matrix', 'vocabulary idf indptr indices data conditions')
+
+
+def plain_text(rich_text):
+    """Rich text as plain text, keeping list items and paragraphs apart"""
+    return html.unescape(_TAG.sub('\n', rich_text or ''))
+
+
+def _stem(word):
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith('s') and not word.endswith('ss') and len(word) > 4:
+        return word[:-1]
+    return word
+
+
+def terms(text):
+    """Words and adjacent word pairs of each clause, minus stopwords"""
+    found = []
+    for clause in _CLAUSE.split(text.lower()):
+        words = [_stem(word) for word in _WORD.findall(clause) if len(word) > 2 and word not in STOPWORDS]
+        found.extend(words)
+        found.extend(f'{first} {second}' for first, second in zip(words, words[1:]))
+    return found
+
+
+def _demographic_terms(age, gender):
+    found = []
+    if gender == 'female':
+        found += ['woman', 'women', 'female']
+    elif gender == 'male':
+        found += ['man', 'men', 'male']
+    if age < 13:
+        found += ['child', 'children', 'infant']
+    elif age < 20:
+        found += ['teen', 'teenager', 'adolescent']
+    elif age >= 60:
+        found += ['older', 'elderly', 'older adult']
+    return found
+
+
+def _urgency(text):
+    text = text.lower()
+    return max((level for phrase, level in URGENCY_PHRASES if phrase in text), default=1)
+
+
+def condition_row(page):
+    """Symptom profile and display fields of one condition page"""
+    weights = {}
+    for field, field_weight in FIELD_WEIGHTS.items():
+        for term in terms(plain_text(getattr(page, field))):
+            weights[term] = weights.get(term, 0.0) + field_weight
+    # Dampen terms repeated many times on one page
+    weights = {term: 1.0 + math.log(weight) if weight > 1 else weight for term, weight in weights.items()}
+
+    description = page.subtitle or ' '.join(plain_text(page.overview).split())
+    return {
+        'id': page.id,
+        'name': page.title,
+        'slug': page.slug,
+        'description': description[:200],
+        'urgency': _urgency(plain_text(page.symptoms) + ' ' + plain_text(page.complications)),
+        'weights': weights,
+    }
+
+
+def build_matrix(rows):
+    """Assemble condition rows into the tf-idf weighted sparse matrix, rows L2-normalised"""
+    conditions = [{key: row[key] for key in ('id', 'name', 'slug', 'description', 'urgency')} for row in rows]
+    vocabulary = {}
+    columns, row_numbers, weights = [], [], []
+    for row_number, row in enumerate(rows):
+        for term, weight in row['weights'].items():
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+            row_numbers.append(row_number)
+            weights.append(weight)
+
+    columns = np.asarray(columns, dtype=np.int32)
+    row_numbers = np.asarray(row_numbers, dtype=np.int32)
+    weights = np.asarray(weights, dtype=np.float32)
+
+    document_frequency = np.bincount(columns, minlength=len(vocabulary))
+    idf = (np.log((1 + len(rows)) / (1 + document_frequency)) + 1).astype(np.float32)
+    weights *= idf[columns]
+    norms = np.sqrt(np.bincount(row_numbers, weights=weights * weights, minlength=len(rows)))
+    weights /= np.maximum(norms[row_numbers], 1e-12).astype(np.float32)
+
+    order = np.argsort(columns, kind='stable')
+    indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    np.cumsum(document_frequency, out=indptr[1:])
+    return Matrix(vocabulary, idf, indptr, row_numbers[order], weights[order], conditions)
+
+
+def score(matrix, symptoms, age, gender, limit=10):
+    """
+    Rank conditions for reported symptoms with one sparse matrix-vector product.
+
+    Age and gender add low-weight terms that favour conditions whose risk
+    factors mention them, but only conditions matching at least one symptom
+    are returned. Probabilities are each condition's share of the total score
+    of the matches, in percent.
+    """
+    query = {}
+    for symptom in symptoms:
+        for term in terms(symptom):
+            query[term] = 1.0
+    symptom_terms = [term for term in query if term in matrix.vocabulary]
+    if not symptom_terms or not matrix.conditions:
+        return []
+    extra_terms = [
+        term for term in _demographic_terms(age, gender)
+        if term in matrix.vocabulary and term not in query
+    ]
+
+    columns = np.fromiter(
+        (matrix.vocabulary[term] for term in symptom_terms + extra_terms),
+        dtype=np.int64, count=len(symptom_terms) + len(extra_terms),
+    )
+    query_weights = matrix.idf[columns]
+    query_weights[len(symptom_terms):] *= DEMOGRAPHIC_WEIGHT
+
+    # Gather the non-zeros of every queried column in one go
+    starts = matrix.indptr[columns]
+    lengths = matrix.indptr[columns + 1] - starts
+    offsets = np.cumsum(lengths) - lengths
+    positions = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+    rows = matrix.indices[positions]
+    contributions = matrix.data[positions] * np.repeat(query_weights, lengths)
+
+    size = len(matrix.conditions)
+    scores = np.bincount(rows, weights=contributions, minlength=size)
+    symptom_positions = lengths[:len(symptom_terms)].sum()
+    matched = np.flatnonzero(np.bincount(rows[:symptom_positions], minlength=size))
+
+    total = scores[matched].sum()
+    if len(matched) > limit:
+        matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+    ranked = matched[np.argsort(-scores[matched], kind='stable')]
+    return [
+        {
+            **matrix.conditions[row],
+            'probability': round(float(scores[row] / total * 100), 1),
+        }
+        for row in ranked
+    ]
+
+
+class SymptomEngine:
+    """
+    Symptom checker over every live condition page, kept in memory.
+
+    Each page is parsed into a row of term weights once. Publishing a page
+    re-parses only that page, and pages published by other processes are
+    picked up by the periodic check, so the database is read once per change
+    rather than once per check. The matrix is reassembled from the parsed rows
+    on the next check after a change, which is a few array operations.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._latest = None
+        self._checked_at = None
+        self._dirty = True
+        self._matrix = build_matrix([])
+        self.builds = 0
+        self.updates = 0
+
+    def _pages(self):
+        from conditions.models import ConditionPage
+
+        return ConditionPage.objects.live().only(
+            'id', 'title', 'slug', 'subtitle', 'overview', 'symptoms', 'risk_factors',
+            'complications', 'last_published_at',
+        )
+
+    def _state(self):
+        state = self._pages().aggregate(latest=Max('last_published_at'), count=Count('id'))
+        return state['latest'], state['count']
+
+    def _load(self, pages):
+        for page in pages:
+            self._rows[page.id] = condition_row(page)
+            if page.last_published_at and (self._latest is None or page.last_published_at > self._latest):
+                self._latest = page.last_published_at
+        self._dirty = True
+
+    def _ensure_current(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < SYMPTOM_ENGINE_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < SYMPTOM_ENGINE_CHECK_INTERVAL:
+                return
+            latest, count = self._state()
+            if self._latest is not None and latest is not None and latest > self._latest:
+                # Published by another process since the last check
+                self._load(self._pages().filter(last_published_at__gte=self._latest))
+                self.updates += 1
+            if not self._rows or count != len(self._rows):
+                # First use, or pages were unpublished or deleted elsewhere
+                self._rows = {}
+                self._latest = None
+                self._load(self._pages())
+                self.builds += 1
+            if self._dirty:
+                self._matrix = build_matrix(list(self._rows.values()))
+                self._dirty = False
+            self._checked_at = now
+
+    def update_page(self, page):
+        """Re-parse one published condition page"""
+        with self._lock:
+            self._load([page])
+            self._checked_at = None
+            self.updates += 1
+
+    def remove_page(self, page_id):
+        with self._lock:
+            if self._rows.pop(page_id, None) is not None:
+                self._dirty = True
+            self._checked_at = None
+
+    def check(self, symptoms, age, gender, limit=10):
+        self._ensure_current()
+        return score(self._matrix, symptoms, age, gender, limit)
+
+    def stats(self):
+        return {
+            'conditions': len(self._matrix.conditions),
+            'terms': len(self._matrix.vocabulary),
+            'builds': self.builds,
+            'updates': self.updates,
+        }
+
+
+symptom_engine = SymptomEngine()
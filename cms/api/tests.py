@@ -0,0 +1,225 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from wagtail.models import Page
+
+from articles.models import ArticlePage, RelatedArticle
+from conditions.models import ConditionPage
+
+from . import related_articles
+from .related_articles import ArticleDocuments, rebuild_related_articles, update_related_articles
+from .symptom_engine import SymptomEngine, build_matrix, score
+from .view_counts import view_counter
+
+
+class ViewCountTests(TestCase):
+    """Views are counted for full responses and for 304 revalidations alike"""
+
+    @classmethod
+    def setUpTestData(cls):
+        root = Page.get_first_root_node()
+        cls.condition = root.add_child(instance=ConditionPage(
+            title='Asthma', slug='asthma', overview='<p>Airways</p>', symptoms='<p>Wheeze</p>',
+            causes='<p>Allergens</p>', diagnosis='<p>Spirometry</p>', treatments='<p>Inhalers</p>',
+            prevention='<p>Avoid triggers</p>',
+        ))
+        cls.article = root.add_child(instance=ArticlePage(
+            title='Sleep and stress', slug='sleep-and-stress', summary='Rest', body='<p>Sleep</p>',
+        ))
+
+    def setUp(self):
+        # Flush only when the test asks, never from the background thread
+        patcher = mock.patch.object(view_counter, 'interval', 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        view_counter.flush()
+
+    def fetch_twice(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+    def test_condition_views_counted_with_matching_etag(self):
+        self.fetch_twice('/api/conditions/asthma')
+        self.assertEqual(view_counter.stats()['pending'], 2)
+        self.assertEqual(view_counter.flush(), 2)
+        self.condition.refresh_from_db()
+        self.assertEqual(self.condition.view_count, 2)
+
+    def test_article_views_counted_with_matching_etag(self):
+        self.fetch_twice('/api/articles/sleep-and-stress')
+        view_counter.flush()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.view_count, 2)
+
+    def test_missing_page_not_counted(self):
+        self.assertEqual(self.client.get('/api/conditions/missing').status_code, 404)
+        self.assertEqual(view_counter.stats()['pending'], 0)
+
+    def test_same_count_pages_share_one_update(self):
+        view_counter.record(ConditionPage, self.condition.id)
+        view_counter.record(ArticlePage, self.article.id)
+        view_counter.record(ArticlePage, self.article.id)
+        with self.assertNumQueries(2):
+            self.assertEqual(view_counter.flush(), 3)
+
+
+class RelatedArticlesTests(TestCase):
+    """Neighbours kept up to date on publish, and the validator following them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        root = Page.get_first_root_node()
+        for title, slug in (('Sleep and stress', 'sleep-and-stress'), ('Stress and sleep loss', 'stress-sleep-loss')):
+            root.add_child(instance=ArticlePage(
+                title=title, slug=slug, summary='Sleep stress', body='<p>Sleep, stress and insomnia</p>',
+            ))
+
+    def setUp(self):
+        # Page ids are reused between tests, so start every test from an empty store
+        patcher = mock.patch.object(related_articles, 'live_documents', ArticleDocuments())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rebuild_invalidates_etag(self):
+        url = '/api/articles/sleep-and-stress/related'
+        before = self.client.get(url)
+        self.assertEqual(before.json(), [])
+
+        rebuild_related_articles()
+        after = self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual([article['slug'] for article in after.json()], ['stress-sleep-loss'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=after['ETag']).status_code, 304)
+
+    def test_validator_reads_only_this_articles_rows(self):
+        rebuild_related_articles()
+        # One aggregate over the article's own rows, then the neighbour list
+        with self.assertNumQueries(2):
+            self.client.get('/api/articles/sleep-and-stress/related')
+
+    def test_unpublished_neighbour_invalidates_etag(self):
+        rebuild_related_articles()
+        url = '/api/articles/sleep-and-stress/related'
+        before = self.client.get(url)
+        ArticlePage.objects.get(slug='stress-sleep-loss').unpublish()
+        after = self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after.json(), [])
+
+    def test_sync_tokenises_only_changed_articles(self):
+        store = ArticleDocuments()
+        self.assertEqual(len(store.current()), 2)
+        self.assertEqual(len(store.current()), 2)
+        self.assertEqual(store.tokenised, 2)
+
+        ArticlePage.objects.filter(slug='stress-sleep-loss').update(last_published_at=timezone.now())
+        store.current()
+        self.assertEqual(store.tokenised, 3)
+
+    def test_update_stores_neighbours_both_ways(self):
+        article = ArticlePage.objects.get(slug='sleep-and-stress')
+        update_related_articles([article.id])
+        self.assertEqual(
+            sorted(RelatedArticle.objects.values_list('article__slug', 'related__slug')),
+            [('sleep-and-stress', 'stress-sleep-loss'), ('stress-sleep-loss', 'sleep-and-stress')],
+        )
+
+    def test_update_reads_only_candidate_lists(self):
+        root = Page.get_first_root_node()
+        for title, slug in (('Knee pain', 'knee-pain'), ('Knee pain in runners', 'knee-runners')):
+            root.add_child(instance=ArticlePage(
+                title=title, slug=slug, summary='Knee pain', body='<p>Knee pain, cartilage and runners</p>',
+            ))
+        rebuild_related_articles()
+        knee = ArticlePage.objects.get(slug='knee-pain')
+        article = ArticlePage.objects.get(slug='sleep-and-stress')
+
+        with CaptureQueriesContext(connection) as queries:
+            update_related_articles([article.id])
+        reads = [query['sql'] for query in queries if '"score"' in query['sql'] and query['sql'].startswith('SELECT')]
+        self.assertEqual(len(reads), 1)
+        other = ArticlePage.objects.get(slug='stress-sleep-loss')
+        # The knee articles share no terms with it, so their lists are never read
+        self.assertIn(f'"article_id" IN ({other.id})', reads[0])
+        self.assertEqual(
+            list(RelatedArticle.objects.filter(article=knee).values_list('related__slug', flat=True)),
+            ['knee-runners'],
+        )
+
+    def test_article_no_longer_similar_leaves_other_neighbours(self):
+        root = Page.get_first_root_node()
+        root.add_child(instance=ArticlePage(
+            title='Stress at work', slug='stress-at-work', summary='Sleep stress', body='<p>Stress and sleep</p>',
+        ))
+        rebuild_related_articles()
+        article = ArticlePage.objects.get(slug='sleep-and-stress')
+        ArticlePage.objects.filter(id=article.id).update(
+            title='Hip fracture', summary='Bones', body='<p>Hip fracture</p>', last_published_at=timezone.now(),
+        )
+        update_related_articles([article.id])
+        self.assertEqual(
+            list(RelatedArticle.objects.filter(article__slug='stress-at-work').values_list('related__slug', flat=True)),
+            ['stress-sleep-loss'],
+        )
+
+
+def condition_weights(page_id, name, weights, urgency=1):
+    return {
+        'id': page_id, 'name': name, 'slug': name.lower(), 'description': '', 'urgency': urgency,
+        'weights': weights,
+    }
+
+
+class SymptomEngineTests(TestCase):
+    """Symptom scoring against a matrix small enough to check by hand"""
+
+    def setUp(self):
+        self.matrix = build_matrix([
+            condition_weights(1, 'Flu', {'fever': 1.0, 'cough': 1.0}),
+            condition_weights(2, 'Measles', {'fever': 1.0, 'rash': 1.0}),
+        ])
+
+    def test_scores_match_hand_computed_tf_idf(self):
+        # idf(fever) = ln(3/3) + 1 = 1 and idf(cough) = idf(rash) = ln(3/2) + 1,
+        # so each row is (1, 1.405) / 1.725 = (0.580, 0.815) after normalising.
+        # Flu scores 0.580 * 1 + 0.815 * 1.405 = 1.725 and Measles 0.580,
+        # 74.8% and 25.2% of their total.
+        results = score(self.matrix, ['Fever', 'coughs'], age=30, gender='other')
+        self.assertEqual(
+            [(result['name'], result['probability']) for result in results],
+            [('Flu', 74.8), ('Measles', 25.2)],
+        )
+
+    def test_only_conditions_matching_a_symptom_are_returned(self):
+        results = score(self.matrix, ['cough'], age=30, gender='other')
+        self.assertEqual([(result['name'], result['probability']) for result in results], [('Flu', 100.0)])
+        self.assertEqual(score(self.matrix, ['headache'], age=30, gender='other'), [])
+
+    def test_demographic_terms_favour_but_never_add_conditions(self):
+        matrix = build_matrix([
+            condition_weights(1, 'Flu', {'fever': 1.0, 'child': 1.0}),
+            condition_weights(2, 'Malaria', {'fever': 1.0, 'travel': 1.0}),
+            condition_weights(3, 'Croup', {'bark': 1.0, 'child': 1.0}),
+        ])
+        results = score(matrix, ['fever'], age=5, gender='other')
+        self.assertEqual([result['name'] for result in results], ['Flu', 'Malaria'])
+        self.assertGreater(results[0]['probability'], results[1]['probability'])
+
+    def test_published_and_unpublished_pages_update_the_engine(self):
+        root = Page.get_first_root_node()
+        condition = root.add_child(instance=ConditionPage(
+            title='Asthma', slug='asthma', overview='<p>Airways</p>', symptoms='<ul><li>Wheezing</li></ul>',
+            causes='<p>Allergens</p>', diagnosis='<p>Spirometry</p>', treatments='<p>Inhalers</p>',
+            prevention='<p>Avoid triggers</p>',
+        ))
+        engine = SymptomEngine()
+        self.assertEqual([result['name'] for result in engine.check(['wheezing'], 30, 'other')], ['Asthma'])
+
+        engine.remove_page(condition.id)
+        ConditionPage.objects.filter(id=condition.id).update(live=False)
+        self.assertEqual(engine.check(['wheezing'], 30, 'other'), [])
@@ -14,13 +14,21 @@ urlpatterns = [
 
     # Conditions
     path('conditions/index', views.conditions_index, name='conditions_index'),
+    path('conditions/az', views.conditions_az, name='conditions_az'),
+    path('conditions/az/<str:letter>', views.conditions_az_letter, name='conditions_az_letter'),
     path('conditions/paths', views.conditions_paths, name='conditions_paths'),
     path('conditions/<slug:slug>', views.condition_detail, name='condition_detail'),
     path('conditions/hi/<slug:slug>', views.condition_detail, name='condition_detail_hi'), #Added Hindi slug for conditions
 
+    # Drugs
+    path('drugs/az', views.drugs_az, name='drugs_az'),
+    path('drugs/az/<str:letter>', views.drugs_az_letter, name='drugs_az_letter'),
+
     # Search
     path('search/articles', views.search_articles, name='search_articles'),
     path('search/conditions', views.search_conditions, name='search_conditions'),
+    path('search/drugs', views.search_drugs, name='search_drugs'),
+    path('suggest/corpus', views.suggest_corpus, name='suggest_corpus'),
 
     # Well-being
     path('well-being', views.well_being, name='well_being'),
@@ -28,4 +36,7 @@ urlpatterns = [
     path('symptom-checker/', views.symptom_checker, name='symptom_checker'),
     path('notifications/subscribe', views.notification_subscribe, name='notification_subscribe'),
     path('newsletter/subscribe', views.newsletter_subscribe, name='newsletter_subscribe'),
+
+    # Monitoring
+    path('metrics', views.metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,98 @@
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+# Page ids per UPDATE, within every backend's limit on query parameters
+VIEW_COUNT_BATCH_SIZE = 500
+
+
+class ViewCounter:
+    """
+    Page views counted in memory and added to view_count in batches.
+
+    Recording a view is a dict increment under a lock. A background thread
+    flushes the pending counts every VIEW_COUNT_FLUSH_INTERVAL seconds, and
+    at exit, as one `view_count = view_count + n` UPDATE per model and
+    distinct n. The increments happen in the database, so concurrent workers
+    never overwrite each other's counts, and pages are never saved, so no
+    revision, signal or search index work runs for a view. Counts that fail
+    to flush are kept for the next attempt.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._thread = None
+        self._stopping = threading.Event()
+        self.flushed = 0
+        self.failures = 0
+
+    def record(self, model, page_id):
+        with self._lock:
+            self._pending[(model, page_id)] += 1
+            if self._thread is None and self.interval > 0:
+                # Started on first use so forked workers each get their own
+                self._thread = threading.Thread(target=self._run, name='view-count-flusher', daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+        if self.interval <= 0:
+            self.flush()
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.flush()
+            connections.close_all()
+
+    def stop(self):
+        self._stopping.set()
+        self.flush()
+
+    def flush(self):
+        """Write the pending counts; returns how many views were written"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        # Pages with the same number of new views share one UPDATE
+        batches = defaultdict(list)
+        for (model, page_id), views in pending.items():
+            batches[(model, views)].append(page_id)
+        batches = [
+            (model, views, page_ids[start:start + VIEW_COUNT_BATCH_SIZE])
+            for (model, views), page_ids in batches.items()
+            for start in range(0, len(page_ids), VIEW_COUNT_BATCH_SIZE)
+        ]
+
+        written = 0
+        for model, views, page_ids in batches:
+            try:
+                model.objects.filter(pk__in=page_ids).update(view_count=F('view_count') + views)
+            except Exception as exc:
+                logger.warning(f"Could not write {views} views for {len(page_ids)} {model.__name__}s: {exc}")
+                self.failures += 1
+                with self._lock:
+                    for page_id in page_ids:
+                        self._pending[(model, page_id)] += views
+                continue
+            written += views * len(page_ids)
+        self.flushed += written
+        return written
+
+    def stats(self):
+        return {
+            'pending': sum(self._pending.values()),
+            'flushed': self.flushed,
+            'failures': self.failures,
+        }
+
+
+view_counter = ViewCounter(settings.VIEW_COUNT_FLUSH_INTERVAL)
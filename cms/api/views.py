@@ -1,36 +1,69 @@
 import json
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.db.models import Q
 
 from wagtail.models import Page
 
-from articles.models import ArticlePage, ArticleCategory
+from articles.models import ArticlePage, ArticleCategory, RelatedArticle
 from conditions.models import ConditionPage, ConditionCategory
+from drugs.models import DrugPage
+from search.views import (
+    article_results, cached_results, condition_results, drug_results, image_urls, invalid_window, page_window,
+    paginated,
+)
+
+from .az_index import LETTERS, condition_index, drug_index
+from .conditional import collection_condition, collection_version, neighbour_condition, page_condition
+from .metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
+from .symptom_engine import symptom_engine
+from .view_counts import view_counter
+
+
+SYMPTOM_CHECKER_DISCLAIMER = (
+    "This assessment is for informational purposes only and does not constitute medical advice. "
+    "Please consult with a healthcare professional for proper diagnosis and treatment."
+)
+
+SYMPTOM_CHECKER_GENDERS = ('male', 'female', 'other')
+
+RELATED_ARTICLES_SHOWN = 3
 
 
 @csrf_exempt
 def symptom_checker(request):
+    """Rank conditions matching the reported symptoms, age and gender"""
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
             age = data.get('age')
             gender = data.get('gender')
             symptoms = data.get('symptoms', [])
+            limit = data.get('limit', 10)
+
+            if not isinstance(age, int) or not 1 <= age <= 120:
+                return JsonResponse({"error": "age must be a whole number from 1 to 120"}, status=400)
+            if gender not in SYMPTOM_CHECKER_GENDERS:
+                return JsonResponse({"error": "gender must be one of male, female, other"}, status=400)
+            if not symptoms or not isinstance(symptoms, list) or not all(isinstance(s, str) for s in symptoms):
+                return JsonResponse({"error": "symptoms must be a non-empty list of strings"}, status=400)
+            if not isinstance(limit, int) or not 1 <= limit <= 50:
+                return JsonResponse({"error": "limit must be a whole number from 1 to 50"}, status=400)
 
-            # Mock response for demonstration
             conditions = [
                 {
-                    "name": "Common Cold",
-                    "description": "A viral infection of the nose and throat",
-                    "probability": 75.5,
-                    "urgency": 1
+                    "name": match['name'],
+                    "slug": match['slug'],
+                    "description": match['description'],
+                    "probability": match['probability'],
+                    "urgency": match['urgency'],
                 }
+                for match in symptom_engine.check(symptoms, age, gender, limit)
             ]
 
             return JsonResponse({
                 "conditions": conditions,
-                "disclaimer": "This is for informational purposes only."
+                "disclaimer": SYMPTOM_CHECKER_DISCLAIMER,
             })
         except json.JSONDecodeError as e:
             return JsonResponse({"error": "Invalid JSON data"}, status=400)
@@ -39,6 +72,7 @@ def symptom_checker(request):
     return JsonResponse({"error": "Method not allowed"}, status=405)
 
 
+@collection_condition(ArticlePage)
 def articles_top_stories(request):
     """Get top stories (featured articles)"""
     try:
@@ -71,6 +105,7 @@ def articles_top_stories(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@collection_condition(ArticlePage)
 def articles_health_topics(request):
     """Get health topics articles"""
     categories = ArticleCategory.objects.all()
@@ -101,6 +136,7 @@ def articles_health_topics(request):
     return JsonResponse(response, safe=False)
 
 
+@collection_condition(ArticlePage)
 def articles_paths(request):
     """Get all article slugs for static path generation"""
     articles = ArticlePage.objects.live().values_list('slug', flat=True)
@@ -109,6 +145,8 @@ def articles_paths(request):
 
 from urllib.parse import unquote
 
+# Views are counted in memory and written in batches, 304s included
+@page_condition(ArticlePage, slug_fields=('slug', 'slug_hi'), on_view=view_counter.record)
 def article_detail(request, slug):
     """Get a single article by its slug"""
     try:
@@ -151,65 +189,55 @@ def article_detail(request, slug):
             'updated_date': article.last_published_at if article.first_published_at != article.last_published_at else None,
         }
 
-        # Update view count
-        article.view_count += 1
-        article.save()
-
         return JsonResponse(article_data)
     except ArticlePage.DoesNotExist:
         return JsonResponse({'message': 'Article not found'}, status=404)
 
 
+@neighbour_condition(RelatedArticle)
 def article_related(request, slug):
-    """Get articles related to the specified article"""
-    try:
-        article = ArticlePage.objects.live().get(slug=slug)
+    """Get articles related to the specified article, from its precomputed neighbours"""
+    neighbours = list(RelatedArticle.objects.filter(
+        article__slug=slug, article__live=True, related__live=True,
+    ).order_by('rank').values(
+        'related_id', 'related__title', 'related__slug', 'related__summary', 'related__image_id',
+        'related__first_published_at',
+    )[:RELATED_ARTICLES_SHOWN])
+    images = image_urls(neighbour['related__image_id'] for neighbour in neighbours)
+
+    response = [{
+        'id': neighbour['related_id'],
+        'title': neighbour['related__title'],
+        'slug': neighbour['related__slug'],
+        'summary': neighbour['related__summary'],
+        'image': images.get(neighbour['related__image_id']),
+        'created_at': neighbour['related__first_published_at'],
+    } for neighbour in neighbours]
 
-        # Get articles with the same category or tags
-        related_articles = ArticlePage.objects.live().filter(
-            Q(category=article.category) | Q(tags__in=article.tags.all())
-        ).exclude(id=article.id).distinct()[:3]
-
-        response = []
-        for related in related_articles:
-            article_data = {
-                'id': related.id,
-                'title': related.title,
-                'slug': related.slug,
-                'summary': related.summary,
-                'image': related.image.get_rendition('fill-800x500').url if related.image else None,
-                'created_at': related.first_published_at,
-            }
-            response.append(article_data)
-
-        return JsonResponse(response, safe=False)
-    except ArticlePage.DoesNotExist:
-        return JsonResponse([], safe=False)
+    return JsonResponse(response, safe=False)
 
 
+@collection_condition(ConditionPage)
 def conditions_index(request):
     """Retrieve a complete index of all health conditions"""
-    conditions = ConditionPage.objects.live().order_by('title')
-
-    response = []
-    for condition in conditions:
-        condition_data = {
-            'id': condition.id,
-            'name': condition.title,
-            'slug': condition.slug,
-            'subtitle': condition.subtitle,
-        }
-        response.append(condition_data)
+    response = [{
+        'id': condition['id'],
+        'name': condition['title'],
+        'slug': condition['slug'],
+        'subtitle': condition['subtitle'],
+    } for condition in condition_index().rows()]
 
     return JsonResponse(response, safe=False)
 
 
+@collection_condition(ConditionPage)
 def conditions_paths(request):
     """Get all condition slugs for static path generation"""
     conditions = ConditionPage.objects.live().values_list('slug', flat=True)
     return JsonResponse(list(conditions), safe=False)
 
 
+@page_condition(ConditionPage, on_view=view_counter.record)
 def condition_detail(request, slug):
     """Get a single condition by its slug"""
     try:
@@ -243,60 +271,86 @@ def condition_detail(request, slug):
             ],
         }
 
-        # Update view count
-        condition.view_count += 1
-        condition.save()
-
         return JsonResponse(condition_data)
     except ConditionPage.DoesNotExist:
         return JsonResponse({'message': 'Condition not found'}, status=404)
 
 
-def search_articles(request):
-    """Search articles by query string"""
-    query = request.GET.get('q', '')
+def _search_page(request, model, results):
+    """Paginated results of one content type for the query string"""
+    window = page_window(request)
+    if window is None:
+        return invalid_window()
+    offset, limit = window
+    query = request.GET.get('q', '').strip()
     if not query:
-        return JsonResponse([], safe=False)
+        return paginated([], 0, offset, limit)
+    matches, total = cached_results(results, query, offset, limit, collection_version(request, model))
+    return paginated(matches, total, offset, limit)
 
-    articles = ArticlePage.objects.live().specific().search(query)
 
-    response = []
-    for article in articles:
-        article_data = {
-            'id': article.id,
-            'title': article.title,
-            'slug': article.slug,
-            'summary': article.summary,
-            'image': article.image.get_rendition('fill-800x500').url if article.image else None,
-            'created_at': article.first_published_at,
-        }
-        response.append(article_data)
-
-    return JsonResponse(response, safe=False)
+@collection_condition(ArticlePage)
+def search_articles(request):
+    """Search articles by query string"""
+    return _search_page(request, ArticlePage, article_results)
 
 
+@collection_condition(ConditionPage)
 def search_conditions(request):
     """Search conditions by query string"""
-    query = request.GET.get('q', '')
-    if not query:
-        return JsonResponse([], safe=False)
+    return _search_page(request, ConditionPage, condition_results)
 
-    conditions = ConditionPage.objects.live().specific().search(query)
-    conditions = [result.specific for result in conditions]
 
-    response = []
-    for condition in conditions:
-        condition_data = {
-            'id': condition.id,
-            'name': condition.title,
-            'slug': condition.slug,
-            'subtitle': condition.subtitle,
-        }
-        response.append(condition_data)
+@collection_condition(DrugPage)
+def search_drugs(request):
+    """Search drugs by query string"""
+    return _search_page(request, DrugPage, drug_results)
 
-    return JsonResponse(response, safe=False)
+
+def _az_listing(request, index):
+    """Letter counts, or the pages whose title starts with ?prefix="""
+    prefix = request.GET.get('prefix', '').strip()
+    if not prefix:
+        return JsonResponse({'letters': index.letter_counts()})
+
+    try:
+        limit = min(int(request.GET.get('limit', 20)), 100)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+    return JsonResponse(index.prefix(prefix, limit), safe=False)
+
+
+def _az_letter(index, letter):
+    if letter.upper() not in LETTERS or len(letter) != 1:
+        return JsonResponse({'message': 'Unknown letter'}, status=404)
+    return JsonResponse(index.letter(letter), safe=False)
+
+
+@collection_condition(DrugPage)
+def drugs_az(request):
+    """A-Z letter counts for drugs, or a title prefix lookup"""
+    return _az_listing(request, drug_index())
+
+
+@collection_condition(DrugPage)
+def drugs_az_letter(request, letter):
+    """Drugs whose title starts with the given letter"""
+    return _az_letter(drug_index(), letter)
 
 
+@collection_condition(ConditionPage)
+def conditions_az(request):
+    """A-Z letter counts for conditions, or a title prefix lookup"""
+    return _az_listing(request, condition_index())
+
+
+@collection_condition(ConditionPage)
+def conditions_az_letter(request, letter):
+    """Conditions whose title starts with the given letter"""
+    return _az_letter(condition_index(), letter)
+
+
+@collection_condition(ArticlePage)
 def well_being(request):
     """Get articles for the well-being section"""
     categories = ['Nutrition', 'Fitness', 'Mental Health', 'Sleep', 'Stress Management', 'Healthy Aging']
@@ -324,6 +378,58 @@ def well_being(request):
             'category': article.category.name if article.category else None,
         } for article in articles[:12]]
     })
+
+
+def _names(*values):
+    """Non-empty names from fields that may hold several, comma separated"""
+    return [name.strip() for value in values for name in (value or '').split(',') if name.strip()]
+
+
+@collection_condition(ArticlePage, ConditionPage, DrugPage)
+def suggest_corpus(request):
+    """Names of every live article, condition and drug, for the gateway's typeahead index"""
+    corpus = []
+    for article in ArticlePage.objects.live().values('id', 'title', 'slug', 'view_count'):
+        corpus.append({
+            'type': 'article',
+            'id': article['id'],
+            'title': article['title'],
+            'slug': article['slug'],
+            'popularity': article['view_count'],
+            # Articles have no Hindi title; their Hindi subtitle is prose, not a name
+            'names': {'en': [article['title']], 'hi': []},
+        })
+    for condition in ConditionPage.objects.live().values(
+        'id', 'title', 'slug', 'also_known_as', 'also_known_as_hi', 'view_count'
+    ):
+        corpus.append({
+            'type': 'condition',
+            'id': condition['id'],
+            'title': condition['title'],
+            'slug': condition['slug'],
+            'popularity': condition['view_count'],
+            'names': {
+                'en': [condition['title']] + _names(condition['also_known_as']),
+                'hi': _names(condition['also_known_as_hi']),
+            },
+        })
+    for drug in DrugPage.objects.live().values('id', 'title', 'slug', 'generic_name', 'brand_names', 'view_count'):
+        corpus.append({
+            'type': 'drug',
+            'id': drug['id'],
+            'title': drug['title'],
+            'slug': drug['slug'],
+            'popularity': drug['view_count'],
+            'names': {'en': [drug['title']] + _names(drug['generic_name'], drug['brand_names']), 'hi': []},
+        })
+    return JsonResponse(corpus, safe=False)
+
+
+def metrics(request):
+    """Metrics of this CMS process in the Prometheus text format"""
+    return HttpResponse(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 from django.http import JsonResponse
 from django.core.mail import send_mail
 from django.conf import settings
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='articles.articlepage')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_to', to='articles.articlepage')),
+            ],
+            options={
+                'ordering': ['article', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('article', 'rank'), name='unique_related_article_rank')],
+            },
+        ),
+    ]
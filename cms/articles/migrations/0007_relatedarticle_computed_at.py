@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_relatedarticle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='relatedarticle',
+            name='computed_at',
+            field=models.DateTimeField(auto_now=True),
+            preserve_default=False,
+        ),
+    ]
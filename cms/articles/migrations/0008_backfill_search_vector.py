@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from search.fulltext import backfill_operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0007_relatedarticle_computed_at'),
+    ]
+
+    operations = [
+        # Pages published before search_vector existed would never match otherwise
+        backfill_operation('articles', 'ArticlePage'),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from wagtail.snippets.models import register_snippet
 
@@ -103,6 +104,9 @@ class ArticlePage(Page):
     body_hi = RichTextField(blank=True, verbose_name="Body (Hindi)")
     featured = models.BooleanField(default=False)
     view_count = models.PositiveIntegerField(default=0)
+    # Weighted full-text document kept current on publish (see search.fulltext);
+    # its GIN index is only created on PostgreSQL, by migration
+    search_vector = SearchVectorField(null=True, editable=False)
     
     tags = ClusterTaggableManager(through=ArticlePageTag, blank=True)
     
@@ -164,4 +168,20 @@ class ArticlePage(Page):
     ]
 
     class Meta:
-        verbose_name = "Article Page"
\ No newline at end of file
+        verbose_name = "Article Page"
+
+class RelatedArticle(models.Model):
+    """Precomputed content-similarity neighbour of an article (see api.related_articles)"""
+    article = models.ForeignKey(ArticlePage, on_delete=models.CASCADE, related_name='neighbours')
+    related = models.ForeignKey(ArticlePage, on_delete=models.CASCADE, related_name='related_to')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    # Part of the related-articles ETag, so recomputed lists are never served as 304
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['article', 'rank']
+        constraints = [
+            # Also the index the related-articles endpoints read through
+            models.UniqueConstraint(fields=['article', 'rank'], name='unique_related_article_rank'),
+        ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from search.fulltext import backfill_operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conditions', '0004_search_vector'),
+    ]
+
+    operations = [
+        # Pages published before search_vector existed would never match otherwise
+        backfill_operation('conditions', 'ConditionPage'),
+    ]
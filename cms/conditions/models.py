@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django import forms
 
@@ -92,6 +93,9 @@ class ConditionPage(Page):
     specialties = models.CharField(max_length=255, blank=True)
     prevalence = models.CharField(max_length=255, blank=True)
     view_count = models.PositiveIntegerField(default=0)
+    # Weighted full-text document kept current on publish (see search.fulltext);
+    # its GIN index is only created on PostgreSQL, by migration
+    search_vector = SearchVectorField(null=True, editable=False)
     
     categories = models.ManyToManyField(
         ConditionCategory,
@@ -164,18 +168,10 @@ class ConditionAZPage(Page):
     ]
 
     def get_context(self, request):
+        from api.az_index import condition_index
+
         context = super().get_context(request)
-        conditions = ConditionPage.objects.live().order_by('title')
-        
-        # Group conditions alphabetically
-        conditions_by_letter = {}
-        for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
-            conditions_by_letter[letter] = [
-                condition for condition in conditions
-                if condition.title.upper().startswith(letter)
-            ]
-            
-        context['conditions_by_letter'] = conditions_by_letter
+        context['conditions_by_letter'] = condition_index().by_letter()
         return context
 
     class Meta:
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:51
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+INDEX_NAME = 'drugs_drugpage_search_vector_gin'
+
+
+def create_search_index(apps, schema_editor):
+    # GIN indexes and tsvectors are PostgreSQL only; elsewhere search falls
+    # back to icontains and the column stays empty
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON drugs_drugpage USING gin (search_vector)')
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drugs', '0002_druglistingpage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drugpage',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,4 +1,5 @@
 
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django import forms
 
@@ -58,17 +59,10 @@ class DrugAZPage(Page):
     ]
 
     def get_context(self, request):
+        from api.az_index import drug_index
+
         context = super().get_context(request)
-        drugs = DrugPage.objects.live().order_by('title')
-        
-        drugs_by_letter = {}
-        for letter in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
-            drugs_by_letter[letter] = [
-                drug for drug in drugs
-                if drug.title.upper().startswith(letter)
-            ]
-            
-        context['drugs_by_letter'] = drugs_by_letter
+        context['drugs_by_letter'] = drug_index().by_letter()
         return context
 
     class Meta:
@@ -98,6 +92,9 @@ class DrugPage(Page):
     storage = RichTextField(blank=True)
     pregnancy_category = models.CharField(max_length=255, blank=True)
     view_count = models.PositiveIntegerField(default=0)
+    # Weighted full-text document kept current on publish (see search.fulltext);
+    # its GIN index is only created on PostgreSQL, by migration
+    search_vector = SearchVectorField(null=True, editable=False)
     
     categories = models.ManyToManyField(
         DrugCategory,
@@ -157,6 +154,7 @@ class DrugPage(Page):
         APIField('categories'),
         APIField('image'),
         APIField('view_count'),
+        APIField('last_published_at'),
     ]
 
     class Meta:
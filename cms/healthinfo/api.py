@@ -96,7 +96,7 @@ def article_related(request, slug):
     lang = request.GET.get('lang', 'en')
     try:
         article = ArticlePage.objects.live().get(slug=slug)
-        related = ArticlePage.objects.live().exclude(id=article.id).order_by('?')[:3]
+        related = ArticlePage.objects.live().filter(related_to__article=article).order_by('related_to__rank')[:3]
         return JsonResponse([get_translated_content(a, lang) for a in related], safe=False)
     except ArticlePage.DoesNotExist:
         return JsonResponse([], safe=False)
@@ -49,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',  # First, so its timings cover the rest
+    'api.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
@@ -169,6 +171,28 @@ REST_FRAMEWORK = {
 # Wagtail API settings
 WAGTAILAPI_LIMIT_MAX = 50
 
+# Gateway endpoint told about published/unpublished pages so it can evict its
+# cache and notify connected clients; events are signed with the shared secret
+GATEWAY_EVENTS_URL = os.environ.get('GATEWAY_EVENTS_URL', '')
+GATEWAY_EVENTS_SECRET = os.environ.get('GATEWAY_EVENTS_SECRET', '')
+
+# Request latency and per-view database query metrics, served at /api/metrics
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+# Per-request cProfile profiling (see api.profiling): requests signed with
+# PROFILING_SECRET, plus a PROFILE_SAMPLE_RATE share of all requests
+PROFILING_SECRET = os.environ.get('PROFILING_SECRET', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILE_INLINE_LIMIT = int(os.environ.get('PROFILE_INLINE_LIMIT', 60))
+
+# Seconds between writes of buffered page views (see api.view_counts); 0 writes
+# each view as it happens, still without saving the page
+VIEW_COUNT_FLUSH_INTERVAL = float(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', 10))
+
+# Pages of search results kept per process (see search.cache); 0 disables it
+SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', 2000))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/stable/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class SearchConfig(AppConfig):
-    name = 'search'
\ No newline at end of file
+    name = 'search'
+
+    def ready(self):
+        from . import signals  # noqa: F401
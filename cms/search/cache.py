@@ -0,0 +1,74 @@
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+def normalize_query(query):
+    """
+    Form of a search query used both to search and as its cache key.
+
+    NFKC composes Devanagari letters typed with a separate nukta and unifies
+    full-width Latin, then case is folded and whitespace collapsed. Full-text
+    and icontains matching ignore all of these, so the results are unchanged.
+    """
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split())
+
+
+class SearchResultCache:
+    """
+    Pages of search results by content type, normalized query and window.
+
+    Keys carry this process's generation, bumped (and the cache emptied) by
+    search.signals whenever a searchable page is published, unpublished or
+    deleted here, and the collection version of the searched type, which the
+    conditional GET reads anyway and which also changes with publishes made
+    by other processes. A result is never served once the content it was
+    built from has changed; entries of stale versions age out of the LRU.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def results(self, kind, fetch, query, offset, limit, version):
+        """The (results, total) of fetch(query, offset, limit), from the cache when current"""
+        if not self.size:
+            return fetch(query, offset, limit)
+        key = (self.generation, version, kind, query, offset, limit)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        cached = fetch(query, offset, limit)
+        with self._lock:
+            self.misses += 1
+            if key[0] == self.generation:
+                self._entries[key] = cached
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'generation': self.generation,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+search_cache = SearchResultCache(settings.SEARCH_CACHE_SIZE)
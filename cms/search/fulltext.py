@@ -0,0 +1,153 @@
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, migrations
+from django.db.models import F, Q, Value
+
+from articles.models import ArticlePage
+from conditions.models import ConditionPage
+from drugs.models import DrugPage
+
+# PostgreSQL has no Hindi text search configuration; 'simple' lowercases and
+# splits on whitespace without stemming or stopwords, which suits Devanagari
+HINDI_CONFIG = 'simple'
+
+# (field, weight, config) making up each model's search_vector. Weights rank
+# A > B > C > D: names first, then headings and summaries, then body text.
+SEARCH_VECTOR_FIELDS = {
+    ArticlePage: (
+        ('title', 'A', 'english'),
+        ('subtitle', 'B', 'english'),
+        ('summary', 'B', 'english'),
+        ('body', 'C', 'english'),
+        ('subtitle_hi', 'B', HINDI_CONFIG),
+        ('summary_hi', 'B', HINDI_CONFIG),
+        ('body_hi', 'C', HINDI_CONFIG),
+    ),
+    ConditionPage: (
+        ('title', 'A', 'english'),
+        ('also_known_as', 'A', 'english'),
+        ('subtitle', 'B', 'english'),
+        ('overview', 'C', 'english'),
+        ('symptoms', 'C', 'english'),
+        ('causes', 'D', 'english'),
+        ('treatments', 'D', 'english'),
+        ('also_known_as_hi', 'A', HINDI_CONFIG),
+        ('subtitle_hi', 'B', HINDI_CONFIG),
+        ('overview_hi', 'C', HINDI_CONFIG),
+        ('symptoms_hi', 'C', HINDI_CONFIG),
+    ),
+    DrugPage: (
+        ('title', 'A', 'english'),
+        ('generic_name', 'A', 'english'),
+        ('brand_names', 'A', 'english'),
+        ('drug_class', 'B', 'english'),
+        ('overview', 'C', 'english'),
+        ('uses', 'C', 'english'),
+        ('side_effects', 'D', 'english'),
+    ),
+}
+
+# Pages whose search_vector one UPDATE statement rewrites when backfilling
+BACKFILL_BATCH_SIZE = 1000
+
+# Fields matched with icontains on databases without full-text search
+FALLBACK_FIELDS = {
+    ArticlePage: ('title', 'subtitle', 'body'),
+    ConditionPage: ('title', 'also_known_as', 'subtitle'),
+    DrugPage: ('title', 'generic_name', 'brand_names', 'drug_class'),
+}
+
+
+def full_text_available():
+    return connection.vendor == 'postgresql'
+
+
+def search_vector(page):
+    """The weighted tsvector of one page, built from its current field values"""
+    vectors = [
+        SearchVector(Value(getattr(page, field) or ''), weight=weight, config=config)
+        for field, weight, config in SEARCH_VECTOR_FIELDS[type(page)]
+    ]
+    return reduce(lambda combined, vector: combined + vector, vectors)
+
+
+def update_search_vector(page):
+    """Store the page's search_vector; a no-op on databases without full-text search"""
+    if not full_text_available():
+        return
+    # A queryset update, so publishing does not go through Page.save() again.
+    # The values are passed in because title lives on the parent page table.
+    type(page).objects.filter(pk=page.pk).update(search_vector=search_vector(page))
+
+
+def backfill_search_vectors(connection, model, fields, batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Rewrite the search_vector of every page of the model, one UPDATE per
+    batch of page ids, joining the page table for fields such as title.
+    Returns how many pages were written; PostgreSQL only.
+    """
+    quote = connection.ops.quote_name
+    table = model._meta.db_table
+    page_table = model._meta.get_field('page_ptr').related_model._meta.db_table
+    parts = []
+    for field, weight, config in fields:
+        column = model._meta.get_field(field)
+        alias = 'page' if column.model._meta.db_table != table else 'own'
+        parts.append(f"setweight(to_tsvector('{config}', coalesce({alias}.{quote(column.column)}, '')), '{weight}')")
+    sql = (
+        f"UPDATE {quote(table)} AS own SET search_vector = {' || '.join(parts)} "
+        f"FROM {quote(page_table)} AS page WHERE page.id = own.page_ptr_id "
+        f"AND own.page_ptr_id >= %s AND own.page_ptr_id < %s"
+    )
+    ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            cursor.execute(sql, [batch[0], batch[-1] + 1])
+    return len(ids)
+
+
+def backfill_operation(app_label, model_name):
+    """
+    Migration operation filling the search_vector of pages that existed
+    before it, so full-text search matches them straight after deploying
+    """
+    def backfill(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        model = apps.get_model(app_label, model_name)
+        fields = next(
+            fields for live_model, fields in SEARCH_VECTOR_FIELDS.items()
+            if live_model._meta.label_lower == model._meta.label_lower
+        )
+        backfill_search_vectors(schema_editor.connection, model, fields)
+
+    return migrations.RunPython(backfill, migrations.RunPython.noop)
+
+
+def search_pages(model, query):
+    """
+    Live pages of the model matching the query, best first.
+
+    On PostgreSQL this is a ranked match against the GIN-indexed
+    search_vector, in both English and the Hindi config, so its cost depends
+    on the matches rather than the size of the corpus. Elsewhere it falls
+    back to icontains on the main fields, ordered by title. The result is a
+    lazy queryset, so slicing it limits the query.
+    """
+    pages = model.objects.live()
+    if not full_text_available():
+        condition = reduce(or_, (Q(**{f'{field}__icontains': query}) for field in FALLBACK_FIELDS[model]))
+        return pages.filter(condition).order_by('title', 'id')
+
+    search_query = (
+        SearchQuery(query, config='english', search_type='websearch')
+        | SearchQuery(query, config=HINDI_CONFIG, search_type='websearch')
+    )
+    return (
+        pages.filter(search_vector=search_query)
+        .annotate(rank=SearchRank(F('search_vector'), search_query))
+        .order_by('-rank', 'id')
+    )
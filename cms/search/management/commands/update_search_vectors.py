@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from search.fulltext import SEARCH_VECTOR_FIELDS, backfill_search_vectors, full_text_available
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search vectors of every article, condition and drug page'
+
+    def handle(self, *args, **options):
+        if not full_text_available():
+            raise CommandError('Full-text search vectors need PostgreSQL; other databases search with icontains')
+        for model, fields in SEARCH_VECTOR_FIELDS.items():
+            count = backfill_search_vectors(connection, model, fields)
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {count} pages indexed')
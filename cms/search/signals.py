@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from wagtail.signals import page_published, page_unpublished
+
+from articles.models import ArticlePage
+from conditions.models import ConditionPage
+from drugs.models import DrugPage
+
+from .cache import search_cache
+from .fulltext import update_search_vector
+
+
+@receiver(page_published, sender=ArticlePage)
+@receiver(page_published, sender=ConditionPage)
+@receiver(page_published, sender=DrugPage)
+def refresh_search_vector(sender, instance, **kwargs):
+    """Re-index the published page for full-text search"""
+    update_search_vector(instance)
+
+
+@receiver(page_published, sender=ArticlePage)
+@receiver(page_unpublished, sender=ArticlePage)
+@receiver(post_delete, sender=ArticlePage)
+@receiver(page_published, sender=ConditionPage)
+@receiver(page_unpublished, sender=ConditionPage)
+@receiver(post_delete, sender=ConditionPage)
+@receiver(page_published, sender=DrugPage)
+@receiver(page_unpublished, sender=DrugPage)
+@receiver(post_delete, sender=DrugPage)
+def invalidate_search_cache(sender, **kwargs):
+    """Start a new search cache generation"""
+    search_cache.invalidate()
@@ -0,0 +1,59 @@
+from django.test import TestCase
+from wagtail.models import Page
+
+from drugs.models import DrugPage
+
+from .cache import SearchResultCache, normalize_query, search_cache
+
+DRUG_FIELDS = {
+    'overview': '<p>Pain relief</p>', 'uses': '<p>Pain</p>', 'dosage': '<p>As directed</p>',
+    'side_effects': '<p>Nausea</p>', 'warnings': '<p>Bleeding</p>',
+}
+
+
+class SearchCacheTests(TestCase):
+    """Search results cached by normalized query and dropped on publish"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.root = Page.get_first_root_node()
+        cls.root.add_child(instance=DrugPage(title='Aspirin', slug='aspirin', generic_name='Aspirin', **DRUG_FIELDS))
+
+    def setUp(self):
+        search_cache.invalidate()
+
+    def search(self, query):
+        response = self.client.get('/api/search/drugs', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [drug['name'] for drug in response.json()['results']]
+
+    def test_normalized_query_variants_share_one_entry(self):
+        self.assertEqual(normalize_query('  ASPIRIN\tTablets '), 'aspirin tablets')
+        hits = search_cache.hits
+        self.assertEqual(self.search('aspirin'), ['Aspirin'])
+        self.assertEqual(self.search('  ASPIRIN '), ['Aspirin'])
+        self.assertEqual(search_cache.hits, hits + 1)
+
+    def test_publish_invalidates_cached_results(self):
+        self.assertEqual(self.search('aspirin'), ['Aspirin'])
+        generation = search_cache.generation
+
+        drug = self.root.add_child(instance=DrugPage(
+            title='Aspirin Plus', slug='aspirin-plus', generic_name='Aspirin', live=False, **DRUG_FIELDS,
+        ))
+        drug.save_revision().publish()
+
+        self.assertEqual(search_cache.generation, generation + 1)
+        self.assertEqual(search_cache.stats()['entries'], 0)
+        self.assertEqual(sorted(self.search('aspirin')), ['Aspirin', 'Aspirin Plus'])
+
+    def test_result_fetched_across_an_invalidation_is_not_stored(self):
+        cache = SearchResultCache(10)
+
+        def fetch(query, offset, limit):
+            # A publish lands while this result is being built
+            cache.invalidate()
+            return ['stale'], 1
+
+        cache.results('drugs', fetch, 'aspirin', 0, 10, 'v1')
+        self.assertEqual(cache.stats()['entries'], 0)
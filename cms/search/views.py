@@ -1,69 +1,139 @@
-
 from django.http import JsonResponse
-from django.db.models import Q
-from wagtail.models import Page
+from wagtail.images import get_image_model
 from articles.models import ArticlePage
 from conditions.models import ConditionPage
 from drugs.models import DrugPage
+from api.conditional import collection_condition, collection_version
+
+from .cache import normalize_query, search_cache
+from .fulltext import search_pages
+
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_PAGE_SIZE = 50
+
+IMAGE_RENDITION = 'fill-800x500'
+
+
+def page_window(request):
+    """Offset and limit of the requested page of results, or None if they are invalid"""
+    try:
+        offset = int(request.GET.get('offset', 0))
+        limit = int(request.GET.get('limit', SEARCH_PAGE_SIZE))
+    except ValueError:
+        return None
+    if offset < 0 or not 1 <= limit <= SEARCH_MAX_PAGE_SIZE:
+        return None
+    return offset, limit
+
+
+def invalid_window():
+    return JsonResponse(
+        {'error': f'offset must be 0 or more and limit between 1 and {SEARCH_MAX_PAGE_SIZE}'},
+        status=400,
+    )
+
+
+def image_urls(image_ids):
+    """Rendition URLs of the given images, fetched together rather than one query per result"""
+    image_ids = {image_id for image_id in image_ids if image_id}
+    if not image_ids:
+        return {}
+    images = get_image_model().objects.filter(id__in=image_ids).prefetch_renditions(IMAGE_RENDITION)
+    return {image.id: image.get_rendition(IMAGE_RENDITION).url for image in images}
+
+
+def article_results(query, offset, limit):
+    """One page of matching articles, with only the listed columns fetched, and the total"""
+    matches = search_pages(ArticlePage, query)
+    rows = list(matches.values(
+        'id', 'title', 'slug', 'summary', 'image_id', 'category__name', 'first_published_at',
+    )[offset:offset + limit])
+    images = image_urls(row['image_id'] for row in rows)
+    return [{
+        'id': row['id'],
+        'title': row['title'],
+        'slug': row['slug'],
+        'summary': row['summary'],
+        'category': row['category__name'],
+        'image': images.get(row['image_id']),
+        'created_at': row['first_published_at'],
+    } for row in rows], matches.count()
 
+
+def condition_results(query, offset, limit):
+    """One page of matching conditions, with only the listed columns fetched, and the total"""
+    matches = search_pages(ConditionPage, query)
+    rows = matches.values('id', 'title', 'slug', 'subtitle')[offset:offset + limit]
+    return [{
+        'id': row['id'],
+        'name': row['title'],
+        'slug': row['slug'],
+        'subtitle': row['subtitle'],
+    } for row in rows], matches.count()
+
+
+def drug_results(query, offset, limit):
+    """One page of matching drugs, with only the listed columns fetched, and the total"""
+    matches = search_pages(DrugPage, query)
+    rows = list(matches.values('id', 'title', 'slug', 'drug_class', 'generic_name', 'image_id')[offset:offset + limit])
+    images = image_urls(row['image_id'] for row in rows)
+    return [{
+        'id': row['id'],
+        'name': row['title'],
+        'slug': row['slug'],
+        'type': row['drug_class'],
+        'description': row['generic_name'],
+        'image': images.get(row['image_id']),
+    } for row in rows], matches.count()
+
+
+def cached_results(results, query, offset, limit, version):
+    """
+    results(query, offset, limit) for the normalized query, served from the
+    search cache while the collection version of the searched pages holds
+    """
+    return search_cache.results(results.__name__, results, normalize_query(query), offset, limit, version)
+
+
+def paginated(results, total, offset, limit):
+    return JsonResponse({'count': total, 'offset': offset, 'limit': limit, 'results': results})
+
+
+@collection_condition(ArticlePage, ConditionPage, DrugPage)
 def search(request):
+    """
+    One page of matching articles, conditions and drugs each, with the total
+    number of matches of each type; offset and limit apply to every type.
+    """
     search_query = request.GET.get('q', '').strip()
-    
+    window = page_window(request)
+    if window is None:
+        return invalid_window()
+    offset, limit = window
+
     if not search_query:
         return JsonResponse({
             'articles': [],
-            'conditions': [], 
-            'drugs': []
+            'conditions': [],
+            'drugs': [],
+            'totals': {'articles': 0, 'conditions': 0, 'drugs': 0},
+            'offset': offset,
+            'limit': limit,
         })
 
     try:
-        # Search articles with Q objects for better matching
-        article_results = ArticlePage.objects.live().filter(
-            Q(title__icontains=search_query) |
-            Q(subtitle__icontains=search_query) |
-            Q(body__icontains=search_query)
-        ).distinct()
-
-        articles = [{
-            'id': article.id,
-            'title': article.title,
-            'slug': article.slug,
-            'summary': getattr(article, 'subtitle', ''),
-            'category': article.categories.first().name if hasattr(article, 'categories') and article.categories.exists() else None,
-            'image': article.image.get_rendition('fill-800x500').url if hasattr(article, 'image') and article.image else None,
-            'created_at': article.first_published_at,
-        } for article in article_results]
-
-        # Search conditions
-        condition_results = ConditionPage.objects.live().filter(
-            Q(title__icontains=search_query) |
-            Q(subtitle__icontains=search_query)
-        ).distinct()
-
-        conditions = [{
-            'id': condition.id,
-            'name': condition.title,
-            'slug': condition.slug,
-            'subtitle': getattr(condition, 'subtitle', ''),
-        } for condition in condition_results]
-
-        # Search drugs
-        drug_results = DrugPage.objects.live().filter(
-            Q(title__icontains=search_query) |
-            Q(drug_type__icontains=search_query)
-        ).distinct()
-
-        drugs = [{
-            'id': drug.id,
-            'name': drug.title,
-            'slug': drug.slug,
-            'type': getattr(drug, 'drug_type', ''),
-        } for drug in drug_results]
+        version = collection_version(request, ArticlePage, ConditionPage, DrugPage)
+        articles, article_total = cached_results(article_results, search_query, offset, limit, version)
+        conditions, condition_total = cached_results(condition_results, search_query, offset, limit, version)
+        drugs, drug_total = cached_results(drug_results, search_query, offset, limit, version)
 
         return JsonResponse({
             'articles': articles,
             'conditions': conditions,
-            'drugs': drugs
+            'drugs': drugs,
+            'totals': {'articles': article_total, 'conditions': condition_total, 'drugs': drug_total},
+            'offset': offset,
+            'limit': limit,
         })
     except Exception as e:
         return JsonResponse({
@@ -11,6 +11,7 @@ export default function Chat() {
 
   useEffect(() => {
     socketRef.current = io('https://0.0.0.0:8000', {
+      path: '/ws/socket.io',
       transports: ['websocket', 'polling'],
       secure: true
     });
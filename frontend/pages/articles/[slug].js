@@ -3,7 +3,7 @@ import Link from 'next/link';
 import Image from 'next/image';
 import { NextSeo } from 'next-seo';
 import ArticleCard from '../../components/ArticleCard';
-import { fetchArticle, fetchArticlePaths, fetchRelatedArticles } from '../../utils/api';
+import { fetchArticlePaths, fetchArticleWithRelated } from '../../utils/api';
 import ContentNav from '../../components/ContentNav'; // Added import statement
 
 export default function ArticleDetail({ article, relatedArticles }) {
@@ -378,7 +378,8 @@ export async function getStaticPaths() {
 
 export async function getStaticProps({ params, locale }) {
   try {
-    const article = await fetchArticle(params.slug, locale);
+    // The article and its related articles come back from one batch request
+    const { article, relatedArticles } = await fetchArticleWithRelated(params.slug, locale);
 
     if (!article) {
       return {
@@ -386,9 +387,6 @@ export async function getStaticProps({ params, locale }) {
       };
     }
 
-    // Fetch related articles (consider passing lang here too if related articles are language-dependent)
-    const relatedArticles = await fetchRelatedArticles(params.slug);
-
     return {
       props: {
         article,
@@ -1,6 +1,8 @@
 import axios from 'axios';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://0.0.0.0:8001';
+// /api/batch is served by the FastAPI gateway, not by the CMS behind API_URL
+const GATEWAY_URL = process.env.NEXT_PUBLIC_GATEWAY_URL || 'http://localhost:8000';
 
 const api = axios.create({
   baseURL: process.env.NEXT_PUBLIC_API_URL || 'http://localhost:3000/api', // Unified base'http://0.0.0.0:8001',
@@ -34,6 +36,18 @@ api.interceptors.response.use(
     return Promise.reject(error);
   }
 );
+// Batch several GET requests into one round trip through the gateway.
+// `requests` is a list of { id, path, params }; resolves to a map of id -> { status, body }.
+export const fetchBatch = async (requests) => {
+  try {
+    const response = await axios.post(`${GATEWAY_URL}/api/batch`, { requests }, { timeout: 10000 });
+    return response.data.responses;
+  } catch (error) {
+    console.error('Error fetching batch:', error);
+    throw error;
+  }
+};
+
 // Top stories
 export const fetchTopStories = async () => {
   try {
@@ -156,6 +170,36 @@ export const fetchRelatedArticles = async (slug) => {
   }
 };
 
+// Article and its related articles in one round trip
+export const fetchArticleWithRelated = async (slug, lang) => {
+  const encodedSlug = encodeURIComponent(slug);
+  const currentLang = lang || (typeof window !== 'undefined' ? localStorage.getItem('language') || 'en' : 'en');
+  let responses;
+  try {
+    responses = await fetchBatch([
+      { id: 'article', path: `/api/articles/${encodedSlug}`, params: { lang: currentLang } },
+      { id: 'related', path: `/api/articles/${encodedSlug}/related` },
+    ]);
+  } catch (error) {
+    // Gateway unreachable: load both resources separately instead
+    const [article, relatedArticles] = await Promise.all([
+      fetchArticle(slug, currentLang),
+      fetchRelatedArticles(encodedSlug),
+    ]);
+    return { article, relatedArticles };
+  }
+  // A missing or failed sub-response counts as a failed fetch of that resource
+  const article = responses?.article;
+  const related = responses?.related;
+  if (article?.status !== 200) {
+    console.error(`Error fetching article ${slug}:`, article?.status ?? 'missing from batch');
+  }
+  return {
+    article: article?.status === 200 ? article.body : null,
+    relatedArticles: related?.status === 200 ? related.body : [],
+  };
+};
+
 // Latest news
 export const fetchLatestNews = async () => {
   try {
@@ -188,7 +232,7 @@ export const fetchDrugsIndex = async () => {
       meta: drug.meta,
       generic_name: drug.generic_name,
       brand_names: drug.brand_names,
-      drug_class: drug_class
+      drug_class: drug.drug_class
     }));
   } catch (error) {
     console.error('Error fetching drugs index:', error);